@@ -0,0 +1,82 @@
+import asyncio
+import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse, StreamingResponse
+
+from backend.app.core import dependencies, profiler
+from backend.app.core import database as db_core
+from backend.app.core.config import settings
+from backend.app.services import export_service
+
+router = APIRouter()
+
+
+@router.post("/profile")
+async def profile_worker(
+    requests: Optional[int] = Query(
+        None, ge=1, le=10000, description="Profile the next N requests."),
+    seconds: Optional[float] = Query(
+        None, gt=0, description="Profile for the next T seconds."),
+    interval_ms: float = Query(
+        5.0, ge=1.0, le=1000.0, description="Stack sampling interval."),
+    format: str = Query("json", pattern="^(json|folded)$"),
+    current_user: db_core.User = Depends(dependencies.require_admin),
+):
+    """Samples this worker for the next N requests or T seconds. Admin only.
+
+    ``format=folded`` returns collapsed stacks for flamegraph tools; ``json``
+    also includes a per-request span breakdown (dependencies and RAG stages).
+    """
+    if requests is None and seconds is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Specify 'requests', 'seconds', or both."
+        )
+    duration = min(seconds or settings.PROFILER_MAX_SECONDS,
+                   settings.PROFILER_MAX_SECONDS)
+    try:
+        session = profiler.start_session(
+            requests, duration, interval_ms / 1000)
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+    # The session ends itself on deadline or request count; just wait for it.
+    while not session.finished:
+        await asyncio.sleep(0.05)
+
+    if format == "folded":
+        return PlainTextResponse(session.folded())
+    return session.report()
+
+
+@router.get("/export/{table}")
+def export_logs(
+    table: str,
+    format: str = Query("ndjson", pattern="^(ndjson|csv|parquet)$"),
+    start: Optional[datetime.datetime] = Query(
+        None, description="Only rows at or after this time."),
+    end: Optional[datetime.datetime] = Query(
+        None, description="Only rows before this time."),
+    after_id: int = Query(
+        0, ge=0, description="Resume after the last row id received."),
+    current_user: db_core.User = Depends(dependencies.require_admin),
+):
+    """Streams query_logs or feedback as NDJSON, CSV or Parquet. Admin only.
+
+    Rows are ordered by id; an interrupted export resumes with ``after_id``
+    set to the id of the last row received.
+    """
+    if table not in export_service.EXPORT_TABLES:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown table. Exportable: {', '.join(export_service.EXPORT_TABLES)}"
+        )
+    stream = export_service.export(
+        table, format, start=start, end=end, after_id=after_id, header=after_id == 0)
+    return StreamingResponse(
+        stream,
+        media_type=export_service.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{table}.{format}"'},
+    )
@@ -0,0 +1,66 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from backend.app.core import database, dependencies
+from backend.app.core import database as db_core
+from backend.app.models import schemas
+from backend.app.services import analytics_service
+
+# Every endpoint reads the rollup tables only, so response time does not
+# grow with the size of query_logs.
+router = APIRouter()
+
+
+@router.get("/summary", response_model=schemas.AnalyticsSummary)
+def get_summary(
+    hours: int = Query(24, ge=1, le=24 * 366),
+    current_user: db_core.User = Depends(dependencies.require_admin),
+    db: Session = Depends(database.get_db)
+):
+    """Query volume, error rate and average rating over the last N hours."""
+    return analytics_service.summary(db, hours=hours)
+
+
+@router.get("/queries/hourly", response_model=List[schemas.HourlyQueryStats])
+def get_queries_per_hour(
+    hours: int = Query(24, ge=1, le=24 * 366),
+    current_user: db_core.User = Depends(dependencies.require_admin),
+    db: Session = Depends(database.get_db)
+):
+    return analytics_service.queries_per_hour(db, hours=hours)
+
+
+@router.get("/queries/users", response_model=List[schemas.UserQueryStats])
+def get_queries_per_user(
+    hours: int = Query(24 * 7, ge=1, le=24 * 366),
+    limit: int = Query(50, ge=1, le=1000),
+    current_user: db_core.User = Depends(dependencies.require_admin),
+    db: Session = Depends(database.get_db)
+):
+    return analytics_service.queries_per_user(db, hours=hours, limit=limit)
+
+
+@router.get("/sources", response_model=List[schemas.SourceStats])
+def get_top_sources(
+    limit: int = Query(10, ge=1, le=1000),
+    current_user: db_core.User = Depends(dependencies.require_admin),
+    db: Session = Depends(database.get_db)
+):
+    return analytics_service.top_sources(db, limit=limit)
+
+
+@router.get("/feedback", response_model=List[schemas.HourlyFeedbackStats])
+def get_feedback(
+    hours: int = Query(24 * 7, ge=1, le=24 * 366),
+    current_user: db_core.User = Depends(dependencies.require_admin),
+    db: Session = Depends(database.get_db)
+):
+    return analytics_service.feedback_summary(db, hours=hours)
+
+
+@router.post("/refresh")
+def refresh_rollups(current_user: db_core.User = Depends(dependencies.require_admin)):
+    """Folds logs written since the last run into the rollups now."""
+    return {"processed": analytics_service.refresh_rollups()}
@@ -1,5 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import timedelta
 
@@ -14,9 +16,9 @@ router = APIRouter()
 
 
 @router.post("/token", response_model=schemas.Token)
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(database.get_db)):
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(database.get_async_db)):
     # Use db_core.User for type hint if needed, but service handles it
-    user = user_service.authenticate_user(
+    user = await user_service.authenticate_user_async(
         db, username=form_data.username, password=form_data.password)
     if not user:
         raise HTTPException(
@@ -44,36 +46,36 @@ def reset_password(email: str, db: Session = Depends(database.get_db)):
 
 
 @router.post("/change-password")
-def change_password(token: str, new_password: str, db: Session = Depends(database.get_db)):
+async def change_password(token: str, new_password: str, db: AsyncSession = Depends(database.get_async_db)):
     payload = security.decode_access_token(token)
     if not payload:
         raise HTTPException(status_code=400, detail="Invalid or expired token")
-    user = db.query(db_core.User).filter(
-        db_core.User.id == payload.get("sub")).first()
+    user = await db.scalar(select(db_core.User).where(
+        db_core.User.id == payload.get("sub")).limit(1))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    user.hashed_password = security.hash_password(new_password)
-    db.commit()
+    user.hashed_password = await security.hash_password_async(new_password)
+    await db.commit()
     return {"message": "Password changed successfully"}
 
 
 @router.post("/signup", response_model=schemas.User)
-def signup(user: schemas.UserCreate, db: Session = Depends(database.get_db)):
+async def signup(user: schemas.UserCreate, db: AsyncSession = Depends(database.get_async_db)):
     # Check if the username already exists
-    existing_user = user_service.get_user(db, user.username)
+    existing_user = await user_service.get_user_async(db, user.username)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already exists",
         )
     # Create the user
-    new_user = user_service.create_user(db, user)
+    new_user = await user_service.create_user_async(db, user)
     return new_user
 
 
 @router.post("/signin", response_model=schemas.Token)
-def signin(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(database.get_db)):
-    user = user_service.authenticate_user(
+async def signin(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(database.get_async_db)):
+    user = await user_service.authenticate_user_async(
         db, username=form_data.username, password=form_data.password
     )
     if not user:
@@ -102,30 +104,31 @@ def request_password_reset(email: str, db: Session = Depends(database.get_db)):
 
 
 @router.post("/password-change")
-def change_password(
-    token: str, new_password: str, db: Session = Depends(database.get_db)
+async def change_password(
+    token: str, new_password: str, db: AsyncSession = Depends(database.get_async_db)
 ):
     payload = security.decode_access_token(token)
     if not payload:
         raise HTTPException(status_code=400, detail="Invalid or expired token")
-    user = db.query(db_core.User).filter(
+    user = await db.scalar(select(db_core.User).where(
         db_core.User.username == payload.get("sub")
-    ).first()
+    ).limit(1))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    user.hashed_password = security.hash_password(new_password)
-    db.commit()
+    user.hashed_password = await security.hash_password_async(new_password)
+    await db.commit()
     return {"message": "Password changed successfully"}
 
 
 @router.put("/profile", response_model=schemas.User)
-def update_profile(
+async def update_profile(
     user_update: schemas.UserCreate,
     current_user: db_core.User = Depends(dependencies.get_current_user),
-    db: Session = Depends(database.get_db),
+    # Same session that loaded current_user.
+    db: AsyncSession = Depends(database.get_async_db),
 ):
     current_user.username = user_update.username
-    current_user.hashed_password = security.hash_password(user_update.password)
-    db.commit()
-    db.refresh(current_user)
+    current_user.hashed_password = await security.hash_password_async(user_update.password)
+    await db.commit()
+    await db.refresh(current_user)
     return current_user
@@ -1,8 +1,10 @@
 # Added BackgroundTasks
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+import json
 import os
-from typing import List, Tuple  # Added Tuple
+from typing import AsyncIterator, List, Optional, Tuple  # Added Tuple
 
 from backend.app.core import database, dependencies, config
 from backend.app.models import schemas
@@ -11,13 +13,18 @@ from backend.app.core import database as db_core
 # Corrected import
 from backend.app.services.document_service import get_document
 from backend.app.core.database import get_db  # Import get_db
+from backend.app.services import document_service
+from backend.app.services.extractors import supported_extensions
 # Import the embedding function
-from backend.app.services.qa_service import process_and_embed_document
-from backend.app.data_access import log_document_change
+from backend.app.services.qa_service import schedule_document_processing, remove_document_from_index
+from backend.app.core.logging_config import get_logger
+from backend.app.core.events import broker, TERMINAL_STAGES
+from backend.app.data_access import get_document_async, log_document_change
 from backend.app.core.database import DocumentHistory  # Corrected import
 from backend.app.services.document_service import create_document  # Corrected import
 
 router = APIRouter()
+logger = get_logger("api.documents")
 
 
 @router.post("/upload", response_model=schemas.DocumentInfo, status_code=status.HTTP_201_CREATED)
@@ -27,7 +34,7 @@ def upload_document_with_embedding(
     current_user: db_core.User = Depends(dependencies.require_admin),
     db: Session = Depends(database.get_db)
 ):
-    allowed_extensions = {".pdf", ".txt", ".docx"}
+    allowed_extensions = set(supported_extensions())
     file_ext = os.path.splitext(file.filename)[1].lower()
     if file_ext not in allowed_extensions:
         raise HTTPException(
@@ -64,9 +71,8 @@ def upload_document_with_embedding(
     db_doc = document_service.create_document_record(db, doc_create)
 
     # Trigger background task for processing and embedding
-    background_tasks.add_task(
-        process_and_embed_document, db_doc.id)  # Pass only doc_id
-    print(f"Background task added for embedding document ID: {db_doc.id}")
+    schedule_document_processing(
+        background_tasks, db_doc.id, user_id=current_user.id)
 
     # Return the initial document info (status is still 'uploaded')
     return db_doc
@@ -84,30 +90,103 @@ def list_documents(
     return documents
 
 
+def _final_event(doc: db_core.Document) -> dict:
+    return {"doc_id": doc.id, "user_id": doc.uploaded_by_id,
+            "stage": doc.status, "progress": 100.0}
+
+
+async def _finished(doc_id: int) -> Optional[dict]:
+    """The document's final status as an event, if its ingestion has ended."""
+    async with db_core.AsyncSessionLocal() as db:
+        doc = await get_document_async(db, doc_id)
+    if doc is None or doc.status not in TERMINAL_STAGES:
+        return None
+    return _final_event(doc)
+
+
+async def _progress_stream(doc_id: Optional[int], user_id: Optional[int]) -> AsyncIterator[str]:
+    # Ingestion may finish between the status check in the handler and the
+    # subscription; re-reading the status once subscribed catches that.
+    check = (lambda: _finished(doc_id)) if doc_id is not None else None
+    async for event in broker.subscribe(doc_id=doc_id, user_id=user_id, check=check):
+        if event is None:
+            yield ": keep-alive\n\n"
+            continue
+        yield f"event: progress\ndata: {json.dumps(event)}\n\n"
+        if doc_id is not None and event["stage"] in TERMINAL_STAGES:
+            return
+
+
+@router.get("/events")
+def stream_my_progress(
+    current_user: db_core.User = Depends(dependencies.require_admin),
+):
+    """Server-sent progress events for every document the current user is ingesting."""
+    return StreamingResponse(
+        _progress_stream(None, current_user.id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/{doc_id}/events")
+def stream_document_progress(
+    doc_id: int,
+    current_user: db_core.User = Depends(dependencies.require_admin),
+    db: Session = Depends(database.get_db)
+):
+    """Server-sent progress events for one document; closes once it is embedded or failed.
+
+    Documents that are already finished get their final status as a single event.
+    """
+    doc = document_service.get_document(db, doc_id)
+    if not doc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
+    if doc.status in TERMINAL_STAGES and broker.latest(doc_id) is None:
+        return StreamingResponse(
+            iter([f"event: progress\ndata: {json.dumps(_final_event(doc))}\n\n"]),
+            media_type="text/event-stream",
+        )
+    return StreamingResponse(
+        _progress_stream(doc_id, None),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.delete("/{doc_id}", response_model=schemas.DocumentInfo)
 def delete_document(
     doc_id: int,
+    background_tasks: BackgroundTasks,
     current_user: db_core.User = Depends(dependencies.require_admin),
     db: Session = Depends(database.get_db)
 ):
     """Deletes a document and its record. Admin only."""
-    # TODO: Need to also delete associated embeddings from FAISS
     deleted_doc, error = document_service.delete_document_record(db, doc_id)
     if not deleted_doc:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
     if error:
-        print(f"Warning: {error}")
+        logger.warning(error, extra={"doc_id": doc_id})
+    # Chunks shared with other documents (near-duplicates) stay indexed.
+    background_tasks.add_task(remove_document_from_index, doc_id)
     return deleted_doc
 
 
 @router.put("/{doc_id}/replace")
-def replace_document(doc_id: int, new_file: UploadFile, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+def replace_document(
+    doc_id: int,
+    new_file: UploadFile,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: db_core.User = Depends(dependencies.require_admin),
+):
     # Logic to replace the document and increment the version
-    print(
-        f"Replacing document with ID {doc_id} with new file: {new_file.filename}")
+    logger.info("Replacing document with new file",
+                extra={"doc_id": doc_id, "document": new_file.filename})
     # 1. Validate the new file
-    allowed_extensions = {".pdf", ".txt", ".docx"}
+    allowed_extensions = set(supported_extensions())
     file_ext = os.path.splitext(new_file.filename)[1].lower()
     if file_ext not in allowed_extensions:
         raise HTTPException(
@@ -136,9 +215,8 @@ def replace_document(doc_id: int, new_file: UploadFile, background_tasks: Backgr
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
     # 4. Process the new document in the background
-    background_tasks.add_task(
-        process_and_embed_document, db_doc.id)
-    print(f"Background task added for embedding new document ID: {db_doc.id}")
+    schedule_document_processing(
+        background_tasks, db_doc.id, user_id=current_user.id)
     return {"message": "Document replaced successfully", "document": db_doc}
 
 
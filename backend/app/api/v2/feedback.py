@@ -1,12 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from backend.app.core.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.app.core.database import get_async_db
 from backend.app.models.schemas import FeedbackCreate, FeedbackResponse
-from backend.app.data_access import log_feedback
+from backend.app.data_access import log_feedback_async
 
 router = APIRouter()
 
 
 @router.post("/", response_model=FeedbackResponse)
-def submit_feedback(feedback: FeedbackCreate, db: Session = Depends(get_db)):
-    return log_feedback(db, feedback)
+async def submit_feedback(feedback: FeedbackCreate, db: AsyncSession = Depends(get_async_db)):
+    return await log_feedback_async(db, feedback)
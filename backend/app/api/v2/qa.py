@@ -1,23 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from backend.app.core import database, dependencies
 from backend.app.core import database as db_core
 from backend.app.models import schemas
-from backend.app.services import qa_service
+from backend.app.services import qa_service, batch_service
+from backend.app.core.config import settings
+from backend.app.core.logging_config import get_logger
+from backend.app.core import profiler
+from backend.app.core import admission
 
 # Create a router for the QA endpoints
 router = APIRouter()
+logger = get_logger("api.qa")
 
 # Endpoint to process a query using RAG
 @router.post("/query", response_model=schemas.QueryResponse)
-def ask_question(
+async def ask_question(
     query: schemas.QueryRequest,
+    request: Request,
     current_user: db_core.User = Depends(dependencies.require_staff_or_admin),
-    db: Session = Depends(database.get_db) 
+    db: AsyncSession = Depends(database.get_async_db)
 ):
+    # The pipeline inherits the deadline; past it, it answers extractively.
+    budget = admission.start_budget(admission.budget_seconds(query.latency_budget_seconds))
     try:
-        answer, sources = qa_service.process_query_with_rag(query.query_text) # Process the query using RAG
+        with profiler.span("qa_service.process_query_with_rag"):
+            # Runs in the threadpool; abandoned if the client disconnects.
+            result = await admission.run_until_disconnect(
+                request, qa_service.process_query_with_rag, query.query_text)
+        answer, sources = result.answer, result.sources
         if not answer:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -30,53 +45,106 @@ def ask_question(
             )
 
         # Log the query attempt with the answer and sources
-        qa_service.log_query(
-            db=db, 
+        await qa_service.log_query_async(
+            db=db,
             user_id=current_user.id,
             query_text=query.query_text,
             response_text=answer,
-            source_references=sources
+            source_references=sources,
+            is_error=result.answer_type == "error"
         )
 
-        print(f"{answer} \n{sources}")
+        logger.info("Query answered", extra={
+            "sources": sources, "answer_type": result.answer_type})
 
-        return schemas.QueryResponse(answer=answer, sources=sources)
+        return schemas.QueryResponse(
+            response_text=answer,
+            source_references=sources,
+            index_generation=result.generation,
+            answer_type=result.answer_type,
+        )
 
+    except admission.RequestCancelled:
+        # Nobody is listening any more; 499 only shows up in our own metrics.
+        return Response(status_code=499)
+    except admission.DeadlineExceeded as e:
+        # The budget ran out before retrieval finished: nothing to answer from.
+        await qa_service.log_query_async(
+            db=db,
+            user_id=current_user.id,
+            query_text=query.query_text,
+            response_text=f"Error: {e}",
+            source_references="N/A",
+            is_error=True
+        )
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=f"Latency budget exhausted during {e.stage}."
+        )
     except Exception as e:
         # Log the error query attempt if needed
-        qa_service.log_query(
+        await qa_service.log_query_async(
             db=db,
             user_id=current_user.id,
             query_text=query.query_text,
             response_text=f"Error: {e}",
-            source_references="N/A"
+            source_references="N/A",
+            is_error=True
         )
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred during query processing: {e}"
         )
+    finally:
+        admission.deadline.reset(budget)
+
+# Endpoint to answer many questions in one request, streamed as NDJSON
+@router.post("/batch")
+def ask_questions_batch(
+    batch: schemas.BatchQueryRequest,
+    current_user: db_core.User = Depends(dependencies.require_staff_or_admin),
+):
+    """Answers a list of questions, streaming one JSON line per answer as it completes."""
+    if not batch.questions:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="No questions provided.")
+    if len(batch.questions) > settings.BATCH_MAX_QUESTIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.BATCH_MAX_QUESTIONS} questions per batch."
+        )
+    if not 1 <= batch.k <= 50:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="k must be between 1 and 50.")
+
+    results = batch_service.run_batch(
+        batch.questions, user_id=current_user.id, k=batch.k)
+    return StreamingResponse(
+        (json.dumps(result) + "\n" for result in results),
+        media_type="application/x-ndjson",
+    )
 
 # Endpoint to retrieve the query history for the current user
 @router.get("/history", response_model=List[schemas.QueryLogInfo])
-def get_query_history(
+async def get_query_history(
     skip: int = 0, # Offset for pagination
     limit: int = 100, # Limit for pagination
     current_user: db_core.User = Depends(dependencies.require_staff_or_admin), # Dependency to get the current user
-    db: Session = Depends(database.get_db) # Dependency to get the database session
+    db: AsyncSession = Depends(database.get_async_db) # Dependency to get the database session
 ):
     """Retrieves the query history for the current user."""
-    history = qa_service.get_user_query_history(db, user_id=current_user.id, skip=skip, limit=limit)
+    history = await qa_service.get_user_query_history_async(db, user_id=current_user.id, skip=skip, limit=limit)
     return history
 
 # Endpoint to retrieve all query logs (Admin only)
 @router.get("/history/all", response_model=List[schemas.QueryLogInfo])
-def get_all_query_history(
+async def get_all_query_history(
     skip: int = 0,
     limit: int = 1000,
     current_user: db_core.User = Depends(dependencies.require_admin), # Admin only
-    db: Session = Depends(database.get_db)
+    db: AsyncSession = Depends(database.get_async_db)
 ):
     """Retrieves all query logs (Admin only)."""
-    history = qa_service.get_all_query_logs(db, skip=skip, limit=limit)
+    history = await qa_service.get_all_query_logs_async(db, skip=skip, limit=limit)
     return history
 
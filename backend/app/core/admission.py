@@ -0,0 +1,172 @@
+import asyncio
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+from . import metrics
+from .config import settings
+from .logging_config import get_logger
+
+logger = get_logger("admission")
+
+# Set for requests that run through run_until_disconnect(); pipeline stages
+# poll it with raise_if_cancelled() so abandoned work stops early.
+cancel_event: ContextVar[Optional[threading.Event]] = ContextVar(
+    "cancel_event", default=None)
+
+# Monotonic time by which a request must be answered (see start_budget());
+# stages check it with check_deadline() and give up once it has passed.
+deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+_IDLE_BUCKET_SECONDS = 600.0
+
+
+class RequestCancelled(Exception):
+    """The client went away; the remaining pipeline work is not needed."""
+
+
+class DeadlineExceeded(Exception):
+    """The request's latency budget ran out during ``stage``."""
+
+    def __init__(self, stage: str):
+        super().__init__(f"Latency budget exhausted during {stage}")
+        self.stage = stage
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate  # tokens per second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self, now: float) -> float:
+        """Takes one token; returns 0 on success, else seconds until one is available."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / self.rate if self.rate > 0 else float("inf")
+
+
+class AdmissionController:
+    """Per-key token buckets plus a global cap on requests in flight.
+
+    ``admit`` is cheap and never blocks: over-limit requests are rejected
+    immediately so that admitted ones keep their latency.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int, max_in_flight: int):
+        self.rate = rate_per_minute / 60.0
+        self.burst = max(burst, 1)
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    def admit(self, key: str) -> Tuple[Optional[int], float]:
+        """Returns (None, 0) when admitted, else (HTTP status, retry-after seconds)."""
+        now = time.monotonic()
+        with self._lock:
+            if self.max_in_flight and self.in_flight >= self.max_in_flight:
+                return 503, settings.OVERLOAD_RETRY_AFTER_SECONDS
+            if self.rate > 0:
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+                wait = bucket.take(now)
+                if wait:
+                    return 429, wait
+            self.in_flight += 1
+            self._sweep(now)
+        metrics.ADMITTED_IN_FLIGHT.set(self.in_flight)
+        return None, 0.0
+
+    def release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+        metrics.ADMITTED_IN_FLIGHT.set(self.in_flight)
+
+    def _sweep(self, now: float) -> None:
+        # Drop buckets idle long enough to have refilled; keeps memory bounded.
+        if now - self._last_sweep < _IDLE_BUCKET_SECONDS:
+            return
+        self._last_sweep = now
+        self._buckets = {key: bucket for key, bucket in self._buckets.items()
+                         if now - bucket.updated < _IDLE_BUCKET_SECONDS}
+
+
+controller = AdmissionController(
+    settings.RATE_LIMIT_PER_MINUTE,
+    settings.RATE_LIMIT_BURST,
+    settings.MAX_IN_FLIGHT_QUERIES,
+)
+
+
+def is_guarded(path: str) -> bool:
+    return any(path.startswith(prefix) for prefix in settings.ADMISSION_PATHS)
+
+
+def raise_if_cancelled() -> None:
+    event = cancel_event.get()
+    if event is not None and event.is_set():
+        raise RequestCancelled()
+
+
+def budget_seconds(requested: Optional[float] = None) -> Optional[float]:
+    """The request's budget: its own, capped at QUERY_LATENCY_BUDGET_SECONDS (0 = none)."""
+    limit = settings.QUERY_LATENCY_BUDGET_SECONDS
+    if requested is not None and requested > 0:
+        return min(requested, limit) if limit > 0 else requested
+    return limit if limit > 0 else None
+
+
+def start_budget(seconds: Optional[float]):
+    """Starts the deadline clock for this context; returns a token for ``deadline.reset``."""
+    return deadline.set(None if seconds is None else time.monotonic() + seconds)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current budget; None when the request has none."""
+    at = deadline.get()
+    return None if at is None else at - time.monotonic()
+
+
+def check_deadline(stage: str, reserve: float = 0.0) -> None:
+    """Raises DeadlineExceeded unless more than ``reserve`` seconds are left."""
+    left = remaining()
+    if left is not None and left <= reserve:
+        metrics.DEADLINE_EXCEEDED.labels(stage).inc()
+        raise DeadlineExceeded(stage)
+
+
+async def run_until_disconnect(request: Request, func: Callable, *args, **kwargs):
+    """Runs a blocking pipeline call in the threadpool, cancelling it on disconnect.
+
+    The call keeps its thread until it next checks ``raise_if_cancelled()``;
+    the request itself returns as soon as the disconnect is seen.
+    """
+    event = threading.Event()
+    token = cancel_event.set(event)
+    try:
+        task = asyncio.ensure_future(run_in_threadpool(func, *args, **kwargs))
+    finally:
+        cancel_event.reset(token)
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=settings.DISCONNECT_POLL_SECONDS)
+        if done:
+            return task.result()
+        if await request.is_disconnected():
+            event.set()
+            # The result is no longer wanted; retrieve it so it is not reported.
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            metrics.REQUESTS_CANCELLED.inc()
+            logger.info("Client disconnected; cancelling pipeline work",
+                        extra={"path": request.url.path})
+            raise RequestCancelled()
@@ -1,6 +1,7 @@
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 import os
+from typing import List
 
 load_dotenv()
 
@@ -13,6 +14,157 @@ class Settings(BaseSettings):
     ALGORITHM: str
     UPLOAD_DIR: str
 
+    # Observability
+    LOG_LEVEL: str = "INFO"
+    LOG_JSON: bool = True
+    PROFILER_MAX_SECONDS: float = 300.0
+
+    # Vector storage: none | fp16 | int8 | pq
+    VECTOR_QUANTIZATION: str = "none"
+    VECTOR_PQ_SUBQUANTIZERS: int = 64
+    VECTOR_QUANTIZATION_TRAIN_MIN: int = 4096
+    VECTOR_RESCORE: bool = True
+    VECTOR_RESCORE_FACTOR: int = 4
+
+    # Documents are partitioned over VECTOR_SHARDS shards (1 = one index);
+    # searches fan out on VECTOR_SEARCH_THREADS threads (0 = one per shard).
+    VECTOR_SHARDS: int = 1
+    VECTOR_SEARCH_THREADS: int = 0
+
+    # Document access statistics (flushed as batched counters) and hot/cold
+    # tiering of the served index. TIER_COLD_SEARCH: parallel | fallback
+    ACCESS_FLUSH_SECONDS: float = 30.0
+    TIERING_ENABLED: bool = False
+    TIER_HOT_DOCUMENTS: int = 200
+    TIER_HOT_MAX_CHUNKS: int = 50000
+    TIER_WINDOW_DAYS: int = 7
+    TIER_REFRESH_SECONDS: float = 600.0
+    TIER_COLD_SEARCH: str = "parallel"
+    TIER_HOT_MIN_SCORE: float = 0.5
+
+    INDEX_GENERATIONS_KEEP: int = 2
+    INDEX_GENERATION_POLL_SECONDS: float = 1.0
+
+    # Batch question answering
+    BATCH_MAX_QUESTIONS: int = 1000
+    BATCH_GENERATION_CONCURRENCY: int = 4
+
+    # Analytics rollups (0 disables the periodic job); rows are rolled up
+    # once they are ANALYTICS_ROLLUP_LAG_SECONDS old, so late commits are not
+    # skipped.
+    ANALYTICS_ROLLUP_INTERVAL_SECONDS: float = 60.0
+    ANALYTICS_ROLLUP_LAG_SECONDS: float = 10.0
+
+    # Log exports
+    EXPORT_BATCH_SIZE: int = 5000
+
+    # Ingestion progress events: memory | redis
+    PROGRESS_BROKER: str = "memory"
+    REDIS_URL: str = "redis://localhost:6379/0"
+    PROGRESS_HEARTBEAT_SECONDS: float = 15.0
+    EMBED_PROGRESS_BATCH: int = 64
+
+    # Admission control for query endpoints (0 disables a limit)
+    ADMISSION_PATHS: List[str] = ["/api/v1/qa/query", "/api/v1/qa/batch"]
+    RATE_LIMIT_PER_MINUTE: float = 30.0
+    RATE_LIMIT_BURST: int = 10
+    MAX_IN_FLIGHT_QUERIES: int = 16
+    OVERLOAD_RETRY_AFTER_SECONDS: float = 2.0
+    DISCONNECT_POLL_SECONDS: float = 0.5
+
+    # Latency budget per query (0 = none; requests may ask for less). Below
+    # GENERATION_MIN_SECONDS left, or when the LLM cannot finish in time, the
+    # answer is extracted from the top chunks instead of generated.
+    QUERY_LATENCY_BUDGET_SECONDS: float = 30.0
+    GENERATION_MIN_SECONDS: float = 2.0
+    EXTRACTIVE_MAX_SENTENCES: int = 3
+    EXTRACTIVE_MAX_CHARS: int = 600
+
+    # Standalone retrieval service; empty runs retrieval in-process
+    RETRIEVAL_SERVICE_URL: str = ""
+    RETRIEVAL_SERVICE_TIMEOUT: float = 10.0
+    RETRIEVAL_POOL_SIZE: int = 16
+
+    # Query caches and prewarming from query history
+    RETRIEVAL_CACHE_SIZE: int = 2048
+    ANSWER_CACHE_SIZE: int = 256
+    PREWARM_ENABLED: bool = True
+    PREWARM_QUESTIONS: int = 200
+    PREWARM_ANSWERS: int = 20
+    PREWARM_LOOKBACK_DAYS: int = 30
+    PREWARM_BUDGET_SECONDS: float = 120.0
+    PREWARM_SWAP_DELAY_SECONDS: float = 5.0
+
+    # Near-duplicate chunk detection at ingest (SimHash Hamming distance)
+    DEDUP_ENABLED: bool = True
+    DEDUP_MAX_DISTANCE: int = 3
+
+    # Database connection pools, applied to the sync engine (ingestion, jobs,
+    # tools) and the async engine (request handlers). ASYNC_DATABASE_URL
+    # defaults to DATABASE_URL with the asyncpg / aiosqlite driver (other
+    # backends without it run handler sessions on worker threads);
+    # DB_STATEMENT_CACHE_SIZE is asyncpg's prepared statement cache per
+    # connection.
+    ASYNC_DATABASE_URL: str = ""
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 500
+
+    # Password hashing: bcrypt runs on PASSWORD_HASH_WORKERS processes
+    # (0 = request threadpool) with at most PASSWORD_HASH_MAX_PENDING calls
+    # queued or running; verified credentials are cached briefly.
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    CREDENTIAL_CACHE_SECONDS: float = 60.0
+    CREDENTIAL_CACHE_SIZE: int = 1024
+
+    # Chunking of extracted text (larger chunks mean fewer embeddings).
+    # Extracted text is kept as compressed artifacts keyed by the source
+    # file's SHA-256 and the extraction version, so re-chunking or
+    # re-embedding (tools.reindex) never re-runs extraction or OCR.
+    CHUNK_SIZE: int = 1500
+    CHUNK_OVERLAP: int = 200
+    ARTIFACTS_ENABLED: bool = True
+    ARTIFACT_DIR: str = "data/artifacts"
+    ARTIFACT_COMPRESSION_LEVEL: int = 6
+
+    # OCR for scanned PDF pages
+    OCR_ENABLED: bool = True
+    OCR_WORKERS: int = 2
+    OCR_DPI: int = 300
+    OCR_LANGUAGE: str = "eng"
+    OCR_MIN_CHARS: int = 10
+    OCR_CACHE_DIR: str = "data/ocr_cache"
+
+    # LLM served by Ollama. OLLAMA_KEEP_ALIVE: seconds or a duration ("30m",
+    # "-1m" = never unload); the model is pinged after OLLAMA_WARMUP_SECONDS
+    # idle (0 = never), so keep that below the keep-alive. OLLAMA_NUM_PREDICT:
+    # 0 = model default.
+    OLLAMA_BASE_URL: str = "http://localhost:11434"
+    OLLAMA_MODEL: str = "Llama3.1"
+    OLLAMA_KEEP_ALIVE: str = "30m"
+    OLLAMA_NUM_CTX: int = 8192
+    OLLAMA_NUM_PREDICT: int = 0
+    OLLAMA_POOL_SIZE: int = 16
+    OLLAMA_TIMEOUT: float = 300.0
+    OLLAMA_WARMUP_SECONDS: float = 600.0
+
+    # Embedding model: torch | onnx | stub (load tests: hashed vectors of
+    # EMBEDDING_STUB_DIM, EMBEDDING_STUB_SECONDS of simulated work per text)
+    EMBEDDING_BACKEND: str = "torch"
+    EMBEDDING_MODEL_NAME: str = "nomic-ai/nomic-embed-text-v1"
+    EMBEDDING_ONNX_DIR: str = "data/models/nomic-embed-text-v1-onnx"
+    EMBEDDING_ONNX_QUANTIZED: bool = False
+    EMBEDDING_THREADS: int = 0  # 0 = runtime default
+    EMBEDDING_BATCH_SIZE: int = 32
+    EMBEDDING_MAX_LENGTH: int = 8192
+    EMBEDDING_MIN_COSINE: float = 0.98
+    EMBEDDING_STUB_DIM: int = 768
+    EMBEDDING_STUB_SECONDS: float = 0.0
+
     class Config:
         env_file = ".env"
 
@@ -1,10 +1,19 @@
 from .config import settings
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Enum as SQLEnum, ForeignKey, Boolean
+from . import profiler
+from .logging_config import get_logger
+from sqlalchemy import create_engine, inspect, text, Column, Integer, String, DateTime, Enum as SQLEnum, ForeignKey, Boolean, UniqueConstraint
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session, relationship
 from sqlalchemy.ext.declarative import declarative_base
 from contextlib import contextmanager
+from typing import Optional
+import asyncio
 import datetime
 import enum
+import functools
+
+logger = get_logger("database")
 
 # --- Database Setup ---
 
@@ -13,8 +22,92 @@ DATABASE_URL = settings.DATABASE_URL
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL is not set in the environment variables.")
 
-engine = create_engine(DATABASE_URL)
+# Async drivers used for request handlers, by backend.
+_ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def async_database_url(url: str) -> URL:
+    """DATABASE_URL with the backend's async driver (asyncpg / aiosqlite)."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        raise ValueError(
+            f"No async driver for {backend}; set ASYNC_DATABASE_URL explicitly.")
+    url = url.set(drivername=f"{backend}+{_ASYNC_DRIVERS[backend]}")
+    if backend == "postgresql":
+        url = url.update_query_dict(
+            {"prepared_statement_cache_size": str(settings.DB_STATEMENT_CACHE_SIZE)})
+    return url
+
+
+def _pool_options(url: URL) -> dict:
+    # In-memory SQLite is one connection per process/thread; nothing to size.
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+# Sync engine: ingestion, background jobs and CLI tools.
+engine = create_engine(DATABASE_URL, **_pool_options(make_url(DATABASE_URL)))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+
+class ThreadedSession:
+    """AsyncSession stand-in for backends without an async driver.
+
+    Wraps a sync session and runs each awaitable call in a worker thread,
+    one at a time, so handlers written against AsyncSession work unchanged.
+    """
+
+    _AWAITABLE = {"close", "commit", "delete", "execute", "flush", "get",
+                  "merge", "refresh", "rollback", "scalar", "scalars"}
+
+    def __init__(self):
+        self.sync_session = _ThreadedSessionLocal()
+
+    def __getattr__(self, name):
+        attr = getattr(self.sync_session, name)
+        if name in self._AWAITABLE:
+            return functools.partial(asyncio.to_thread, attr)
+        return attr
+
+    async def __aenter__(self) -> "ThreadedSession":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+
+def _async_url() -> Optional[URL]:
+    if settings.ASYNC_DATABASE_URL:
+        return make_url(settings.ASYNC_DATABASE_URL)
+    try:
+        return async_database_url(DATABASE_URL)
+    except ValueError as e:
+        logger.warning("%s Request handlers use the sync engine on worker threads.", e)
+        return None
+
+
+# Async engine: request handlers, so DB I/O never holds a threadpool slot
+# next to LLM-bound work. Objects stay usable after commit, as handlers
+# return them after the session closes.
+ASYNC_DATABASE_URL = _async_url()
+if ASYNC_DATABASE_URL is not None:
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, **_pool_options(ASYNC_DATABASE_URL))
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+else:
+    async_engine = None
+    _ThreadedSessionLocal = sessionmaker(
+        autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+    AsyncSessionLocal = ThreadedSession
 Base = declarative_base()
 
 # --- Database Models ---
@@ -59,6 +152,8 @@ class QueryLog(Base):
     response_text = Column(String, nullable=True)
     retrieved_context = Column(String, nullable=True)
     source_references = Column(String, nullable=True)
+    # Set when the query failed; response_text then holds the error message.
+    is_error = Column(Boolean, nullable=False, default=False)
     timestamp = Column(DateTime, default=datetime.datetime.utcnow)
 
 
@@ -74,8 +169,10 @@ class Feedback(Base):
 class DocumentAccessLog(Base):
     __tablename__ = "document_access_logs"
     id = Column(Integer, primary_key=True, index=True)
-    document_id = Column(Integer, ForeignKey("documents.id"), nullable=False)
-    accessed_at = Column(DateTime, default=datetime.datetime.utcnow)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
+    accessed_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
+    # Retrieval hits counted in-process and flushed as one row per document.
+    hit_count = Column(Integer, nullable=False, default=1)
 
 
 class DocumentHistory(Base):
@@ -94,13 +191,81 @@ class DocumentHistory(Base):
     document = relationship("Document", back_populates="history")
     user = relationship("User")  # Assuming a User model exists
 
+
+# --- Analytics Rollups ---
+# Maintained incrementally by services.analytics_service from the raw logs,
+# so dashboards never scan query_logs or feedback.
+
+
+class QueryStatsHourly(Base):
+    __tablename__ = "query_stats_hourly"
+    __table_args__ = (UniqueConstraint("hour", "user_id"),)
+    id = Column(Integer, primary_key=True, index=True)
+    hour = Column(DateTime, index=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    query_count = Column(Integer, default=0, nullable=False)
+    error_count = Column(Integer, default=0, nullable=False)
+
+
+class SourceStats(Base):
+    __tablename__ = "source_stats"
+    id = Column(Integer, primary_key=True, index=True)
+    source = Column(String, unique=True, nullable=False)
+    hit_count = Column(Integer, default=0, nullable=False)
+    last_hit_at = Column(DateTime, nullable=True)
+
+
+class FeedbackStatsHourly(Base):
+    __tablename__ = "feedback_stats_hourly"
+    id = Column(Integer, primary_key=True, index=True)
+    hour = Column(DateTime, unique=True, index=True, nullable=False)
+    rating_sum = Column(Integer, default=0, nullable=False)
+    rating_count = Column(Integer, default=0, nullable=False)
+
+
+class RollupState(Base):
+    __tablename__ = "rollup_state"
+    # Name of the source table; last_id is the highest row already rolled up.
+    name = Column(String, primary_key=True)
+    last_id = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+
 # --- Database Initialization ---
 
 
+# Columns added to tables that existing databases already have. create_all
+# never alters an existing table, so init_db adds whichever are missing,
+# then runs the column's backfill (if any) over the rows already there.
+_ADDED_COLUMNS = [
+    ("document_access_logs", "hit_count", "INTEGER NOT NULL DEFAULT 1", None),
+    ("query_logs", "is_error", "BOOLEAN NOT NULL DEFAULT FALSE",
+     "UPDATE query_logs SET is_error = TRUE WHERE response_text LIKE 'Error:%' "
+     "OR response_text LIKE 'An error occurred while processing your query:%'"),
+]
+# Indexes added to existing tables, created the same way.
+_ADDED_INDEX_TABLES = ["document_access_logs"]
+
+
+def _upgrade_schema() -> None:
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    with engine.begin() as conn:
+        for table, column, ddl, backfill in _ADDED_COLUMNS:
+            if table in tables and column not in {c["name"] for c in inspector.get_columns(table)}:
+                print(f"Adding column {table}.{column}...")
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+                if backfill:
+                    conn.execute(text(backfill))
+        for table in _ADDED_INDEX_TABLES:
+            for index in Base.metadata.tables[table].indexes:
+                index.create(bind=conn, checkfirst=True)
+
+
 def init_db():
     print("Initializing database...")
     try:
         Base.metadata.create_all(bind=engine)
+        _upgrade_schema()
         print("Database tables checked/created.")
     except Exception as e:
         print(f"Error initializing database: {e}")
@@ -109,11 +274,24 @@ def init_db():
 
 def get_db():
     """Provide a database session for FastAPI dependency injection."""
-    db = SessionLocal()
+    with profiler.span("get_db"):
+        db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
+        with profiler.span("get_db.close"):
+            db.close()
+
+
+async def get_async_db():
+    """Provide an async database session for FastAPI dependency injection."""
+    with profiler.span("get_async_db"):
+        db = AsyncSessionLocal()
+    try:
+        yield db
+    finally:
+        with profiler.span("get_async_db.close"):
+            await db.close()
 
 
 @contextmanager
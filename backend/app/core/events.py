@@ -0,0 +1,160 @@
+import asyncio
+import json
+import threading
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Set
+
+from . import metrics
+from .config import settings
+from .logging_config import get_logger
+
+logger = get_logger("events")
+
+TERMINAL_STAGES = {"embedded", "error"}
+_CHANNEL = "rag:ingest-progress"
+_QUEUE_SIZE = 256
+
+
+class _Subscriber:
+    __slots__ = ("queue", "loop", "doc_id", "user_id")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, doc_id: Optional[int], user_id: Optional[int]):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=_QUEUE_SIZE)
+        self.loop = loop
+        self.doc_id = doc_id
+        self.user_id = user_id
+
+    def wants(self, event: dict) -> bool:
+        if self.doc_id is not None and event["doc_id"] != self.doc_id:
+            return False
+        if self.user_id is not None and event.get("user_id") != self.user_id:
+            return False
+        return True
+
+    def offer(self, event: dict) -> None:
+        """Runs on the subscriber's loop; drops the oldest event if it lags."""
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+
+class ProgressBroker:
+    """Fans ingestion progress events out to SSE subscribers.
+
+    Ingestion runs on worker threads and calls ``publish``; subscribers are
+    async generators on the event loop. With ``PROGRESS_BROKER=redis``,
+    events travel through Redis pub/sub so every worker process sees
+    progress from ingestion running in any other.
+    """
+
+    def __init__(self):
+        self._subscribers: Set[_Subscriber] = set()
+        self._latest: Dict[int, dict] = {}
+        self._lock = threading.Lock()
+        self._redis = None
+        self._listener: Optional[asyncio.Task] = None
+
+    # --- Lifecycle ---
+
+    async def start(self) -> None:
+        if settings.PROGRESS_BROKER != "redis" or self._listener is not None:
+            return
+        import redis
+        self._redis = redis.Redis.from_url(settings.REDIS_URL)
+        self._listener = asyncio.create_task(self._listen())
+        logger.info("Progress events use Redis pub/sub",
+                    extra={"channel": _CHANNEL})
+
+    async def _listen(self) -> None:
+        import redis.asyncio as aioredis
+        while True:
+            try:
+                client = aioredis.Redis.from_url(settings.REDIS_URL)
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(_CHANNEL)
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self._dispatch(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Progress listener lost Redis: %s", e)
+                await asyncio.sleep(1.0)
+
+    # --- Publishing ---
+
+    def publish(self, doc_id: int, stage: str, progress: float, user_id: Optional[int] = None, **detail) -> None:
+        """Publishes a progress event for a document (callable from any thread)."""
+        event = {
+            "doc_id": doc_id,
+            "user_id": user_id,
+            "stage": stage,
+            "progress": round(min(max(progress, 0.0), 100.0), 1),
+            "ts": time.time(),
+            **detail,
+        }
+        if self._redis is not None:
+            try:
+                self._redis.publish(_CHANNEL, json.dumps(event))
+                return
+            except Exception as e:
+                logger.warning(
+                    "Could not publish progress to Redis, delivering locally: %s", e)
+        self._dispatch(event)
+
+    def _dispatch(self, event: dict) -> None:
+        with self._lock:
+            if event["stage"] in TERMINAL_STAGES:
+                self._latest.pop(event["doc_id"], None)
+            else:
+                self._latest[event["doc_id"]] = event
+            subscribers = [s for s in self._subscribers if s.wants(event)]
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.offer, event)
+            except RuntimeError:
+                pass  # loop closed; the subscriber is going away
+
+    # --- Subscribing ---
+
+    def latest(self, doc_id: int) -> Optional[dict]:
+        return self._latest.get(doc_id)
+
+    async def subscribe(self, doc_id: Optional[int] = None, user_id: Optional[int] = None,
+                        check: Optional[Callable[[], Awaitable[Optional[dict]]]] = None,
+                        ) -> AsyncIterator[Optional[dict]]:
+        """Yields matching events; yields None every heartbeat interval while idle.
+
+        Starts with the latest known state of in-flight documents so late
+        subscribers do not have to wait for the next update. ``check`` runs
+        once the subscriber is registered, and an event it returns is yielded
+        first: state read there cannot miss an event published meanwhile.
+        """
+        subscriber = _Subscriber(asyncio.get_running_loop(), doc_id, user_id)
+        with self._lock:
+            self._subscribers.add(subscriber)
+            metrics.PROGRESS_SUBSCRIBERS.set(len(self._subscribers))
+            backlog = [e for e in self._latest.values() if subscriber.wants(e)]
+        try:
+            if check is not None:
+                event = await check()
+                if event is not None:
+                    backlog.insert(0, event)
+            for event in backlog:
+                yield event
+            while True:
+                try:
+                    yield await asyncio.wait_for(
+                        subscriber.queue.get(), timeout=settings.PROGRESS_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            with self._lock:
+                self._subscribers.discard(subscriber)
+                metrics.PROGRESS_SUBSCRIBERS.set(len(self._subscribers))
+
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+
+broker = ProgressBroker()
@@ -0,0 +1,71 @@
+import json
+import logging
+import sys
+import uuid
+from contextvars import ContextVar
+
+from .config import settings
+
+# Request id of the request currently being served. Starlette copies the
+# context into threadpool workers and background tasks, so every log line
+# emitted while handling a request (including its ingestion task) carries it.
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+# Attributes present on every LogRecord; anything else passed through
+# ``extra=`` is treated as a structured field.
+_RESERVED_ATTRS = set(logging.LogRecord(
+    "", 0, "", 0, "", (), None).__dict__) | {"message", "asctime"}
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex
+
+
+class RequestIdFilter(logging.Filter):
+    """Attaches the current request id to every record."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Renders records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and key not in payload:
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+def configure_logging() -> None:
+    """Installs the structured handler on the ``rag`` logger hierarchy."""
+    root = logging.getLogger("rag")
+    if root.handlers:
+        return
+    handler = logging.StreamHandler(sys.stdout)
+    handler.addFilter(RequestIdFilter())
+    if settings.LOG_JSON:
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(
+            "%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"))
+    root.addHandler(handler)
+    root.setLevel(settings.LOG_LEVEL.upper())
+    root.propagate = False
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Returns a logger under the ``rag`` namespace, e.g. ``rag.qa_service``."""
+    configure_logging()
+    return logging.getLogger(f"rag.{name}")
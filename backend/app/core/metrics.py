@@ -0,0 +1,242 @@
+import logging
+import time
+from contextlib import contextmanager
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from . import profiler
+from .logging_config import get_logger
+
+logger = get_logger("metrics")
+
+# Buckets cover everything from a cached embedding lookup (sub-millisecond)
+# to a slow LLM generation (tens of seconds).
+_LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                    0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# --- Pipeline stages ---
+
+STAGE_LATENCY = Histogram(
+    "rag_stage_duration_seconds",
+    "Time spent in each RAG pipeline stage.",
+    ["stage"],
+    buckets=_LATENCY_BUCKETS,
+)
+STAGE_ERRORS = Counter(
+    "rag_stage_errors_total",
+    "Pipeline stage executions that raised an exception.",
+    ["stage"],
+)
+
+# --- HTTP ---
+
+HTTP_REQUEST_LATENCY = Histogram(
+    "rag_http_request_duration_seconds",
+    "HTTP request latency by route.",
+    ["method", "route", "status"],
+    buckets=_LATENCY_BUCKETS,
+)
+ADMISSION_REJECTIONS = Counter(
+    "rag_admission_rejections_total",
+    "Requests shed by admission control, by reason (rate_limited, overloaded).",
+    ["reason"],
+)
+ADMITTED_IN_FLIGHT = Gauge(
+    "rag_admitted_in_flight",
+    "Admission-controlled requests currently being served.",
+)
+REQUESTS_CANCELLED = Counter(
+    "rag_requests_cancelled_total",
+    "Requests whose pipeline work was cancelled after the client disconnected.",
+)
+DEADLINE_EXCEEDED = Counter(
+    "rag_deadline_exceeded_total",
+    "Pipeline stages cut short because the request's latency budget ran out.",
+    ["stage"],
+)
+
+# --- Password hashing ---
+
+PASSWORD_HASH_SECONDS = Histogram(
+    "rag_password_hash_seconds",
+    "bcrypt CPU time per call on the hashing pool, by operation (hash, verify).",
+    ["operation"],
+    buckets=_LATENCY_BUCKETS,
+)
+PASSWORD_HASH_WAIT_SECONDS = Histogram(
+    "rag_password_hash_wait_seconds",
+    "Time password hashing calls spent queued for a hashing worker.",
+    ["operation"],
+    buckets=_LATENCY_BUCKETS,
+)
+PASSWORD_HASH_PENDING = Gauge(
+    "rag_password_hash_pending",
+    "Password hashing calls queued or running on the hashing pool.",
+)
+PASSWORD_HASH_REJECTIONS = Counter(
+    "rag_password_hash_rejections_total",
+    "Password hashing calls refused because the backlog was full.",
+    ["operation"],
+)
+
+# --- Ingestion ---
+
+DOCUMENTS_PROCESSED = Counter(
+    "rag_documents_processed_total",
+    "Documents run through the ingestion pipeline, by outcome.",
+    ["status"],
+)
+CHUNKS_EMBEDDED = Counter(
+    "rag_chunks_embedded_total",
+    "Chunks embedded and added to the vector index.",
+)
+DEDUP_CHUNKS = Counter(
+    "rag_dedup_chunks_total",
+    "Near-duplicate chunks not embedded, by scope (document = repeated within "
+    "the document, corpus = linked to a chunk of another document).",
+    ["scope"],
+)
+DEDUP_EMBED_SECONDS_SAVED = Counter(
+    "rag_dedup_embed_seconds_saved_total",
+    "Estimated embedding time saved by skipping near-duplicate chunks.",
+)
+OCR_PAGES = Counter(
+    "rag_ocr_pages_total",
+    "Text-less PDF pages sent to OCR, by result (ocr, cache_hit, error).",
+    ["result"],
+)
+OCR_PAGE_SECONDS = Histogram(
+    "rag_ocr_page_seconds",
+    "Worker time to render and OCR one page (cache misses only).",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0),
+)
+EXTRACTION_ARTIFACTS = Counter(
+    "rag_extraction_artifacts_total",
+    "Text extractions by artifact result (hit, miss, corrupt).",
+    ["result"],
+)
+INGEST_QUEUE_DEPTH = Gauge(
+    "rag_ingest_queue_depth",
+    "Documents scheduled for ingestion that have not finished yet.",
+)
+
+PROGRESS_SUBSCRIBERS = Gauge(
+    "rag_progress_subscribers",
+    "Open ingestion progress event streams.",
+)
+
+# --- Queries ---
+
+LLM_TIME_TO_FIRST_TOKEN = Histogram(
+    "rag_llm_time_to_first_token_seconds",
+    "Time from sending a prompt to Ollama until the first token arrives.",
+    buckets=_LATENCY_BUCKETS,
+)
+LLM_TOKENS_PER_SECOND = Histogram(
+    "rag_llm_tokens_per_second",
+    "Generation rate after the first token, per answer.",
+    buckets=(1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 250),
+)
+LLM_TOKENS = Counter(
+    "rag_llm_tokens_total",
+    "Tokens streamed from the LLM.",
+)
+LLM_WARMUPS = Counter(
+    "rag_llm_warmups_total",
+    "Warm-up pings sent to Ollama, by result.",
+    ["result"],
+)
+QUERIES = Counter(
+    "rag_queries_total",
+    "RAG queries processed, by outcome.",
+    ["status"],
+)
+QUERIES_IN_FLIGHT = Gauge(
+    "rag_queries_in_flight",
+    "RAG queries currently being processed.",
+)
+
+# --- Index and caches ---
+
+INDEX_VECTORS = Gauge(
+    "rag_index_vectors",
+    "Number of vectors in the active index.",
+)
+INDEX_GENERATION = Gauge(
+    "rag_index_generation",
+    "Id of the index generation currently serving queries.",
+)
+INDEX_TIER_CHUNKS = Gauge(
+    "rag_index_tier_chunks",
+    "Chunks served from each tier of a tiered index (hot = RAM, cold = mmap).",
+    ["tier"],
+)
+TIER_SEARCHES = Counter(
+    "rag_tier_searches_total",
+    "Tiered index searches, by the tiers they had to scan.",
+    ["path"],
+)
+DOCUMENT_HITS = Counter(
+    "rag_document_hits_total",
+    "Retrieved chunks counted towards document access statistics.",
+)
+CACHE_REQUESTS = Counter(
+    "rag_cache_requests_total",
+    "Cache lookups, by cache and result (hit, miss, error).",
+    ["cache", "result"],
+)
+CACHE_HIT_RATIO = Gauge(
+    "rag_cache_hit_ratio",
+    "Hit ratio of each cache since process start.",
+    ["cache"],
+)
+
+_cache_counts: dict = {}
+
+
+def record_cache_lookup(cache: str, result: str) -> None:
+    """Counts a cache lookup and refreshes the cache's hit ratio gauge."""
+    CACHE_REQUESTS.labels(cache, result).inc()
+    hits, total = _cache_counts.get(cache, (0, 0))
+    hits += result == "hit"
+    total += 1
+    _cache_counts[cache] = (hits, total)
+    CACHE_HIT_RATIO.labels(cache).set(hits / total)
+
+
+def observe_stage(stage: str, elapsed: float, **fields) -> None:
+    """Records a stage duration measured by the caller (see ``stage_timer``)."""
+    STAGE_LATENCY.labels(stage).observe(elapsed)
+    profiler.record_span(stage, elapsed)
+    logger.debug(
+        "stage finished",
+        extra={"stage": stage, "duration_ms": round(elapsed * 1000, 2),
+               "failed": False, **fields},
+    )
+
+
+@contextmanager
+def stage_timer(stage: str, **fields):
+    """Times a pipeline stage, records it in Prometheus and logs a span.
+
+    Successful spans log at DEBUG (they run per query and per chunk batch);
+    failed ones at INFO. Extra keyword arguments are attached to the line.
+    """
+    start = time.perf_counter()
+    failed = False
+    try:
+        yield
+    except BaseException:
+        failed = True
+        STAGE_ERRORS.labels(stage).inc()
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_LATENCY.labels(stage).observe(elapsed)
+        profiler.record_span(stage, elapsed)
+        logger.log(
+            logging.INFO if failed else logging.DEBUG,
+            "stage finished",
+            extra={"stage": stage, "duration_ms": round(elapsed * 1000, 2),
+                   "failed": failed, **fields},
+        )
@@ -0,0 +1,181 @@
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from .logging_config import get_logger, request_id_var
+
+logger = get_logger("profiler")
+
+# The active profiling session, if any. Every hook in the request path checks
+# this single global first, so nothing is recorded (and no sampler thread
+# runs) unless an admin has started a session.
+_active: Optional["ProfileSession"] = None
+_lock = threading.Lock()
+
+# Breakdown record of the request being served, when it is being profiled.
+_current_record: ContextVar[Optional[dict]] = ContextVar(
+    "profile_record", default=None)
+
+
+class ProfileSession:
+    """Samples every thread's stack until a request count or deadline is reached.
+
+    Stacks are aggregated in the collapsed ("folded") format understood by
+    flamegraph.pl, speedscope and inferno.
+    """
+
+    def __init__(self, max_requests: Optional[int], seconds: float, interval: float):
+        self.max_requests = max_requests
+        self.deadline = time.monotonic() + seconds
+        self.interval = interval
+        self.started_at = time.time()
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self.requests: List[dict] = []
+        self._admitted = 0
+        self._finished = threading.Event()
+        self._sampler = threading.Thread(
+            target=self._run, name="rag-profiler", daemon=True)
+
+    # --- Sampling ---
+
+    def _run(self) -> None:
+        own_ident = threading.get_ident()
+        names = {}
+        while not self._finished.is_set():
+            if time.monotonic() >= self.deadline:
+                break
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                if ident not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                self.samples[_fold(names.get(ident, str(ident)), frame)] += 1
+            self.sample_count += 1
+            time.sleep(self.interval)
+        self._finish()
+
+    def _finish(self) -> None:
+        global _active
+        with _lock:
+            if _active is self:
+                _active = None
+        self._finished.set()
+
+    # --- Request tracking ---
+
+    def admit(self) -> bool:
+        """Claims a slot for a new request; False once the budget is used up."""
+        with _lock:
+            if self.max_requests is not None and self._admitted >= self.max_requests:
+                return False
+            self._admitted += 1
+            return True
+
+    def complete(self, record: dict) -> None:
+        self.requests.append(record)
+        if self.max_requests is not None and len(self.requests) >= self.max_requests:
+            self._finish()
+
+    def stop(self) -> None:
+        self._finish()
+
+    @property
+    def finished(self) -> bool:
+        return self._finished.is_set()
+
+    def folded(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common())
+
+    def report(self) -> dict:
+        return {
+            "started_at": self.started_at,
+            "interval_ms": self.interval * 1000,
+            "sample_count": self.sample_count,
+            "requests": self.requests,
+            "folded": self.folded(),
+        }
+
+
+def _fold(thread_name: str, frame) -> str:
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append(
+            f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+        frame = frame.f_back
+    frames.append(thread_name)
+    return ";".join(reversed(frames)).replace(" ", "_")
+
+
+def start_session(max_requests: Optional[int], seconds: float, interval: float) -> ProfileSession:
+    """Starts a profiling session; raises RuntimeError if one is already running."""
+    global _active
+    with _lock:
+        if _active is not None:
+            raise RuntimeError("A profiling session is already running.")
+        session = ProfileSession(max_requests, seconds, interval)
+        _active = session
+    session._sampler.start()
+    logger.info("Profiling session started", extra={
+                "max_requests": max_requests, "seconds": seconds})
+    return session
+
+
+def is_active() -> bool:
+    return _active is not None
+
+
+# --- Per-request breakdown ---
+
+def begin_request(method: str, path: str) -> Optional[dict]:
+    """Starts a breakdown record if a session is active and has room for it."""
+    session = _active
+    if session is None or not session.admit():
+        return None
+    record = {
+        "request_id": request_id_var.get(),
+        "method": method,
+        "path": path,
+        "spans": [],
+        "_session": session,
+        "_start": time.perf_counter(),
+    }
+    _current_record.set(record)
+    return record
+
+
+def end_request(record: dict, status_code: int) -> None:
+    session = record.pop("_session")
+    record["total_ms"] = round(
+        (time.perf_counter() - record.pop("_start")) * 1000, 3)
+    record["status"] = status_code
+    _current_record.set(None)
+    session.complete(record)
+
+
+def record_span(name: str, elapsed: float) -> None:
+    """Adds a timed span to the current request's breakdown, if profiled."""
+    if _active is None:
+        return
+    record = _current_record.get()
+    if record is not None:
+        record["spans"].append(
+            {"name": name, "duration_ms": round(elapsed * 1000, 3)})
+
+
+@contextmanager
+def span(name: str):
+    """Times a block into the current request's breakdown, if profiled."""
+    if _active is None or _current_record.get() is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, time.perf_counter() - start)
@@ -1,13 +1,43 @@
+import asyncio
+import hashlib
+import hmac
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from ..core import metrics
+from ..core.cache import LRUCache
 from ..core.config import settings
 from ..models.schemas import TokenData  # Corrected import
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 ALGORITHM = settings.ALGORITHM
 
+# bcrypt is deliberately slow (~0.1-0.3 s of CPU per call). Request handlers
+# hash and verify on a dedicated process pool instead of the request
+# threadpool, with a bounded backlog, so a login storm queues behind itself
+# rather than in front of queries.
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_pending = 0
+_pending_lock = threading.Lock()
+
+# Recently verified credentials, keyed by an HMAC of the password and the
+# stored hash (never the password itself) under a per-process secret. A
+# password change alters the stored hash and so misses the cache.
+_credential_key = os.urandom(32)
+verified_credentials = LRUCache(
+    "verified_credentials", settings.CREDENTIAL_CACHE_SIZE, ttl=settings.CREDENTIAL_CACHE_SECONDS)
+
+
+class HashingOverloaded(Exception):
+    """The password hashing backlog is full; the caller should retry later."""
+
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -17,6 +47,70 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+# --- Worker side (runs in the process pool) ---
+
+def _timed_hash(password: str) -> Tuple[str, float]:
+    start = time.perf_counter()
+    return hash_password(password), time.perf_counter() - start
+
+
+def _timed_verify(plain_password: str, hashed_password: str) -> Tuple[bool, float]:
+    start = time.perf_counter()
+    return verify_password(plain_password, hashed_password), time.perf_counter() - start
+
+
+# --- API side ---
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+async def _run_hashing(operation: str, func, *args):
+    """Runs ``func`` on the hashing pool (or the threadpool when it is disabled)."""
+    global _pending
+    with _pending_lock:
+        if _pending >= settings.PASSWORD_HASH_MAX_PENDING:
+            metrics.PASSWORD_HASH_REJECTIONS.labels(operation).inc()
+            raise HashingOverloaded()
+        _pending += 1
+        metrics.PASSWORD_HASH_PENDING.set(_pending)
+    submitted = time.perf_counter()
+    try:
+        executor = _get_pool() if settings.PASSWORD_HASH_WORKERS > 0 else None
+        result, seconds = await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+    finally:
+        with _pending_lock:
+            _pending -= 1
+            metrics.PASSWORD_HASH_PENDING.set(_pending)
+    metrics.PASSWORD_HASH_SECONDS.labels(operation).observe(seconds)
+    metrics.PASSWORD_HASH_WAIT_SECONDS.labels(operation).observe(
+        max(time.perf_counter() - submitted - seconds, 0.0))
+    return result
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_hashing("hash", _timed_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verifies on the hashing pool; credentials verified within CREDENTIAL_CACHE_SECONDS skip bcrypt."""
+    key = hmac.new(_credential_key, f"{hashed_password}\0{plain_password}".encode("utf-8"),
+                   hashlib.sha256).digest()
+    if verified_credentials.get(key):
+        return True
+    verified = await _run_hashing("verify", _timed_verify, plain_password, hashed_password)
+    if verified:
+        verified_credentials.set(key, True)
+    return verified
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
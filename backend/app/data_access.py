@@ -1,7 +1,10 @@
+from typing import List, Optional
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from .core.database import QueryLog, Document, Feedback
 from .models.schemas import FeedbackCreate
-from .core.database import DocumentHistory
+from .core.database import DocumentHistory, DocumentAccessLog
 
 
 def update_document_status(db: Session, doc_id: int, status: str):
@@ -20,7 +23,8 @@ def log_query(
     query_text: str,
     response_text: str = None,
     retrieved_context: str = None,
-    source_references: str = None
+    source_references: str = None,
+    is_error: bool = False
 ) -> QueryLog:
     """Logs a query and its response details to the database."""
     db_log = QueryLog(
@@ -28,7 +32,8 @@ def log_query(
         query_text=query_text,
         response_text=response_text,
         retrieved_context=retrieved_context,
-        source_references=source_references
+        source_references=source_references,
+        is_error=is_error
     )
     db.add(db_log)
     db.commit()
@@ -36,6 +41,24 @@ def log_query(
     return db_log
 
 
+def log_queries_bulk(db: Session, entries: List[dict]) -> int:
+    """Inserts many query log rows in one statement; returns the row count."""
+    if not entries:
+        return 0
+    db.execute(insert(QueryLog), entries)
+    db.commit()
+    return len(entries)
+
+
+def log_document_access_bulk(db: Session, entries: List[dict]) -> int:
+    """Inserts batched document hit counters in one statement; returns the row count."""
+    if not entries:
+        return 0
+    db.execute(insert(DocumentAccessLog), entries)
+    db.commit()
+    return len(entries)
+
+
 def get_document(db: Session, doc_id: int) -> Document:
     """Retrieves a document by its ID."""
     return db.query(Document).filter(Document.id == doc_id).first()
@@ -69,3 +92,97 @@ def log_document_change(
     db.commit()
     db.refresh(history_entry)
     return history_entry
+
+
+# --- Async variants (request handlers, see core.database.get_async_db) ---
+
+
+async def update_document_status_async(db: AsyncSession, doc_id: int, status: str) -> Optional[Document]:
+    """Updates the status of a document."""
+    doc = await db.get(Document, doc_id)
+    if doc:
+        doc.status = status
+        await db.commit()
+    return doc
+
+
+async def log_query_async(
+    db: AsyncSession,
+    user_id: int,
+    query_text: str,
+    response_text: str = None,
+    retrieved_context: str = None,
+    source_references: str = None,
+    is_error: bool = False
+) -> QueryLog:
+    """Logs a query and its response details to the database."""
+    db_log = QueryLog(
+        user_id=user_id,
+        query_text=query_text,
+        response_text=response_text,
+        retrieved_context=retrieved_context,
+        source_references=source_references,
+        is_error=is_error
+    )
+    db.add(db_log)
+    await db.commit()
+    await db.refresh(db_log)
+    return db_log
+
+
+async def log_queries_bulk_async(db: AsyncSession, entries: List[dict]) -> int:
+    """Inserts many query log rows in one statement; returns the row count."""
+    if not entries:
+        return 0
+    await db.execute(insert(QueryLog), entries)
+    await db.commit()
+    return len(entries)
+
+
+async def get_document_async(db: AsyncSession, doc_id: int) -> Optional[Document]:
+    """Retrieves a document by its ID."""
+    return await db.get(Document, doc_id)
+
+
+async def log_feedback_async(db: AsyncSession, feedback_data: FeedbackCreate) -> Feedback:
+    feedback = Feedback(**feedback_data.dict())
+    db.add(feedback)
+    await db.commit()
+    await db.refresh(feedback)
+    return feedback
+
+
+async def log_document_change_async(
+    db: AsyncSession,
+    document_id: int,
+    version: int,
+    change_type: str,
+    changed_by: int,
+    details: str = None
+) -> DocumentHistory:
+    """Logs a change to the document history."""
+    history_entry = DocumentHistory(
+        document_id=document_id,
+        version=version,
+        change_type=change_type,
+        changed_by=changed_by,
+        details=details
+    )
+    db.add(history_entry)
+    await db.commit()
+    await db.refresh(history_entry)
+    return history_entry
+
+
+async def get_query_logs_async(
+    db: AsyncSession,
+    user_id: Optional[int] = None,
+    skip: int = 0,
+    limit: int = 100
+) -> List[QueryLog]:
+    """Query logs, newest first; all users when ``user_id`` is None."""
+    statement = select(QueryLog)
+    if user_id is not None:
+        statement = statement.where(QueryLog.user_id == user_id)
+    statement = statement.order_by(QueryLog.timestamp.desc()).offset(skip).limit(limit)
+    return list((await db.scalars(statement)).all())
@@ -0,0 +1,195 @@
+"""A stand-in for the Ollama HTTP API with configurable speed.
+
+Usage (from the repository root)::
+
+    python -m backend.app.loadtest.fake_ollama --port 11500 --tokens-per-second 40 --parallel 2
+
+Implements the endpoints the app uses (``/api/generate``, ``/api/chat``,
+plus ``/api/tags`` and ``/api/version`` for health checks) with Ollama's
+NDJSON streaming format. Each request waits for one of ``parallel`` model
+slots, as a GPU box does, then emits ``response_tokens`` filler tokens after
+``first_token_seconds``, paced at ``tokens_per_second``.
+
+Model residency and prompt caching are modelled too: a request arriving
+after the model's ``keep_alive`` ran out pays ``load_seconds`` first, and
+prompt evaluation costs ``prompt_seconds_per_token`` for each word past the
+prefix shared with the previous prompt.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import random
+import re
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+_WORDS = ("the", "policy", "requires", "staff", "to", "review", "each", "document",
+          "before", "approval", "and", "record", "any", "exceptions", "in", "writing")
+
+
+@dataclass
+class FakeModelConfig:
+    tokens_per_second: float = 40.0
+    first_token_seconds: float = 0.3
+    response_tokens: int = 120
+    parallel: int = 1
+    # Uniform +/- fraction applied to every delay.
+    jitter: float = 0.1
+    load_seconds: float = 0.0
+    prompt_seconds_per_token: float = 0.0
+    model: str = "Llama3.1"
+
+
+_DURATION = re.compile(r"^(-?\d+(?:\.\d+)?)(ms|s|m|h)?$")
+_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600, None: 1}
+
+
+def keep_alive_seconds(value) -> float:
+    """Ollama's keep_alive (number of seconds or "5m"-style duration); negative = forever."""
+    if value is None:
+        return 300.0
+    match = _DURATION.match(str(value).strip())
+    if not match:
+        return 300.0
+    seconds = float(match.group(1)) * _UNITS[match.group(2)]
+    return float("inf") if seconds < 0 else seconds
+
+
+def _shared_prefix(a: str, b: str) -> int:
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def _now() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+
+def create_app(config: Optional[FakeModelConfig] = None) -> FastAPI:
+    config = config or FakeModelConfig()
+    app = FastAPI(title="Fake Ollama")
+    slots = asyncio.Semaphore(max(config.parallel, 1))
+    # One model, one cache: an approximation of Ollama's per-slot KV caches.
+    state = {"loaded_until": 0.0, "last_prompt": ""}
+
+    def jittered(seconds: float) -> float:
+        return max(0.0, seconds * (1 + random.uniform(-config.jitter, config.jitter)))
+
+    async def tokens(prompt: str, body: dict, timings: dict) -> AsyncIterator[str]:
+        """Holds a model slot for the whole generation, like a real runner."""
+        count = config.response_tokens
+        num_predict = (body.get("options") or {}).get("num_predict")
+        if num_predict and num_predict > 0:
+            count = min(count, num_predict)
+        async with slots:
+            try:
+                if time.monotonic() > state["loaded_until"]:
+                    timings["load"] = jittered(config.load_seconds)
+                    await asyncio.sleep(timings["load"])
+                new_words = len(prompt[_shared_prefix(prompt, state["last_prompt"]):].split())
+                state["last_prompt"] = prompt
+                await asyncio.sleep(jittered(
+                    config.first_token_seconds + new_words * config.prompt_seconds_per_token))
+                interval = 1.0 / config.tokens_per_second if config.tokens_per_second > 0 else 0.0
+                for i in range(count):
+                    if i:
+                        await asyncio.sleep(jittered(interval))
+                    timings["eval_count"] = i + 1
+                    yield _WORDS[i % len(_WORDS)] + " "
+            finally:
+                state["loaded_until"] = time.monotonic() + keep_alive_seconds(body.get("keep_alive"))
+
+    def final_fields(prompt: str, started: float, timings: dict) -> dict:
+        elapsed_ns = int((time.perf_counter() - started) * 1e9)
+        return {
+            "done": True,
+            "done_reason": "stop",
+            "total_duration": elapsed_ns,
+            "load_duration": int(timings.get("load", 0.0) * 1e9),
+            "prompt_eval_count": len(prompt.split()),
+            "prompt_eval_duration": 0,
+            "eval_count": timings.get("eval_count", 0),
+            "eval_duration": elapsed_ns,
+        }
+
+    async def respond(body: dict, prompt: str, wrap) -> object:
+        started = time.perf_counter()
+        model = body.get("model") or config.model
+        timings: dict = {}
+
+        if not body.get("stream", True):
+            text = "".join([token async for token in tokens(prompt, body, timings)])
+            return JSONResponse({"model": model, "created_at": _now(), **wrap(text),
+                                 **final_fields(prompt, started, timings)})
+
+        async def stream() -> AsyncIterator[bytes]:
+            async for token in tokens(prompt, body, timings):
+                yield (json.dumps({"model": model, "created_at": _now(), **wrap(token),
+                                   "done": False}) + "\n").encode("utf-8")
+            yield (json.dumps({"model": model, "created_at": _now(), **wrap(""),
+                               **final_fields(prompt, started, timings)}) + "\n").encode("utf-8")
+
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        body = await request.json()
+        prompt = body.get("prompt", "")
+        return await respond(body, prompt, lambda text: {"response": text})
+
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        body = await request.json()
+        prompt = " ".join(m.get("content", "") for m in body.get("messages", []))
+        return await respond(body, prompt, lambda text: {
+            "message": {"role": "assistant", "content": text}})
+
+    @app.get("/api/tags")
+    def tags():
+        return {"models": [{"name": config.model, "model": config.model, "size": 0}]}
+
+    @app.get("/api/version")
+    def version():
+        return {"version": "0.0.0-fake"}
+
+    return app
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--tokens-per-second", type=float, default=40.0)
+    parser.add_argument("--first-token-seconds", type=float, default=0.3)
+    parser.add_argument("--response-tokens", type=int, default=120)
+    parser.add_argument("--parallel", type=int, default=1,
+                        help="Concurrent generations, like OLLAMA_NUM_PARALLEL.")
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--load-seconds", type=float, default=0.0,
+                        help="Model load time once keep_alive has expired.")
+    parser.add_argument("--prompt-seconds-per-token", type=float, default=0.0,
+                        help="Prompt evaluation time per word not shared with the previous prompt.")
+    args = parser.parse_args(argv)
+
+    config = FakeModelConfig(
+        tokens_per_second=args.tokens_per_second,
+        first_token_seconds=args.first_token_seconds,
+        response_tokens=args.response_tokens,
+        parallel=args.parallel,
+        jitter=args.jitter,
+        load_seconds=args.load_seconds,
+        prompt_seconds_per_token=args.prompt_seconds_per_token,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import httpx
+
+from ..core.logging_config import get_logger
+from .fake_ollama import FakeModelConfig
+from .workloads import API, OPERATIONS, Session, synthetic_document
+
+logger = get_logger("loadtest")
+
+# A level counts as saturated once it adds less than this much throughput
+# over the previous one.
+SATURATION_GAIN = 0.05
+
+_TTFT_METRIC = "rag_llm_time_to_first_token_seconds"
+
+
+@dataclass
+class Sample:
+    operation: str
+    status: int  # 0 = transport error or timeout
+    seconds: float
+
+
+# --- Stack under test ---
+
+def _wait_until_up(url: str, timeout: float, process: subprocess.Popen) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{url} exited with code {process.returncode} during startup.")
+        try:
+            if httpx.get(url, timeout=2.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"{url} not ready after {timeout:.0f}s.")
+
+
+@contextmanager
+def local_stack(workdir: str, model: FakeModelConfig, app_port: int = 8800, ollama_port: int = 11500,
+                workers: int = 1, env: Optional[Dict[str, str]] = None,
+                startup_timeout: float = 300.0) -> Iterator[str]:
+    """Runs the fake Ollama server and the API (stub embeddings) in subprocesses.
+
+    State (SQLite database, vector store, uploads) lives under ``workdir``;
+    admission rate limits are off so the harness, not the limiter, sets the
+    load. Yields the API base URL.
+    """
+    os.makedirs(workdir, exist_ok=True)
+    ollama = subprocess.Popen([
+        sys.executable, "-m", "backend.app.loadtest.fake_ollama",
+        "--port", str(ollama_port),
+        "--tokens-per-second", str(model.tokens_per_second),
+        "--first-token-seconds", str(model.first_token_seconds),
+        "--response-tokens", str(model.response_tokens),
+        "--parallel", str(model.parallel),
+        "--jitter", str(model.jitter),
+        "--load-seconds", str(model.load_seconds),
+        "--prompt-seconds-per-token", str(model.prompt_seconds_per_token),
+    ])
+    app_env = dict(os.environ)
+    app_env.update({
+        "OLLAMA_BASE_URL": f"http://127.0.0.1:{ollama_port}",
+        "EMBEDDING_BACKEND": "stub",
+        "DATABASE_URL": f"sqlite:///{os.path.abspath(os.path.join(workdir, 'loadtest.db'))}",
+        "VECTOR_STORE_DIR": os.path.join(workdir, "vector_store"),
+        "UPLOAD_DIR": os.path.join(workdir, "uploads"),
+        "RATE_LIMIT_PER_MINUTE": "0",
+    })
+    for key, value in (("SECRET_KEY", "loadtest"), ("ALGORITHM", "HS256"),
+                       ("ACCESS_TOKEN_EXPIRE_MINUTES", "120")):
+        app_env.setdefault(key, value)
+    app_env.update(env or {})
+    api = subprocess.Popen([
+        sys.executable, "-m", "uvicorn", "backend.app.main:app",
+        "--host", "127.0.0.1", "--port", str(app_port),
+        "--workers", str(workers), "--log-level", "warning",
+    ], env=app_env)
+    base_url = f"http://127.0.0.1:{app_port}"
+    try:
+        _wait_until_up(f"http://127.0.0.1:{ollama_port}/api/version", 30.0, ollama)
+        _wait_until_up(f"{base_url}/ready", startup_timeout, api)
+        logger.info("Load-test stack up", extra={"url": base_url, "workdir": workdir})
+        yield base_url
+    finally:
+        for process in (api, ollama):
+            process.terminate()
+        for process in (api, ollama):
+            try:
+                process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+def login(base_url: str, username: str, password: str) -> Dict[str, str]:
+    response = httpx.post(f"{base_url}{API}/auth/token",
+                          data={"username": username, "password": password}, timeout=30.0)
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def seed_documents(base_url: str, session: Session, count: int, timeout: float = 600.0) -> None:
+    """Uploads ``count`` documents and waits until they are embedded."""
+    if count <= 0:
+        return
+    rng = random.Random(0)
+    with httpx.Client(base_url=base_url, timeout=60.0) as client:
+        for i in range(count):
+            text = synthetic_document(rng, session.workload.document_paragraphs)
+            client.post(f"{API}/documents/upload", headers=session.admin_headers,
+                        files={"file": (f"seed-{i}-{rng.getrandbits(32):08x}.txt",
+                                        text.encode("utf-8"), "text/plain")}).raise_for_status()
+        deadline = time.monotonic() + timeout
+        pending = []
+        while time.monotonic() < deadline:
+            documents = client.get(f"{API}/documents/", headers=session.admin_headers,
+                                   params={"limit": 10000}).json()
+            pending = [d for d in documents if d["status"] in ("uploaded", "processing")]
+            if not pending:
+                logger.info("Seed documents embedded", extra={"documents": count})
+                return
+            time.sleep(1.0)
+    raise TimeoutError(f"{len(pending)} seed documents still processing after {timeout:.0f}s.")
+
+
+# --- Load generation ---
+
+async def run_level(base_url: str, session: Session, concurrency: int, duration: float,
+                    warmup: float = 0.0, timeout: float = 120.0, seed: int = 0) -> List[Sample]:
+    """Runs ``concurrency`` closed-loop virtual users for ``warmup + duration`` seconds.
+
+    Each user issues its next request as soon as the previous one returns;
+    requests started during the warm-up are not recorded.
+    """
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    samples: List[Sample] = []
+    start = time.perf_counter()
+    record_from = start + warmup
+    stop_at = record_from + duration
+
+    async def user(index: int, client: httpx.AsyncClient) -> None:
+        rng = random.Random(seed * 100003 + index)
+        while time.perf_counter() < stop_at:
+            operation = session.workload.choose(rng)
+            started = time.perf_counter()
+            try:
+                status = (await OPERATIONS[operation](client, session, rng)).status_code
+            except httpx.HTTPError:
+                status = 0
+            if started >= record_from:
+                samples.append(Sample(operation, status, time.perf_counter() - started))
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        await asyncio.gather(*(user(i, client) for i in range(concurrency)))
+    return samples
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return None
+    rank = max(1, int(-(-q * len(sorted_values) // 100)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(samples: Sequence[Sample], duration: float) -> Dict[str, dict]:
+    """Per-operation (and ``all``) throughput, error counts and latency percentiles.
+
+    Latency percentiles cover successful requests only; 429/503 responses
+    are counted as shed, anything else >= 400 (or no response) as errors.
+    """
+    groups: Dict[str, List[Sample]] = {}
+    for sample in samples:
+        groups.setdefault(sample.operation, []).append(sample)
+    groups["all"] = list(samples)
+    summary = {}
+    for operation, group in groups.items():
+        ok = sorted(s.seconds for s in group if 0 < s.status < 400)
+        shed = sum(1 for s in group if s.status in (429, 503))
+        summary[operation] = {
+            "requests": len(group),
+            "ok": len(ok),
+            "shed": shed,
+            "errors": len(group) - len(ok) - shed,
+            "throughput_rps": round(len(ok) / duration, 3) if duration else None,
+            **{f"p{q}_ms": None if percentile(ok, q) is None else round(percentile(ok, q) * 1000, 1)
+               for q in (50, 95, 99)},
+        }
+    return summary
+
+
+def llm_first_token_totals(base_url: str) -> Optional[Tuple[float, float]]:
+    """(sum, count) of the API's time-to-first-token histogram, from /metrics.
+
+    With several uvicorn workers this covers only the one that answered.
+    """
+    try:
+        text = httpx.get(f"{base_url}/metrics", timeout=10.0).text
+    except httpx.HTTPError:
+        return None
+    values = {}
+    for line in text.splitlines():
+        name, _, value = line.partition(" ")
+        if name in (f"{_TTFT_METRIC}_sum", f"{_TTFT_METRIC}_count"):
+            values[name] = float(value)
+    if len(values) < 2:
+        return None
+    return values[f"{_TTFT_METRIC}_sum"], values[f"{_TTFT_METRIC}_count"]
+
+
+def saturation_curve(base_url: str, session: Session, levels: Sequence[int], duration: float,
+                     warmup: float = 5.0, timeout: float = 120.0) -> List[dict]:
+    """Runs each concurrency level in turn; one summary row per level.
+
+    ``saturated`` marks levels that added less than SATURATION_GAIN of
+    overall throughput over the level before: past that point more users
+    only add latency.
+    """
+    curve = []
+    previous = None
+    for level in levels:
+        before = llm_first_token_totals(base_url)
+        samples = asyncio.run(run_level(base_url, session, level, duration, warmup, timeout, seed=level))
+        after = llm_first_token_totals(base_url)
+        summary = summarize(samples, duration)
+        throughput = summary["all"]["throughput_rps"] or 0.0
+        saturated = previous is not None and throughput < previous * (1 + SATURATION_GAIN)
+        ttft_ms = None
+        if before and after and after[1] > before[1]:
+            ttft_ms = round((after[0] - before[0]) / (after[1] - before[1]) * 1000, 1)
+        curve.append({"concurrency": level, "saturated": saturated,
+                      "llm_ttft_mean_ms": ttft_ms, "operations": summary})
+        logger.info("Load level finished", extra={
+            "concurrency": level, "throughput_rps": throughput,
+            "p95_ms": summary["all"]["p95_ms"], "llm_ttft_mean_ms": ttft_ms,
+            "saturated": saturated})
+        previous = throughput
+    return curve
+
+
+def format_curve(curve: Sequence[dict]) -> str:
+    """The curve as a fixed-width table, one line per level and operation."""
+    header = f"{'users':>6} {'operation':<10} {'reqs':>7} {'ok':>7} {'shed':>6} {'err':>6} " \
+             f"{'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    lines = [header, "-" * len(header)]
+
+    def cell(value) -> str:
+        return "-" if value is None else str(value)
+
+    for row in curve:
+        for operation, stats in sorted(row["operations"].items(), key=lambda item: item[0] == "all"):
+            lines.append(
+                f"{row['concurrency']:>6} {operation:<10} {stats['requests']:>7} {stats['ok']:>7} "
+                f"{stats['shed']:>6} {stats['errors']:>6} {cell(stats['throughput_rps']):>9} "
+                f"{cell(stats['p50_ms']):>9} {cell(stats['p95_ms']):>9} {cell(stats['p99_ms']):>9}"
+                + (f"  llm ttft {row['llm_ttft_mean_ms']} ms"
+                   if operation == "all" and row.get("llm_ttft_mean_ms") is not None else "")
+                + ("  saturated" if operation == "all" and row["saturated"] else ""))
+    return "\n".join(lines)
@@ -0,0 +1,119 @@
+"""Scripted workloads: a weighted mix of API operations plus the texts they use."""
+import json
+import random
+import uuid
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+
+API = "/api/v1"
+
+DEFAULT_QUESTIONS = [
+    "What is the leave policy for part-time staff?",
+    "How do I request access to the records system?",
+    "Who approves overtime on weekends?",
+    "What is the retention period for incident reports?",
+    "How are equipment faults escalated?",
+    "What training is required before handling patient data?",
+    "When are expense claims reimbursed?",
+    "What is the procedure for a fire alarm during a night shift?",
+]
+
+_SENTENCES = [
+    "Staff must submit requests through the internal portal at least five working days in advance.",
+    "Approvals are recorded by the line manager and reviewed monthly by the operations team.",
+    "Records are retained for seven years unless a longer period is required by regulation.",
+    "Faults are logged with the service desk and escalated after four hours without response.",
+    "All new starters complete the data protection module during their first week.",
+    "Claims received before the twentieth are paid with the same month's salary.",
+    "During an alarm the shift lead confirms the roll call at the assembly point.",
+    "Exceptions to this policy require written approval from the department head.",
+]
+
+
+@dataclass
+class Workload:
+    """What each virtual user does: operation names weighted by frequency."""
+    name: str
+    mix: Dict[str, float]
+    questions: List[str] = field(default_factory=lambda: list(DEFAULT_QUESTIONS))
+    # Paragraphs per generated upload.
+    document_paragraphs: int = 20
+
+    def choose(self, rng: random.Random) -> str:
+        names = list(self.mix)
+        return rng.choices(names, weights=[self.mix[name] for name in names])[0]
+
+
+WORKLOADS: Dict[str, Workload] = {
+    "query": Workload("query", {"query": 1.0}),
+    "mixed": Workload("mixed", {"query": 0.7, "history": 0.25, "upload": 0.05}),
+    "read": Workload("read", {"history": 1.0}),
+    "ingest": Workload("ingest", {"upload": 0.5, "query": 0.5}),
+}
+
+
+def load_workload(name_or_path: str) -> Workload:
+    """A built-in workload by name, or one described in a JSON file.
+
+    The file holds ``{"name": ..., "mix": {"query": 0.8, "history": 0.2},
+    "questions": [...], "document_paragraphs": 20}``; only ``mix`` is required.
+    """
+    if name_or_path in WORKLOADS:
+        return WORKLOADS[name_or_path]
+    with open(name_or_path, encoding="utf-8") as f:
+        spec = json.load(f)
+    unknown = set(spec["mix"]) - set(OPERATIONS)
+    if unknown:
+        raise ValueError(f"Unknown operations {sorted(unknown)}; expected {sorted(OPERATIONS)}.")
+    workload = Workload(spec.get("name", name_or_path), spec["mix"])
+    workload.questions = spec.get("questions") or workload.questions
+    workload.document_paragraphs = spec.get("document_paragraphs", workload.document_paragraphs)
+    return workload
+
+
+def synthetic_document(rng: random.Random, paragraphs: int) -> str:
+    """Filler text shaped like a policy document; each upload is unique."""
+    lines = [f"Reference {uuid.uuid4().hex}"]
+    for _ in range(paragraphs):
+        lines.append(" ".join(rng.sample(_SENTENCES, k=4)))
+    return "\n\n".join(lines)
+
+
+# --- Operations ---
+#
+# Each returns the response of one request; the runner times it and labels
+# it with the operation name.
+
+@dataclass
+class Session:
+    """Auth headers and settings shared by every virtual user of a run."""
+    staff_headers: Dict[str, str]
+    admin_headers: Dict[str, str]
+    workload: Workload
+
+
+async def query(client: httpx.AsyncClient, session: Session, rng: random.Random) -> httpx.Response:
+    return await client.post(f"{API}/qa/query", headers=session.staff_headers,
+                             json={"query_text": rng.choice(session.workload.questions)})
+
+
+async def history(client: httpx.AsyncClient, session: Session, rng: random.Random) -> httpx.Response:
+    return await client.get(f"{API}/qa/history", headers=session.staff_headers,
+                            params={"limit": 20})
+
+
+async def upload(client: httpx.AsyncClient, session: Session, rng: random.Random) -> httpx.Response:
+    text = synthetic_document(rng, session.workload.document_paragraphs)
+    files = {"file": (f"loadtest-{uuid.uuid4().hex}.txt", text.encode("utf-8"), "text/plain")}
+    return await client.post(f"{API}/documents/upload", headers=session.admin_headers, files=files)
+
+
+Operation = Callable[[httpx.AsyncClient, Session, random.Random], Awaitable[httpx.Response]]
+
+OPERATIONS: Dict[str, Operation] = {
+    "query": query,
+    "history": history,
+    "upload": upload,
+}
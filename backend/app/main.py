@@ -1,11 +1,30 @@
-from fastapi import FastAPI
+import math
+import time
+
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from .core import database 
 import backend.app.api.v2.auth as auth, backend.app.api.v2.documents as documents, backend.app.api.v2.qa as qa
+import backend.app.api.v2.admin as admin
+import backend.app.api.v2.analytics as analytics
 from .services import user_service 
+from .services import analytics_service
+from .services import prewarm_service
+from .services import retrieval
+from .services import llm_client
+from .core.config import settings
 from backend.app.core import database as db_core
 from .models import schemas
 from .core import security
+from .core import metrics
+from .core import profiler
+from .core import admission
+from .core.events import broker as progress_broker
+from .core.logging_config import configure_logging, new_request_id, request_id_var
+
+configure_logging()
 
 # Initialize database tables
 db_core.init_db() 
@@ -59,13 +78,133 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+def _client_key(request: Request) -> str:
+    """Rate-limit key: the token's user where there is one, else the client address."""
+    auth_header = request.headers.get("Authorization", "")
+    if auth_header.lower().startswith("bearer "):
+        token_data = security.decode_access_token(auth_header[7:])
+        if token_data is not None:
+            return f"user:{token_data.username}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+class AdmissionControl:
+    """Sheds query traffic early (429 per user, 503 when saturated) instead of queueing it.
+
+    Plain ASGI rather than ``@app.middleware``: the in-flight slot is released
+    when the downstream app returns or is cancelled, so a streaming response
+    (batch QA) holds it until its body is sent and a client disconnecting
+    mid-stream cannot leak it.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request = Request(scope)
+        if not admission.is_guarded(request.url.path):
+            await self.app(scope, receive, send)
+            return
+
+        rejected, retry_after = admission.controller.admit(_client_key(request))
+        if rejected:
+            reason = "rate_limited" if rejected == 429 else "overloaded"
+            metrics.ADMISSION_REJECTIONS.labels(reason).inc()
+            response = JSONResponse(
+                {"detail": "Rate limit exceeded." if rejected == 429 else "Server is busy, retry later."},
+                status_code=rejected,
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission.controller.release()
+
+
+# Registered before request_context so it runs inside it: shed requests still
+# get a request id and show up in the latency histogram.
+app.add_middleware(AdmissionControl)
+
+
+@app.exception_handler(security.HashingOverloaded)
+async def hashing_overloaded(request: Request, exc: security.HashingOverloaded):
+    """Login storms are shed once the password hashing backlog is full."""
+    return JSONResponse(
+        {"detail": "Server is busy, retry later."},
+        status_code=503,
+        headers={"Retry-After": str(max(1, math.ceil(settings.OVERLOAD_RETRY_AFTER_SECONDS)))},
+    )
+
+
+@app.middleware("http")
+async def request_context(request: Request, call_next):
+    """Tags the request with an id for structured logs and records its latency."""
+    request_id = request.headers.get("X-Request-ID") or new_request_id()
+    token = request_id_var.set(request_id)
+    start = time.perf_counter()
+    status_code = 500
+    record = profiler.begin_request(
+        request.method, request.url.path) if profiler.is_active() else None
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        response.headers["X-Request-ID"] = request_id
+        return response
+    finally:
+        route = request.scope.get("route")
+        metrics.HTTP_REQUEST_LATENCY.labels(
+            request.method,
+            getattr(route, "path", "unmatched"),
+            str(status_code),
+        ).observe(time.perf_counter() - start)
+        if record is not None:
+            profiler.end_request(record, status_code)
+        request_id_var.reset(token)
+
 # Include routers
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
 app.include_router(documents.router, prefix="/api/v1/documents", tags=["Documents"])
 app.include_router(qa.router, prefix="/api/v1/qa", tags=["Q&A and RAG"])
+app.include_router(admin.router, prefix="/api/v1/admin", tags=["Admin"])
+app.include_router(analytics.router, prefix="/api/v1/analytics", tags=["Analytics"])
+
+
+@app.on_event("startup")
+async def start_background_jobs():
+    analytics_service.start_rollup_job()
+    prewarm_service.start_prewarm_job()
+    llm_client.start_warmup_job()
+    if not settings.RETRIEVAL_SERVICE_URL:
+        retrieval.start_index_jobs()
+    await progress_broker.start()
+
+
+@app.on_event("shutdown")
+async def close_database_pools():
+    if database.async_engine is not None:
+        await database.async_engine.dispose()
+    database.engine.dispose()
 
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the Local RAG Application API"}
 
 
+@app.get("/ready", include_in_schema=False)
+def readiness():
+    """Readiness probe: 503 until the startup cache prewarm has finished."""
+    if not prewarm_service.ready.is_set():
+        return JSONResponse({"status": "warming"}, status_code=503)
+    return {"status": "ready"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Prometheus scrape endpoint."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -75,6 +75,8 @@ class DocumentInfo(DocumentBase):
 
 class QueryRequest(BaseModel):
     query_text: str
+    # Optional latency budget; capped at the server's QUERY_LATENCY_BUDGET_SECONDS.
+    latency_budget_seconds: Optional[float] = None
 
 
 class QueryLogBase(BaseModel):
@@ -96,6 +98,53 @@ class QueryResponse(BaseModel):
     response_text: str  # Changed from answer to match qa_service
     source_references: Optional[str] = None
     # query_log_id: int # Removed, log happens in endpoint
+    index_generation: Optional[int] = None
+    # "generated", "extractive": quoted from the sources because the LLM
+    # could not answer within the latency budget, or "error".
+    answer_type: str = "generated"
+
+
+class BatchQueryRequest(BaseModel):
+    questions: List[str]
+    k: int = 3
+
+
+# --- Analytics Schemas ---
+
+
+class AnalyticsSummary(BaseModel):
+    hours: int
+    queries: int
+    errors: int
+    error_rate: float
+    ratings: int
+    average_rating: Optional[float] = None
+    rolled_up_at: Optional[datetime] = None
+
+
+class HourlyQueryStats(BaseModel):
+    hour: datetime
+    queries: int
+    errors: int
+
+
+class UserQueryStats(BaseModel):
+    user_id: int
+    username: str
+    queries: int
+    errors: int
+
+
+class SourceStats(BaseModel):
+    source: str
+    hits: int
+    last_hit_at: Optional[datetime] = None
+
+
+class HourlyFeedbackStats(BaseModel):
+    hour: datetime
+    ratings: int
+    average_rating: Optional[float] = None
 
 
 class FeedbackCreate(BaseModel):
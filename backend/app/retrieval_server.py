@@ -0,0 +1,61 @@
+from typing import List
+
+from fastapi import FastAPI, HTTPException, Response, status
+from fastapi.responses import ORJSONResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from pydantic import BaseModel
+
+from .core.logging_config import configure_logging
+from .services import retrieval
+
+# Standalone retrieval tier: query embedding, index search and chunk fetch.
+# Run it with
+#     uvicorn backend.app.retrieval_server:app --port 8100
+# and point the API workers at it with RETRIEVAL_SERVICE_URL.
+
+configure_logging()
+
+app = FastAPI(title="Local RAG Retrieval Service", default_response_class=ORJSONResponse)
+retriever = retrieval.LocalRetriever()
+
+
+class RetrieveRequest(BaseModel):
+    queries: List[str]
+    k: int = 3
+
+
+@app.on_event("startup")
+def load_models():
+    # Pay for the model and index before taking traffic, not on the first query.
+    retrieval.load_vector_store()
+    retrieval.embeddings.model
+    retrieval.start_index_jobs()
+
+
+@app.get("/generation")
+def current_generation():
+    return {"generation": retriever.current_generation()}
+
+
+@app.post("/retrieve")
+def retrieve(request: RetrieveRequest):
+    """Hits for a single query (query embedding path, Redis-cached)."""
+    if len(request.queries) != 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Exactly one query expected.")
+    generation, docs = retriever.retrieve(request.queries[0], k=request.k)
+    hits = [[(doc, 0.0) for doc in docs]]
+    return {"generation": generation, "hits": retrieval.encode_hits(hits)}
+
+
+@app.post("/retrieve_batch")
+def retrieve_batch(request: RetrieveRequest):
+    """Scored hits for many queries from one embedding pass and one matrix search."""
+    generation, hits = retriever.retrieve_batch(request.queries, k=request.k)
+    return {"generation": generation, "hits": retrieval.encode_hits(hits)}
+
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Prometheus scrape endpoint."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
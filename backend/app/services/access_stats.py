@@ -0,0 +1,103 @@
+import atexit
+import datetime
+import threading
+from collections import Counter
+from typing import Dict, Iterable, Optional, Set
+
+from langchain.docstore.document import Document as LangchainDocument
+from sqlalchemy import desc, func
+
+from ..core import database as db_core
+from ..core import metrics
+from ..core.config import settings
+from ..core.logging_config import get_logger
+from ..data_access import log_document_access_bulk
+
+logger = get_logger("access_stats")
+
+
+class AccessCounter:
+    """Per-document retrieval hits accumulated in memory between flushes."""
+
+    def __init__(self):
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, counts: Dict[int, int]) -> None:
+        with self._lock:
+            self._counts.update(counts)
+
+    def drain(self) -> Dict[int, int]:
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+        return dict(counts)
+
+
+counter = AccessCounter()
+_flush_lock = threading.Lock()
+
+
+def record_hits(docs: Iterable[LangchainDocument]) -> None:
+    """Counts one hit per retrieved chunk against its document; never touches the DB."""
+    counts = Counter(doc.metadata.get("doc_id") for doc in docs)
+    counts.pop(None, None)
+    if counts:
+        counter.add(counts)
+        metrics.DOCUMENT_HITS.inc(sum(counts.values()))
+
+
+def flush() -> int:
+    """Writes the pending counters as one DocumentAccessLog row per document."""
+    with _flush_lock:
+        counts = counter.drain()
+        if not counts:
+            return 0
+        now = datetime.datetime.utcnow()
+        try:
+            with db_core.get_db_session() as db:
+                # Documents deleted since their hits were counted would fail
+                # the foreign key on every retry; their counts are dropped.
+                existing = {doc_id for doc_id, in db.query(db_core.Document.id)
+                            .filter(db_core.Document.id.in_(list(counts))).all()}
+                rows = [{"document_id": doc_id, "hit_count": hits, "accessed_at": now}
+                        for doc_id, hits in counts.items() if doc_id in existing]
+                return log_document_access_bulk(db, rows)
+        except Exception as e:
+            # Keep the counts for the next attempt rather than losing them.
+            counter.add(counts)
+            logger.error("Could not flush document access counters: %s", e)
+            return 0
+
+
+def start_flush_job() -> Optional[threading.Thread]:
+    """Flushes hit counters every ACCESS_FLUSH_SECONDS (0 disables) and at exit."""
+    interval = settings.ACCESS_FLUSH_SECONDS
+    if interval <= 0:
+        return None
+
+    def loop():
+        while True:
+            stop.wait(interval)
+            flush()
+
+    stop = threading.Event()
+    atexit.register(flush)
+    thread = threading.Thread(target=loop, name="rag-access-flush", daemon=True)
+    thread.start()
+    return thread
+
+
+def hot_document_ids(limit: Optional[int] = None, days: Optional[int] = None) -> Set[int]:
+    """The most retrieved documents over the last ``days`` days."""
+    limit = settings.TIER_HOT_DOCUMENTS if limit is None else limit
+    days = settings.TIER_WINDOW_DAYS if days is None else days
+    since = datetime.datetime.utcnow() - datetime.timedelta(days=days)
+    hits = func.sum(db_core.DocumentAccessLog.hit_count)
+    with db_core.SessionLocal() as db:
+        rows = db.query(db_core.DocumentAccessLog.document_id)\
+            .filter(db_core.DocumentAccessLog.accessed_at >= since)\
+            .group_by(db_core.DocumentAccessLog.document_id)\
+            .order_by(desc(hits))\
+            .limit(limit)\
+            .all()
+    return {doc_id for doc_id, in rows}
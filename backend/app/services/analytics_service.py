@@ -0,0 +1,265 @@
+import datetime
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..core import database as db_core
+from ..core.config import settings
+from ..core.logging_config import get_logger
+from ..core.metrics import stage_timer
+
+logger = get_logger("analytics_service")
+
+# Raw rows read per round trip while rolling up.
+_BATCH = 5000
+
+_refresh_lock = threading.Lock()
+
+
+def _hour(ts: datetime.datetime) -> datetime.datetime:
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+def _watermark(db: Session, name: str) -> db_core.RollupState:
+    state = db.query(db_core.RollupState)\
+        .filter(db_core.RollupState.name == name)\
+        .with_for_update()\
+        .first()
+    if state is None:
+        state = db_core.RollupState(name=name, last_id=0)
+        db.add(state)
+        db.flush()
+    return state
+
+
+# --- Incremental maintenance ---
+
+def _settled(rows: list, column: int) -> list:
+    """The leading ``rows`` written at least ANALYTICS_ROLLUP_LAG_SECONDS ago.
+
+    Ids are assigned before commit, so a row still in an open transaction
+    can sit below ids that are already visible; moving the watermark past
+    it would drop it for good. Stopping at the first recent row keeps the
+    watermark behind any write that may not have committed yet.
+    """
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(
+        seconds=settings.ANALYTICS_ROLLUP_LAG_SECONDS)
+    for i, row in enumerate(rows):
+        if row[column] is not None and row[column] > cutoff:
+            return rows[:i]
+    return rows
+
+
+def _roll_up_queries(db: Session) -> int:
+    state = _watermark(db, "query_logs")
+    rows = db.query(
+        db_core.QueryLog.id,
+        db_core.QueryLog.user_id,
+        db_core.QueryLog.timestamp,
+        db_core.QueryLog.is_error,
+        db_core.QueryLog.source_references,
+    ).filter(db_core.QueryLog.id > state.last_id)\
+        .order_by(db_core.QueryLog.id)\
+        .limit(_BATCH)\
+        .all()
+    rows = _settled(rows, 2)
+    if not rows:
+        return 0
+
+    per_hour: Dict[tuple, List[int]] = defaultdict(lambda: [0, 0])
+    per_source: Dict[str, list] = defaultdict(lambda: [0, None])
+    for _, user_id, timestamp, is_error, sources in rows:
+        counts = per_hour[(_hour(timestamp), user_id)]
+        counts[0] += 1
+        counts[1] += bool(is_error)
+        for source in (sources or "").split(", "):
+            if source and source not in ("N/A", "No sources found"):
+                entry = per_source[source]
+                entry[0] += 1
+                entry[1] = max(filter(None, (entry[1], timestamp)))
+
+    existing = {
+        (r.hour, r.user_id): r
+        for r in db.query(db_core.QueryStatsHourly).filter(
+            db_core.QueryStatsHourly.hour.in_({h for h, _ in per_hour}))
+    }
+    for (hour, user_id), (queries, errors) in per_hour.items():
+        row = existing.get((hour, user_id))
+        if row is None:
+            row = db_core.QueryStatsHourly(
+                hour=hour, user_id=user_id, query_count=0, error_count=0)
+            db.add(row)
+        row.query_count += queries
+        row.error_count += errors
+
+    if per_source:
+        existing_sources = {
+            r.source: r
+            for r in db.query(db_core.SourceStats).filter(
+                db_core.SourceStats.source.in_(list(per_source)))
+        }
+        for source, (hits, last_hit) in per_source.items():
+            row = existing_sources.get(source)
+            if row is None:
+                row = db_core.SourceStats(source=source, hit_count=0)
+                db.add(row)
+            row.hit_count += hits
+            row.last_hit_at = max(filter(None, (row.last_hit_at, last_hit)))
+
+    state.last_id = rows[-1][0]
+    state.updated_at = datetime.datetime.utcnow()
+    return len(rows)
+
+
+def _roll_up_feedback(db: Session) -> int:
+    state = _watermark(db, "feedback")
+    rows = db.query(db_core.Feedback.id, db_core.Feedback.created_at, db_core.Feedback.rating)\
+        .filter(db_core.Feedback.id > state.last_id)\
+        .order_by(db_core.Feedback.id)\
+        .limit(_BATCH)\
+        .all()
+    rows = _settled(rows, 1)
+    if not rows:
+        return 0
+
+    per_hour: Dict[datetime.datetime, List[int]] = defaultdict(lambda: [0, 0])
+    for _, created_at, rating in rows:
+        per_hour[_hour(created_at)][0] += rating
+        per_hour[_hour(created_at)][1] += 1
+    existing = {
+        r.hour: r
+        for r in db.query(db_core.FeedbackStatsHourly).filter(
+            db_core.FeedbackStatsHourly.hour.in_(list(per_hour)))
+    }
+    for hour, (rating_sum, count) in per_hour.items():
+        row = existing.get(hour)
+        if row is None:
+            row = db_core.FeedbackStatsHourly(
+                hour=hour, rating_sum=0, rating_count=0)
+            db.add(row)
+        row.rating_sum += rating_sum
+        row.rating_count += count
+
+    state.last_id = rows[-1][0]
+    state.updated_at = datetime.datetime.utcnow()
+    return len(rows)
+
+
+def refresh_rollups() -> Dict[str, int]:
+    """Folds log rows written since the last run into the rollup tables.
+
+    Work is proportional to the new rows only. Each batch commits together
+    with its watermark, so an interrupted run never double counts; rows
+    newer than ANALYTICS_ROLLUP_LAG_SECONDS wait for the next run.
+    """
+    processed = {"query_logs": 0, "feedback": 0}
+    with _refresh_lock, stage_timer("analytics_rollup"):
+        for name, step in (("query_logs", _roll_up_queries), ("feedback", _roll_up_feedback)):
+            while True:
+                with db_core.get_db_session() as db:
+                    count = step(db)
+                processed[name] += count
+                if count < _BATCH:
+                    break
+    return processed
+
+
+def start_rollup_job() -> Optional[threading.Thread]:
+    """Runs ``refresh_rollups`` every ANALYTICS_ROLLUP_INTERVAL_SECONDS (0 disables)."""
+    interval = settings.ANALYTICS_ROLLUP_INTERVAL_SECONDS
+    if interval <= 0:
+        return None
+
+    def loop():
+        while True:
+            try:
+                refresh_rollups()
+            except Exception as e:
+                logger.error("Analytics rollup failed: %s", e)
+            stop.wait(interval)
+
+    stop = threading.Event()
+    thread = threading.Thread(target=loop, name="rag-analytics-rollup", daemon=True)
+    thread.start()
+    return thread
+
+
+# --- Reads (rollup tables only) ---
+
+def _since(hours: int) -> datetime.datetime:
+    return _hour(datetime.datetime.utcnow()) - datetime.timedelta(hours=hours - 1)
+
+
+def queries_per_hour(db: Session, hours: int = 24) -> List[dict]:
+    rows = db.query(
+        db_core.QueryStatsHourly.hour,
+        func.sum(db_core.QueryStatsHourly.query_count),
+        func.sum(db_core.QueryStatsHourly.error_count),
+    ).filter(db_core.QueryStatsHourly.hour >= _since(hours))\
+        .group_by(db_core.QueryStatsHourly.hour)\
+        .order_by(db_core.QueryStatsHourly.hour)\
+        .all()
+    return [{"hour": hour, "queries": int(q), "errors": int(e)} for hour, q, e in rows]
+
+
+def queries_per_user(db: Session, hours: int = 24 * 7, limit: int = 50) -> List[dict]:
+    total = func.sum(db_core.QueryStatsHourly.query_count)
+    rows = db.query(
+        db_core.QueryStatsHourly.user_id,
+        db_core.User.username,
+        total,
+        func.sum(db_core.QueryStatsHourly.error_count),
+    ).join(db_core.User, db_core.User.id == db_core.QueryStatsHourly.user_id)\
+        .filter(db_core.QueryStatsHourly.hour >= _since(hours))\
+        .group_by(db_core.QueryStatsHourly.user_id, db_core.User.username)\
+        .order_by(total.desc())\
+        .limit(limit)\
+        .all()
+    return [
+        {"user_id": user_id, "username": username, "queries": int(q), "errors": int(e)}
+        for user_id, username, q, e in rows
+    ]
+
+
+def top_sources(db: Session, limit: int = 10) -> List[dict]:
+    rows = db.query(db_core.SourceStats)\
+        .order_by(db_core.SourceStats.hit_count.desc())\
+        .limit(limit)\
+        .all()
+    return [{"source": r.source, "hits": r.hit_count, "last_hit_at": r.last_hit_at} for r in rows]
+
+
+def feedback_summary(db: Session, hours: int = 24 * 7) -> List[dict]:
+    rows = db.query(db_core.FeedbackStatsHourly)\
+        .filter(db_core.FeedbackStatsHourly.hour >= _since(hours))\
+        .order_by(db_core.FeedbackStatsHourly.hour)\
+        .all()
+    return [
+        {"hour": r.hour, "ratings": r.rating_count,
+         "average_rating": r.rating_sum / r.rating_count if r.rating_count else None}
+        for r in rows
+    ]
+
+
+def summary(db: Session, hours: int = 24) -> dict:
+    queries, errors = db.query(
+        func.coalesce(func.sum(db_core.QueryStatsHourly.query_count), 0),
+        func.coalesce(func.sum(db_core.QueryStatsHourly.error_count), 0),
+    ).filter(db_core.QueryStatsHourly.hour >= _since(hours)).one()
+    rating_sum, rating_count = db.query(
+        func.coalesce(func.sum(db_core.FeedbackStatsHourly.rating_sum), 0),
+        func.coalesce(func.sum(db_core.FeedbackStatsHourly.rating_count), 0),
+    ).filter(db_core.FeedbackStatsHourly.hour >= _since(hours)).one()
+    states = {s.name: s.updated_at for s in db.query(db_core.RollupState)}
+    return {
+        "hours": hours,
+        "queries": int(queries),
+        "errors": int(errors),
+        "error_rate": errors / queries if queries else 0.0,
+        "ratings": int(rating_count),
+        "average_rating": rating_sum / rating_count if rating_count else None,
+        "rolled_up_at": states.get("query_logs"),
+    }
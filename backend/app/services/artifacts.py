@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import threading
+import zlib
+from typing import Iterator, Optional
+
+from ..core import metrics
+from ..core.config import settings
+from ..core.logging_config import get_logger
+from . import extractors, ocr
+
+logger = get_logger("artifacts")
+
+# Extraction artifacts: the segments an extractor produced for a file,
+# stored as one zlib-compressed NDJSON stream (a header object, then one
+# JSON string per segment) under
+#
+#     <ARTIFACT_DIR>/<sha[:2]>/<sha256 of the file>.<extraction version>.ndjson.z
+#
+# Content addressing means a file re-uploaded under another name, or a
+# document re-chunked or re-embedded, reuses the text extracted once. The
+# version tags everything that shapes that text, so changing it simply
+# stops matching older artifacts.
+
+# Bump when the artifact layout or any extractor's output changes.
+FORMAT_VERSION = 1
+
+_HASH_BLOCK = 1 << 20
+_READ_BLOCK = 1 << 16
+
+
+def file_digest(filepath: str) -> str:
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def extraction_version(extractor: extractors.Extractor) -> str:
+    """Short tag of the artifact format, the extractor and (for PDFs) the OCR settings."""
+    spec = [FORMAT_VERSION, extractor.__module__, extractor.__name__]
+    if extractor is extractors.iter_pdf:
+        spec += [settings.OCR_ENABLED, settings.OCR_DPI,
+                 settings.OCR_LANGUAGE, settings.OCR_MIN_CHARS]
+    return hashlib.sha256(json.dumps(spec).encode()).hexdigest()[:12]
+
+
+def artifact_path(digest: str, version: str) -> str:
+    return os.path.join(settings.ARTIFACT_DIR, digest[:2], f"{digest}.{version}.ndjson.z")
+
+
+def locate(filepath: str, mime_type: Optional[str] = None) -> str:
+    """Where the artifact for a file's current content and extraction version lives."""
+    extractor = extractors.get_extractor(filepath, mime_type)
+    return artifact_path(file_digest(filepath), extraction_version(extractor))
+
+
+def iter_text(filepath: str, mime_type: Optional[str] = None,
+              on_page: extractors.PageCallback = None, refresh: bool = False) -> Iterator[str]:
+    """``extractors.iter_text`` through the artifact store.
+
+    A stored artifact is decompressed and streamed back; otherwise the
+    extractor runs and each segment is written through to a new artifact as
+    it is yielded, so neither path holds the whole text. ``refresh``
+    re-extracts even when an artifact exists.
+    """
+    if not settings.ARTIFACTS_ENABLED:
+        yield from extractors.iter_text(filepath, mime_type, on_page=on_page)
+        return
+    extractor = extractors.get_extractor(filepath, mime_type)
+    digest = file_digest(filepath)
+    path = artifact_path(digest, extraction_version(extractor))
+    if not refresh and os.path.exists(path):
+        records = _records(path)
+        try:
+            header = next(records)
+            valid = isinstance(header, dict) and header.get("format") == FORMAT_VERSION
+        except (OSError, zlib.error, ValueError, StopIteration):
+            valid = False
+        if valid:
+            metrics.EXTRACTION_ARTIFACTS.labels("hit").inc()
+            yield from _segments(records, path, on_page)
+            return
+        records.close()
+        metrics.EXTRACTION_ARTIFACTS.labels("corrupt").inc()
+        logger.warning("Ignoring unreadable extraction artifact %s", path)
+    metrics.EXTRACTION_ARTIFACTS.labels("miss").inc()
+    yield from _write_through(path, filepath, extractor, digest, on_page)
+
+
+def _line(record) -> bytes:
+    return json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+def _records(path: str) -> Iterator:
+    """The decoded records of an artifact, decompressed block by block."""
+    decompressor = zlib.decompressobj()
+    pending = b""
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_READ_BLOCK), b""):
+            *lines, pending = (pending + decompressor.decompress(block)).split(b"\n")
+            for line in lines:
+                yield json.loads(line)
+    if pending or not decompressor.eof:
+        raise ValueError("truncated artifact")
+
+
+def _segments(records: Iterator, path: str, on_page: extractors.PageCallback) -> Iterator[str]:
+    count = 0
+    try:
+        for segment in records:
+            count += 1
+            yield segment
+    except (OSError, zlib.error, ValueError) as e:
+        # Part of the text is already out; drop the artifact so the next
+        # attempt extracts afresh.
+        metrics.EXTRACTION_ARTIFACTS.labels("corrupt").inc()
+        _remove(path)
+        raise ValueError(f"Corrupt extraction artifact {path}: {e}") from e
+    if on_page:
+        on_page(count, count)
+
+
+def _write_through(path: str, filepath: str, extractor: extractors.Extractor, digest: str,
+                   on_page: extractors.PageCallback) -> Iterator[str]:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    compressor = zlib.compressobj(settings.ARTIFACT_COMPRESSION_LEVEL)
+    stats = ocr.new_stats()
+    kwargs = {"ocr_stats": stats} if extractor is extractors.iter_pdf else {}
+    stored = False
+    try:
+        with open(tmp, "wb") as f:
+            f.write(compressor.compress(_line({
+                "format": FORMAT_VERSION, "sha256": digest,
+                "extractor": extractor.__name__, "source": os.path.basename(filepath),
+            })))
+            for segment in extractor(filepath, on_page=on_page, **kwargs):
+                f.write(compressor.compress(_line(segment)))
+                yield segment
+            f.write(compressor.flush())
+        # Pages whose OCR failed came out empty; retry them next time.
+        if stats["errors"]:
+            logger.warning("Not storing extraction artifact for %s: %s OCR page(s) failed",
+                           filepath, stats["errors"])
+            return
+        os.replace(tmp, path)
+        stored = True
+    finally:
+        if not stored:
+            _remove(tmp)
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
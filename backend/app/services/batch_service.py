@@ -0,0 +1,81 @@
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterator, List, Optional
+
+from ..core import database as db_core
+from ..core import metrics
+from ..core.config import settings
+from ..core.logging_config import get_logger
+from ..core.metrics import stage_timer
+from ..data_access import log_queries_bulk
+from . import qa_service
+
+logger = get_logger("batch_service")
+
+
+def run_batch(
+    questions: List[str],
+    user_id: Optional[int],
+    k: int = 3,
+    concurrency: Optional[int] = None,
+) -> Iterator[dict]:
+    """Answers many questions against one index generation.
+
+    Questions are embedded in a single pass and retrieved with one search
+    over the query matrix; generation runs on a bounded thread pool and a
+    result is yielded as soon as each answer is ready (completion order,
+    tagged with the question's ``index``). Query logs are bulk-inserted at
+    the end, also when the consumer stops early. ``user_id=None`` skips
+    logging.
+    """
+    generation, hits = qa_service.retriever.retrieve_batch(questions, k)
+    if generation is None:
+        for i, question in enumerate(questions):
+            yield {"index": i, "question": question, "error": "Vector store not initialized."}
+        return
+
+    log_rows = []
+    stop = threading.Event()
+    pool = ThreadPoolExecutor(
+        max_workers=concurrency or settings.BATCH_GENERATION_CONCURRENCY,
+        thread_name_prefix="rag-batch")
+    try:
+        futures = {
+            pool.submit(qa_service.generate_answer, question, [doc for doc, _ in row], stop): i
+            for i, (question, row) in enumerate(zip(questions, hits))
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            source_docs = [doc for doc, _ in hits[i]]
+            result = {
+                "index": i,
+                "question": questions[i],
+                "sources": qa_service.format_sources(source_docs),
+                "generation": generation,
+            }
+            try:
+                result["answer"] = future.result() or "No answer generated."
+                metrics.QUERIES.labels("ok").inc()
+            except Exception as e:
+                logger.error("Batch generation failed for question %s: %s", i, e)
+                result["error"] = str(e)
+                metrics.QUERIES.labels("error").inc()
+            log_rows.append({
+                "user_id": user_id,
+                "query_text": questions[i],
+                "response_text": result.get("answer", f"Error: {result.get('error')}"),
+                "source_references": result["sources"],
+                "is_error": "error" in result,
+                "timestamp": datetime.datetime.utcnow(),
+            })
+            yield result
+    finally:
+        # Abandoned batches must not keep the LLM busy: queued questions are
+        # dropped and running generations stop at their next token.
+        stop.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+        if user_id is not None and log_rows:
+            with stage_timer("log_write", rows=len(log_rows)):
+                with db_core.get_db_session() as db:
+                    log_queries_bulk(db, log_rows)
@@ -0,0 +1,317 @@
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from langchain.docstore.document import Document as LangchainDocument
+
+from . import dedup
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    id INTEGER PRIMARY KEY,
+    doc_id INTEGER,
+    text BLOB NOT NULL,
+    metadata TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_chunks_doc_id ON chunks (doc_id);
+-- Documents referencing each chunk; near-duplicates from other documents
+-- link to an existing chunk instead of storing and embedding a copy.
+CREATE TABLE IF NOT EXISTS chunk_refs (
+    chunk_id INTEGER NOT NULL,
+    doc_id INTEGER NOT NULL,
+    source TEXT,
+    PRIMARY KEY (chunk_id, doc_id)
+);
+CREATE INDEX IF NOT EXISTS idx_chunk_refs_doc_id ON chunk_refs (doc_id);
+CREATE TABLE IF NOT EXISTS chunk_fingerprints (
+    chunk_id INTEGER PRIMARY KEY,
+    digest BLOB NOT NULL,
+    simhash INTEGER NOT NULL,
+    band0 INTEGER NOT NULL,
+    band1 INTEGER NOT NULL,
+    band2 INTEGER NOT NULL,
+    band3 INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_fingerprints_digest ON chunk_fingerprints (digest);
+CREATE INDEX IF NOT EXISTS idx_fingerprints_band0 ON chunk_fingerprints (band0);
+CREATE INDEX IF NOT EXISTS idx_fingerprints_band1 ON chunk_fingerprints (band1);
+CREATE INDEX IF NOT EXISTS idx_fingerprints_band2 ON chunk_fingerprints (band2);
+CREATE INDEX IF NOT EXISTS idx_fingerprints_band3 ON chunk_fingerprints (band3);
+-- High-water mark, so ids of deleted chunks (still referenced by older
+-- index generations) are never handed out again.
+CREATE TABLE IF NOT EXISTS chunk_sequence (last_id INTEGER NOT NULL);
+-- Chunks no index generation from ``generation`` on refers to. Older,
+-- still served generations may, so the rows are only purged once those are
+-- pruned; NULL until the releasing build is published.
+CREATE TABLE IF NOT EXISTS chunk_tombstones (
+    chunk_id INTEGER PRIMARY KEY,
+    generation INTEGER
+);
+"""
+
+# SQLite caps the number of bound parameters per statement.
+_MAX_PARAMS = 900
+
+
+class ChunkStore:
+    """Chunk text and metadata in SQLite, keyed by the ids held in the index.
+
+    Text is zlib-compressed. Nothing is kept in Python memory: ``get`` reads
+    only the rows for the hits being returned. WAL mode lets queries read
+    while ingestion writes.
+
+    An index build (``begin`` .. ``commit``) keeps its writes in one
+    transaction on the building thread, so served generations never see
+    them before the build is published and a failed build leaves nothing
+    behind. Released chunks are tombstoned rather than deleted, since
+    earlier generations may still return them.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        with self._connection() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _writing(self) -> Iterator[sqlite3.Connection]:
+        """A connection to write on: committed per call, or at the end of a build."""
+        with self._write_lock:
+            conn = self._connection()
+            if getattr(self._local, "building", False):
+                yield conn
+            else:
+                with conn:
+                    yield conn
+
+    # --- Builds ---
+
+    def begin(self) -> None:
+        """Holds this thread's writes in one transaction until ``commit`` or ``rollback``."""
+        self._local.building = True
+
+    def commit(self, generation: int) -> None:
+        """Commits the build's writes; its releases take effect from ``generation``."""
+        conn = self._connection()
+        with self._write_lock:
+            conn.execute("UPDATE chunk_tombstones SET generation = ? WHERE generation IS NULL",
+                         (generation,))
+            conn.commit()
+        self._local.building = False
+
+    def rollback(self) -> None:
+        """Discards the build's writes; a no-op once ``commit`` has run."""
+        if not getattr(self._local, "building", False):
+            return
+        self._connection().rollback()
+        self._local.building = False
+
+    def purge(self, generation: int) -> int:
+        """Deletes chunks tombstoned at or before ``generation``; returns how many.
+
+        Call once no generation older than ``generation`` is served.
+        """
+        with self._writing() as conn:
+            condition = "SELECT chunk_id FROM chunk_tombstones WHERE generation <= ?"
+            conn.execute(f"DELETE FROM chunks WHERE id IN ({condition})", (generation,))
+            return conn.execute("DELETE FROM chunk_tombstones WHERE generation <= ?",
+                                (generation,)).rowcount
+
+    # --- Writes ---
+
+    def add(self, texts: Sequence[str], metadatas: Sequence[dict]) -> List[int]:
+        """Stores chunks and returns their newly assigned ids.
+
+        Each chunk is referenced by its own document and fingerprinted for
+        near-duplicate lookups.
+        """
+        with self._writing() as conn:
+            start = max(
+                conn.execute("SELECT COALESCE(MAX(id), 0) FROM chunks").fetchone()[0],
+                conn.execute("SELECT COALESCE(MAX(last_id), 0) FROM chunk_sequence").fetchone()[0],
+            ) + 1
+            ids = list(range(start, start + len(texts)))
+            conn.execute("DELETE FROM chunk_sequence")
+            conn.execute("INSERT INTO chunk_sequence (last_id) VALUES (?)",
+                         (start + len(texts) - 1,))
+            conn.executemany(
+                "INSERT INTO chunks (id, doc_id, text, metadata) VALUES (?, ?, ?, ?)",
+                [
+                    (chunk_id, metadata.get("doc_id"),
+                     zlib.compress(text.encode("utf-8")), json.dumps(metadata))
+                    for chunk_id, text, metadata in zip(ids, texts, metadatas)
+                ],
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO chunk_refs (chunk_id, doc_id, source) VALUES (?, ?, ?)",
+                [
+                    (chunk_id, metadata["doc_id"], metadata.get("source"))
+                    for chunk_id, metadata in zip(ids, metadatas)
+                    if metadata.get("doc_id") is not None
+                ],
+            )
+            rows = []
+            for chunk_id, text in zip(ids, texts):
+                digest, value = dedup.fingerprint(text)
+                rows.append((chunk_id, digest, dedup.to_signed(value), *dedup.bands(value)))
+            conn.executemany(
+                "INSERT INTO chunk_fingerprints (chunk_id, digest, simhash, band0, band1, band2, band3)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        return ids
+
+    def link(self, chunk_ids: Sequence[int], doc_id: int, source: Optional[str]) -> List[int]:
+        """References existing chunks from another document; returns the ids that still exist."""
+        with self._writing() as conn:
+            existing = self._existing(conn, chunk_ids)
+            conn.executemany(
+                "INSERT OR IGNORE INTO chunk_refs (chunk_id, doc_id, source) VALUES (?, ?, ?)",
+                [(chunk_id, doc_id, source) for chunk_id in existing],
+            )
+        return [chunk_id for chunk_id in chunk_ids if chunk_id in existing]
+
+    def release_document(self, doc_id: int) -> List[int]:
+        """Drops a document's references and retires the chunks nobody references any more.
+
+        Returns the retired chunk ids, whose vectors the caller removes from
+        the index; their rows stay (tombstoned) until ``purge``. Shared
+        chunks owned by the document are handed to one of their remaining
+        documents.
+        """
+        with self._writing() as conn:
+            referenced = [row[0] for row in conn.execute(
+                "SELECT chunk_id FROM chunk_refs WHERE doc_id = ?", (doc_id,))]
+            # Chunks stored before references existed.
+            unreferenced = [row[0] for row in conn.execute(
+                "SELECT id FROM chunks WHERE doc_id = ? AND id NOT IN"
+                " (SELECT chunk_id FROM chunk_refs)"
+                " AND id NOT IN (SELECT chunk_id FROM chunk_tombstones)", (doc_id,))]
+            conn.execute("DELETE FROM chunk_refs WHERE doc_id = ?", (doc_id,))
+
+            orphaned = list(unreferenced)
+            for chunk_id in referenced:
+                heir = conn.execute(
+                    "SELECT doc_id, source FROM chunk_refs WHERE chunk_id = ? ORDER BY doc_id LIMIT 1",
+                    (chunk_id,)).fetchone()
+                if heir is None:
+                    orphaned.append(chunk_id)
+                    continue
+                row = conn.execute(
+                    "SELECT doc_id, metadata FROM chunks WHERE id = ?", (chunk_id,)).fetchone()
+                if row is not None and row[0] == doc_id:
+                    metadata = json.loads(row[1])
+                    metadata.update(doc_id=heir[0], source=heir[1])
+                    conn.execute("UPDATE chunks SET doc_id = ?, metadata = ? WHERE id = ?",
+                                 (heir[0], json.dumps(metadata), chunk_id))
+            conn.executemany("INSERT OR IGNORE INTO chunk_tombstones (chunk_id) VALUES (?)",
+                             [(chunk_id,) for chunk_id in orphaned])
+            for start in range(0, len(orphaned), _MAX_PARAMS):
+                batch = orphaned[start:start + _MAX_PARAMS]
+                conn.execute(
+                    f"DELETE FROM chunk_fingerprints WHERE chunk_id IN ({','.join('?' * len(batch))})",
+                    batch)
+        return orphaned
+
+    def delete(self, ids: Iterable[int]) -> None:
+        ids = list(ids)
+        with self._writing() as conn:
+            for start in range(0, len(ids), _MAX_PARAMS):
+                batch = ids[start:start + _MAX_PARAMS]
+                conn.execute(
+                    f"DELETE FROM chunks WHERE id IN ({','.join('?' * len(batch))})", batch)
+
+    # --- Reads ---
+
+    def get(self, ids: Sequence[int]) -> Dict[int, LangchainDocument]:
+        """Fetches the chunks with the given ids as Langchain documents."""
+        ids = list(ids)
+        docs = {}
+        conn = self._connection()
+        for start in range(0, len(ids), _MAX_PARAMS):
+            batch = ids[start:start + _MAX_PARAMS]
+            rows = conn.execute(
+                f"SELECT id, text, metadata FROM chunks WHERE id IN ({','.join('?' * len(batch))})",
+                batch,
+            )
+            for chunk_id, text, metadata in rows:
+                docs[chunk_id] = LangchainDocument(
+                    page_content=zlib.decompress(text).decode("utf-8"),
+                    metadata=json.loads(metadata),
+                )
+        return docs
+
+    def _existing(self, conn: sqlite3.Connection, ids: Sequence[int]) -> set:
+        ids = list(ids)
+        found = set()
+        for start in range(0, len(ids), _MAX_PARAMS):
+            batch = ids[start:start + _MAX_PARAMS]
+            found.update(row[0] for row in conn.execute(
+                f"SELECT id FROM chunks WHERE id IN ({','.join('?' * len(batch))})"
+                " AND id NOT IN (SELECT chunk_id FROM chunk_tombstones)", batch))
+        return found
+
+    def find_duplicate(self, digest: bytes, simhash: int, max_distance: int,
+                       exclude_doc_id: Optional[int] = None) -> Optional[int]:
+        """Id of a stored chunk with the same digest or a SimHash within ``max_distance`` bits.
+
+        Chunks referenced by no document other than ``exclude_doc_id`` do
+        not count.
+        """
+        others = "" if exclude_doc_id is None else \
+            " AND EXISTS (SELECT 1 FROM chunk_refs r WHERE r.chunk_id = f.chunk_id AND r.doc_id != ?)"
+        extra = () if exclude_doc_id is None else (exclude_doc_id,)
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT f.chunk_id FROM chunk_fingerprints f WHERE f.digest = ?" + others + " LIMIT 1",
+            (digest, *extra)).fetchone()
+        if row is not None or not max_distance:
+            return row[0] if row else None
+        candidates = conn.execute(
+            "SELECT f.chunk_id, f.simhash FROM chunk_fingerprints f"
+            " WHERE (f.band0 = ? OR f.band1 = ? OR f.band2 = ? OR f.band3 = ?)" + others,
+            (*dedup.bands(simhash), *extra))
+        for chunk_id, value in candidates:
+            if dedup.hamming(dedup.to_unsigned(value), simhash) <= max_distance:
+                return chunk_id
+        return None
+
+    def ids_for_document(self, doc_id: int) -> List[int]:
+        rows = self._connection().execute(
+            "SELECT id FROM chunks WHERE doc_id = ? ORDER BY id", (doc_id,))
+        return [row[0] for row in rows]
+
+    def doc_ids(self, ids: Sequence[int]) -> Dict[int, Optional[int]]:
+        """Maps chunk ids to the id of the document they came from."""
+        ids = [int(i) for i in ids]
+        result = {}
+        conn = self._connection()
+        for start in range(0, len(ids), _MAX_PARAMS):
+            batch = ids[start:start + _MAX_PARAMS]
+            rows = conn.execute(
+                f"SELECT id, doc_id FROM chunks WHERE id IN ({','.join('?' * len(batch))})",
+                batch,
+            )
+            result.update(rows)
+        return result
+
+    def count(self) -> int:
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM chunks WHERE id NOT IN (SELECT chunk_id FROM chunk_tombstones)"
+        ).fetchone()[0]
+
+    def size_bytes(self) -> int:
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
@@ -0,0 +1,106 @@
+import hashlib
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..core.config import settings
+
+# Word shingles hashed into the 64-bit SimHash; near-duplicates differ in at
+# most DEDUP_MAX_DISTANCE bits. Splitting the fingerprint into four 16-bit
+# bands means any match within 3 bits shares at least one band exactly,
+# which is what the chunk store indexes.
+SHINGLE_WORDS = 3
+BANDS = 4
+BAND_BITS = 64 // BANDS
+
+_WORD = re.compile(r"\w+")
+_BIT_POSITIONS = np.arange(64, dtype=np.uint64)
+
+Fingerprint = Tuple[bytes, int]  # (exact digest, simhash)
+
+
+def normalize(text: str) -> str:
+    return " ".join(_WORD.findall(text.lower()))
+
+
+def content_digest(normalized: str) -> bytes:
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).digest()
+
+
+def simhash(normalized: str) -> int:
+    """64-bit SimHash over word shingles (unsigned)."""
+    words = normalized.split()
+    if len(words) < SHINGLE_WORDS:
+        shingles = [normalized] if normalized else []
+    else:
+        shingles = [" ".join(words[i:i + SHINGLE_WORDS])
+                    for i in range(len(words) - SHINGLE_WORDS + 1)]
+    if not shingles:
+        return 0
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little")
+         for s in shingles], dtype=np.uint64)
+    bits = (hashes[:, None] >> _BIT_POSITIONS) & np.uint64(1)
+    votes = 2 * bits.sum(axis=0, dtype=np.int64) - len(shingles)
+    return sum(1 << int(i) for i in np.flatnonzero(votes > 0))
+
+
+def fingerprint(text: str) -> Fingerprint:
+    normalized = normalize(text)
+    return content_digest(normalized), simhash(normalized)
+
+
+def bands(value: int) -> List[int]:
+    mask = (1 << BAND_BITS) - 1
+    return [(value >> (band * BAND_BITS)) & mask for band in range(BANDS)]
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def to_signed(value: int) -> int:
+    """SQLite integers are signed 64-bit."""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def to_unsigned(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+def find_duplicates(texts: Sequence[str], chunks=None, exclude_doc_id: Optional[int] = None,
+                    max_distance: Optional[int] = None) -> Dict[int, int]:
+    """Maps positions of duplicate chunks to the chunk id or position they duplicate.
+
+    Values >= 0 are ids of chunks already stored in ``chunks`` (a
+    ``ChunkStore``, optional); values < 0 encode an earlier position in
+    ``texts`` as ``-(position + 1)``. Chunks referenced only by
+    ``exclude_doc_id`` are ignored, so re-ingesting a document does not
+    match its own previous version.
+    """
+    max_distance = settings.DEDUP_MAX_DISTANCE if max_distance is None else max_distance
+    seen_digests: Dict[bytes, int] = {}
+    seen_bands: Dict[Tuple[int, int], List[int]] = {}
+    prints = [fingerprint(text) for text in texts]
+    duplicates: Dict[int, int] = {}
+    for position, (digest, value) in enumerate(prints):
+        # Within the document first: repeated headers, boilerplate.
+        earlier = seen_digests.get(digest)
+        if earlier is None and max_distance:
+            candidates = {p for band, b in enumerate(bands(value))
+                          for p in seen_bands.get((band, b), ())}
+            earlier = next((p for p in sorted(candidates)
+                            if hamming(prints[p][1], value) <= max_distance), None)
+        if earlier is not None:
+            duplicates[position] = -(earlier + 1)
+            continue
+        if chunks is not None:
+            match = chunks.find_duplicate(digest, value, max_distance, exclude_doc_id)
+            if match is not None:
+                duplicates[position] = match
+                continue
+        seen_digests[digest] = position
+        for band, b in enumerate(bands(value)):
+            seen_bands.setdefault((band, b), []).append(position)
+    return duplicates
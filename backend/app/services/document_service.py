@@ -2,13 +2,16 @@ from sqlalchemy.orm import Session
 from fastapi import UploadFile
 import shutil
 import os
-from typing import List, Optional, Tuple
-import pymupdf
+from typing import Callable, List, Optional, Tuple
+from . import extractors
 from ..core.config import settings
 from ..core import database as db_core
 from ..models import schemas
 from backend.app.models.schemas import DocumentCreate
 from backend.app.core.database import Document
+from ..core.logging_config import get_logger
+
+logger = get_logger("document_service")
 
 
 def save_uploaded_file(upload_file: UploadFile, destination: str) -> None:
@@ -20,31 +23,24 @@ def save_uploaded_file(upload_file: UploadFile, destination: str) -> None:
         upload_file.file.close()
 
 
-def extract_text_from_file(filepath: str) -> str:
-    """Extracts text content from PDF, DOCX, or TXT files."""
-    _, file_extension = os.path.splitext(filepath)
-    text = ""
+def extract_text_from_file(filepath: str, on_page: Optional[Callable[[int, int], None]] = None) -> str:
+    """Extracts text content from PDF, DOCX, or TXT files.
 
+    ``on_page(pages_done, page_count)`` is called after each PDF page. Use
+    ``extractors.iter_text`` to stream large documents instead.
+    """
+    try:
+        extractor = extractors.get_extractor(filepath)
+    except ValueError:
+        logger.warning("Unsupported file type for text extraction: %s",
+                       os.path.splitext(filepath)[1])
+        raise
     try:
-        if file_extension.lower() == ".pdf":
-            doc = pymupdf.open(filepath)
-            for page in doc:
-                text += page.get_text()
-            doc.close()
-        # elif file_extension.lower() in [".docx", ".txt"]:
-        #     # Use unstructured for DOCX and TXT
-        #     elements = partition(filename=filepath)
-        #     text = "\n\n".join([str(el) for el in elements])
-        else:
-            print(
-                f"Unsupported file type for text extraction: {file_extension}")
-            raise ValueError(f"Unsupported file type: {file_extension}")
+        return "".join(extractor(filepath, on_page=on_page))
     except Exception as e:
-        print(f"Error extracting text from {filepath}: {e}")
+        logger.error("Error extracting text from %s: %s", filepath, e)
         raise
 
-    return text
-
 
 def create_document_record(db: Session, doc: schemas.DocumentCreate) -> db_core.Document:
     """Creates a document record in the database."""
@@ -67,17 +63,24 @@ def get_document(db: Session, doc_id: int) -> Optional[db_core.Document]:
 
 
 def delete_document_record(db: Session, doc_id: int) -> Tuple[Optional[db_core.Document], Optional[str]]:
-    """Deletes a document record and its associated file."""
+    """Deletes a document record and its associated file.
+
+    The file is removed only once the deletion is committed.
+    """
     db_doc = get_document(db, doc_id)
     if db_doc:
+        # Tables created before the FK cascaded still need this.
+        db.query(db_core.DocumentAccessLog)\
+            .filter(db_core.DocumentAccessLog.document_id == doc_id)\
+            .delete(synchronize_session=False)
+        db.delete(db_doc)
+        db.commit()
         file_deletion_error = None
         if os.path.exists(db_doc.filepath):
             try:
                 os.remove(db_doc.filepath)
             except OSError as e:
                 file_deletion_error = f"Error deleting file {db_doc.filepath}: {e}"
-        db.delete(db_doc)
-        db.commit()
         return db_doc, file_deletion_error
     return None, None
 
@@ -0,0 +1,246 @@
+import hashlib
+import os
+import threading
+import time
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_huggingface.embeddings import HuggingFaceEmbeddings
+
+from ..core.config import settings
+from ..core.logging_config import get_logger
+
+logger = get_logger("embedding_backends")
+
+EMBEDDING_BACKENDS = ("torch", "onnx", "stub")
+
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_INT8_MODEL_FILE = "model.int8.onnx"
+
+
+def _num_threads() -> Optional[int]:
+    return settings.EMBEDDING_THREADS or None
+
+
+def _import_onnxruntime():
+    try:
+        import onnxruntime
+    except ImportError as e:
+        raise ImportError(
+            "The ONNX embedding backend needs onnxruntime: pip install onnxruntime") from e
+    return onnxruntime
+
+
+# --- Reference backend ---
+
+def create_torch_embeddings() -> HuggingFaceEmbeddings:
+    """Eager-mode PyTorch through sentence-transformers (the reference model)."""
+    threads = _num_threads()
+    if threads:
+        import torch
+        torch.set_num_threads(threads)
+    return HuggingFaceEmbeddings(
+        model_name=settings.EMBEDDING_MODEL_NAME,
+        # Trust remote code for Nomic
+        model_kwargs={'device': 'cpu', 'trust_remote_code': True},
+        encode_kwargs={'normalize_embeddings': True}
+    )
+
+
+# --- ONNX Runtime backend ---
+
+class OnnxEmbeddings(Embeddings):
+    """Runs an exported model with ONNX Runtime, mean pooling and L2 norm.
+
+    Mirrors the sentence-transformers pipeline of the reference model, so
+    vectors are interchangeable with ``create_torch_embeddings``.
+    """
+
+    def __init__(self, model_dir: str, quantized: bool = False, batch_size: int = 32):
+        ort = _import_onnxruntime()
+        from transformers import AutoTokenizer
+
+        model_file = os.path.join(
+            model_dir, ONNX_INT8_MODEL_FILE if quantized else ONNX_MODEL_FILE)
+        if not os.path.exists(model_file):
+            raise FileNotFoundError(
+                f"{model_file} not found. Export it with "
+                "'python -m backend.app.tools.embedding_bench export'.")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.inter_op_num_threads = 1
+        threads = _num_threads()
+        if threads:
+            options.intra_op_num_threads = threads
+        # Idle workers should not spin on cores the API threads need.
+        options.add_session_config_entry("session.intra_op.allow_spinning", "0")
+
+        self.session = ort.InferenceSession(
+            model_file, options, providers=["CPUExecutionProvider"])
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.batch_size = batch_size
+        self.model_file = model_file
+
+    def _embed(self, texts: Sequence[str]) -> np.ndarray:
+        out = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = self.tokenizer(
+                list(texts[start:start + self.batch_size]),
+                padding=True,
+                truncation=True,
+                max_length=settings.EMBEDDING_MAX_LENGTH,
+                return_tensors="np",
+            )
+            feeds = {name: batch[name].astype(np.int64)
+                     for name in self.input_names if name in batch}
+            hidden = self.session.run(None, feeds)[0]
+            mask = batch["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / \
+                np.clip(mask.sum(axis=1), 1e-9, None)
+            out.append(pooled / np.linalg.norm(pooled, axis=1, keepdims=True))
+        return np.vstack(out) if out else np.zeros((0, 0), dtype=np.float32)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text])[0].tolist()
+
+
+def export_onnx(model_dir: str, quantize: bool = True, opset: int = 17) -> List[str]:
+    """Exports the reference model to ONNX (and optionally a dynamic int8 copy)."""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+    try:
+        import onnx  # noqa: F401  (torch.onnx.export writes through it)
+    except ImportError as e:
+        raise ImportError("Exporting to ONNX needs onnx: pip install onnx") from e
+    if quantize:
+        _import_onnxruntime()
+
+    os.makedirs(model_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(
+        settings.EMBEDDING_MODEL_NAME, trust_remote_code=True)
+    model = AutoModel.from_pretrained(
+        settings.EMBEDDING_MODEL_NAME, trust_remote_code=True).eval()
+    sample = tokenizer(["search_document: warm-up"], return_tensors="pt")
+    input_names = [name for name in (
+        "input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    model_file = os.path.join(model_dir, ONNX_MODEL_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            model_file,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+        )
+    tokenizer.save_pretrained(model_dir)
+    written = [model_file]
+    logger.info("Exported ONNX embedding model", extra={"path": model_file})
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        int8_file = os.path.join(model_dir, ONNX_INT8_MODEL_FILE)
+        quantize_dynamic(model_file, int8_file, weight_type=QuantType.QInt8)
+        written.append(int8_file)
+        logger.info("Wrote int8 dynamically quantized model",
+                    extra={"path": int8_file})
+    return written
+
+
+# --- Load-test backend ---
+
+class StubEmbeddings(Embeddings):
+    """Model-free embeddings for load tests (see ``app.loadtest``).
+
+    Every text maps to a fixed random unit vector seeded by its hash, so
+    repeated texts embed identically but similarity carries no meaning.
+    ``seconds_per_text`` of sleep stands in for model compute.
+    """
+
+    def __init__(self, dim: int = 768, seconds_per_text: float = 0.0):
+        self.dim = dim
+        self.seconds_per_text = seconds_per_text
+
+    def _embed(self, texts: Sequence[str]) -> np.ndarray:
+        if self.seconds_per_text:
+            time.sleep(self.seconds_per_text * len(texts))
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            seed = int.from_bytes(hashlib.blake2b(
+                text.encode("utf-8"), digest_size=8).digest(), "little")
+            vector = np.random.default_rng(seed).standard_normal(self.dim)
+            out[row] = vector / np.linalg.norm(vector)
+        return out
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text])[0].tolist()
+
+
+# --- Verification and factory ---
+
+def cosine_agreement(reference: Embeddings, candidate: Embeddings, texts: List[str]) -> dict:
+    """Compares two backends on the same texts (vectors are L2-normalized)."""
+    ref = np.asarray(reference.embed_documents(texts), dtype=np.float32)
+    cand = np.asarray(candidate.embed_documents(texts), dtype=np.float32)
+    cosines = (ref * cand).sum(axis=1)
+    return {
+        "min_cosine": float(cosines.min()),
+        "mean_cosine": float(cosines.mean()),
+        "passed": bool(cosines.min() >= settings.EMBEDDING_MIN_COSINE),
+    }
+
+
+def create_embeddings(backend: Optional[str] = None) -> Embeddings:
+    """Builds the embedding backend selected by ``EMBEDDING_BACKEND``."""
+    backend = backend or settings.EMBEDDING_BACKEND
+    logger.info("Loading embedding backend", extra={
+                "backend": backend, "model": settings.EMBEDDING_MODEL_NAME})
+    if backend == "torch":
+        return create_torch_embeddings()
+    if backend == "onnx":
+        return OnnxEmbeddings(
+            settings.EMBEDDING_ONNX_DIR,
+            quantized=settings.EMBEDDING_ONNX_QUANTIZED,
+            batch_size=settings.EMBEDDING_BATCH_SIZE,
+        )
+    if backend == "stub":
+        return StubEmbeddings(settings.EMBEDDING_STUB_DIM, settings.EMBEDDING_STUB_SECONDS)
+    raise ValueError(
+        f"Unknown EMBEDDING_BACKEND '{backend}'. Expected one of {EMBEDDING_BACKENDS}.")
+
+
+class LazyEmbeddings(Embeddings):
+    """Defers building the embedding backend until the first embed call."""
+
+    def __init__(self, factory: Callable[[], Embeddings] = create_embeddings):
+        self._factory = factory
+        self._model: Optional[Embeddings] = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self) -> Embeddings:
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = self._factory()
+        return self._model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.model.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.model.embed_query(text)
@@ -0,0 +1,179 @@
+import csv
+import datetime
+import io
+import json
+from typing import Iterator, List, Optional, Sequence
+
+from sqlalchemy import select
+
+from ..core import database as db_core
+from ..core.config import settings
+from ..core.logging_config import get_logger
+
+logger = get_logger("export_service")
+
+EXPORT_FORMATS = ("ndjson", "csv", "parquet")
+
+EXPORT_TABLES = {
+    "query_logs": (
+        db_core.QueryLog,
+        ("id", "user_id", "query_text", "response_text",
+         "retrieved_context", "source_references", "timestamp"),
+        "timestamp",
+    ),
+    "feedback": (
+        db_core.Feedback,
+        ("id", "query_id", "rating", "comment", "created_at"),
+        "created_at",
+    ),
+}
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def columns_for(table: str) -> Sequence[str]:
+    return EXPORT_TABLES[table][1]
+
+
+def iter_row_batches(
+    table: str,
+    start: Optional[datetime.datetime] = None,
+    end: Optional[datetime.datetime] = None,
+    after_id: int = 0,
+) -> Iterator[List[tuple]]:
+    """Streams rows in id order through a server-side cursor.
+
+    Plain column tuples are read ``EXPORT_BATCH_SIZE`` at a time instead of
+    ORM objects, so memory stays flat however many rows match. Rows are
+    ordered by id: to resume an interrupted export, pass the id of the last
+    row received as ``after_id``.
+    """
+    model, columns, time_column = EXPORT_TABLES[table]
+    stmt = select(*(getattr(model, c) for c in columns))\
+        .where(model.id > after_id)\
+        .order_by(model.id)
+    if start is not None:
+        stmt = stmt.where(getattr(model, time_column) >= start)
+    if end is not None:
+        stmt = stmt.where(getattr(model, time_column) < end)
+
+    with db_core.SessionLocal() as db:
+        result = db.execute(stmt.execution_options(
+            stream_results=True, yield_per=settings.EXPORT_BATCH_SIZE))
+        for partition in result.partitions():
+            yield [tuple(row) for row in partition]
+
+
+# --- Encoders ---
+
+def _json_default(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_ndjson(columns: Sequence[str], batches: Iterator[List[tuple]]) -> Iterator[bytes]:
+    for batch in batches:
+        yield "".join(
+            json.dumps(dict(zip(columns, row)), default=_json_default) + "\n"
+            for row in batch
+        ).encode("utf-8")
+
+
+def encode_csv(columns: Sequence[str], batches: Iterator[List[tuple]], header: bool = True) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(columns)
+    for batch in batches:
+        writer.writerows(
+            [v.isoformat() if isinstance(v, datetime.datetime) else v for v in row]
+            for row in batch
+        )
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _DrainableSink:
+    """Write-only file object whose contents are handed out as they accumulate."""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def writable(self) -> bool:
+        return True
+
+    def drain(self) -> bytes:
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+
+def encode_parquet(table: str, batches: Iterator[List[tuple]]) -> Iterator[bytes]:
+    """Writes one Parquet row group per batch and streams the file bytes."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    model, columns, _ = EXPORT_TABLES[table]
+    schema = pa.schema([
+        (c, pa.timestamp("us") if isinstance(getattr(model, c).type, db_core.DateTime)
+         else pa.int64() if c.endswith("id") or c == "rating" else pa.string())
+        for c in columns
+    ])
+    sink = _DrainableSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for batch in batches:
+            arrays = [pa.array(list(values), type=field.type)
+                      for values, field in zip(zip(*batch), schema)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def export(
+    table: str,
+    fmt: str,
+    start: Optional[datetime.datetime] = None,
+    end: Optional[datetime.datetime] = None,
+    after_id: int = 0,
+    header: bool = True,
+) -> Iterator[bytes]:
+    """Encoded export stream of ``table`` in ``fmt``."""
+    if table not in EXPORT_TABLES:
+        raise ValueError(f"Unknown table '{table}'.")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown format '{fmt}'.")
+    logger.info("Starting export", extra={
+                "table": table, "format": fmt, "after_id": after_id})
+    batches = iter_row_batches(table, start, end, after_id)
+    if fmt == "ndjson":
+        return encode_ndjson(columns_for(table), batches)
+    if fmt == "csv":
+        return encode_csv(columns_for(table), batches, header=header)
+    return encode_parquet(table, batches)
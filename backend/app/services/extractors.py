@@ -0,0 +1,259 @@
+import codecs
+import mmap
+import os
+import re
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+from xml.etree.ElementTree import iterparse
+
+import pymupdf
+
+from ..core.config import settings
+from . import ocr
+
+# An extractor yields the document's text as consecutive segments (pages,
+# paragraphs or decoded blocks); concatenated, they form the full text.
+Extractor = Callable[..., Iterator[str]]
+PageCallback = Optional[Callable[[int, int], None]]
+
+_BY_EXTENSION: Dict[str, Extractor] = {}
+_BY_MIME: Dict[str, Extractor] = {}
+
+_TXT_BLOCK = 1 << 20  # bytes decoded per step
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def register_extractor(extensions: Iterable[str], mime_types: Iterable[str] = ()):
+    """Registers an extractor for file extensions (with dot) and MIME types."""
+    def decorator(func: Extractor) -> Extractor:
+        for ext in extensions:
+            _BY_EXTENSION[ext.lower()] = func
+        for mime in mime_types:
+            _BY_MIME[mime.lower()] = func
+        return func
+    return decorator
+
+
+def supported_extensions() -> List[str]:
+    return sorted(_BY_EXTENSION)
+
+
+def get_extractor(filepath: str, mime_type: Optional[str] = None) -> Extractor:
+    """Extractor for a file by extension, falling back to its MIME type."""
+    ext = os.path.splitext(filepath)[1].lower()
+    extractor = _BY_EXTENSION.get(ext) or _BY_MIME.get((mime_type or "").lower())
+    if extractor is None:
+        raise ValueError(f"Unsupported file type: {ext or mime_type}")
+    return extractor
+
+
+def iter_text(filepath: str, mime_type: Optional[str] = None, on_page: PageCallback = None) -> Iterator[str]:
+    return get_extractor(filepath, mime_type)(filepath, on_page=on_page)
+
+
+# --- Extractors ---
+
+@register_extractor([".pdf"], ["application/pdf"])
+def iter_pdf(filepath: str, on_page: PageCallback = None, ocr_stats: Optional[dict] = None) -> Iterator[str]:
+    """One segment per page; ``on_page(pages_done, page_count)`` after each.
+
+    Pages without a text layer (scans) are OCRed on the process pool while
+    later pages are still being read; segments are yielded in page order.
+    Pass ``ocr_stats`` (from ``ocr.new_stats()``) to see OCR failures, which
+    otherwise only yield empty pages.
+    """
+    pending: deque = deque()  # (page_index, text or Future) in page order
+    stats = ocr_stats if ocr_stats is not None else ocr.new_stats()
+    window = max(settings.OCR_WORKERS * 2, 1)
+
+    def resolve(item) -> str:
+        index, value = item
+        if isinstance(value, Future):
+            return ocr.collect(value, filepath, index, stats)
+        return value
+
+    with pymupdf.open(filepath) as doc:
+        page_count = doc.page_count
+        for index, page in enumerate(doc):
+            text = page.get_text()
+            if settings.OCR_ENABLED and ocr.needs_ocr(text, page):
+                pending.append((index, ocr.submit_page(filepath, index)))
+            else:
+                pending.append((index, text))
+            # Emit what is ready; block only when too many OCR pages are queued.
+            while pending and (not isinstance(pending[0][1], Future)
+                               or pending[0][1].done() or len(pending) > window):
+                item = pending.popleft()
+                yield resolve(item)
+                if on_page:
+                    on_page(item[0] + 1, page_count)
+    while pending:
+        item = pending.popleft()
+        yield resolve(item)
+        if on_page:
+            on_page(item[0] + 1, page_count)
+    ocr.log_stats(filepath, stats)
+
+
+def _detect_encoding(head: bytes) -> str:
+    if head.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    return "utf-8"
+
+
+@register_extractor([".txt", ".text", ".md"], ["text/plain", "text/markdown"])
+def iter_txt(filepath: str, on_page: PageCallback = None) -> Iterator[str]:
+    """Decodes a memory-mapped file incrementally in 1 MiB blocks.
+
+    Multi-byte characters split across blocks are handled by the
+    incremental decoder; undecodable bytes are replaced, not fatal.
+    """
+    if os.path.getsize(filepath) == 0:
+        return
+    with open(filepath, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        decoder = codecs.getincrementaldecoder(
+            _detect_encoding(data[:4]))(errors="replace")
+        for start in range(0, len(data), _TXT_BLOCK):
+            text = decoder.decode(data[start:start + _TXT_BLOCK])
+            if text:
+                yield text
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+
+
+@register_extractor(
+    [".docx"],
+    ["application/vnd.openxmlformats-officedocument.wordprocessingml.document"],
+)
+def iter_docx(filepath: str, on_page: PageCallback = None) -> Iterator[str]:
+    """Streams ``word/document.xml`` with iterparse, one segment per paragraph.
+
+    Parsed elements are cleared as soon as their paragraph is emitted, so
+    memory does not grow with the document.
+    """
+    with zipfile.ZipFile(filepath) as archive, archive.open("word/document.xml") as xml:
+        parts: List[str] = []
+        for event, elem in iterparse(xml, events=("end",)):
+            tag = elem.tag
+            if tag == _W_NS + "t":
+                parts.append(elem.text or "")
+            elif tag == _W_NS + "tab":
+                parts.append("\t")
+            elif tag in (_W_NS + "br", _W_NS + "cr"):
+                parts.append("\n")
+            elif tag == _W_NS + "p":
+                yield "".join(parts) + "\n"
+                parts.clear()
+                elem.clear()
+            elif tag == _W_NS + "body":
+                elem.clear()
+        if parts:
+            yield "".join(parts)
+
+
+# --- Streaming chunking ---
+
+class TimedSegments:
+    """Wraps a segment stream and accumulates the time spent producing it."""
+
+    def __init__(self, segments: Iterable[str]):
+        self._segments = iter(segments)
+        self.elapsed = 0.0
+
+    def __iter__(self) -> "TimedSegments":
+        return self
+
+    def __next__(self) -> str:
+        start = time.perf_counter()
+        try:
+            return next(self._segments)
+        finally:
+            self.elapsed += time.perf_counter() - start
+
+
+def iter_chunks(segments: Iterable[str], splitter, window: Optional[int] = None) -> Iterator[str]:
+    """Chunks a segment stream without holding the whole document.
+
+    Segments are joined as they come and buffered up to ``window``
+    characters (default 8 chunks' worth), then split; the chunks that start
+    before a cut point are emitted and the raw buffer is cut back to it (see
+    ``_cut``). The result matches ``splitter.split_text("".join(segments))``
+    as long as each buffer holds a few chunks and splits on the same
+    top-level separator as the full text; when it does not (a single
+    paragraph longer than the window), the buffer is cut at its last chunk
+    and the chunks around the cut may differ in where their overlap falls.
+    """
+    window = window or splitter._chunk_size * 8
+    buffer = ""
+    for segment in segments:
+        buffer += segment
+        if len(buffer) < window:
+            continue
+        chunks = splitter.split_text(buffer)
+        if len(chunks) < 2:
+            continue
+        starts = _chunk_starts(buffer, splitter, chunks)
+        cut = _cut(splitter, buffer, starts)
+        ready = sum(1 for start in starts if start < cut)
+        if not ready:
+            cut, ready = starts[-1], len(chunks) - 1
+        yield from chunks[:ready]
+        buffer = buffer[cut:]
+    if buffer.strip():
+        yield from splitter.split_text(buffer)
+
+
+def _chunk_starts(buffer: str, splitter, chunks: List[str]) -> List[int]:
+    """Offsets of the (whitespace-stripped) chunks in the raw buffer.
+
+    A chunk overlaps the one before it by at most the chunk overlap and
+    always reaches past its end; a short chunk's text can also occur
+    earlier, inside the chunk before it, so such matches are skipped.
+    """
+    starts = []
+    start = end = 0
+    for chunk in chunks:
+        found = buffer.find(chunk, max(end - splitter._chunk_overlap, start))
+        while 0 <= found and found + len(chunk) <= end:
+            found = buffer.find(chunk, found + 1)
+        start = found if found >= 0 else start
+        end = max(start + len(chunk), end)
+        starts.append(start)
+    return starts
+
+
+def _cut(splitter, buffer: str, starts: List[int]) -> int:
+    """Where to cut ``buffer`` so that splitting the rest again changes nothing.
+
+    RecursiveCharacterTextSplitter splits on the first of its separators
+    that occurs in the text, greedily merges the resulting top-level splits
+    into overlapping chunks, and recurses into splits longer than a chunk,
+    which also ends the merge. The buffer's last split may continue in the
+    next segment, so only the chunks before it are settled:
+
+    * the end of the last long split before the last chunk is a clean cut;
+    * otherwise the next-to-last chunk starts on a split boundary with the
+      merge in the same state as for the full text, as the split that closed
+      the chunk before it was complete.
+    """
+    for separator in splitter._separators:
+        if separator == "":
+            return starts[-1]
+        pattern = separator if splitter._is_separator_regex else re.escape(separator)
+        if re.search(pattern, buffer):
+            break
+    else:
+        return starts[-1]
+    end = splitter._keep_separator == "end"
+    bounds = [0] + [m.end() if end else m.start() for m in re.finditer(pattern, buffer)]
+    settled = [b for b in bounds if b <= starts[-1]]
+    for begin, finish in zip(reversed(settled[:-1]), reversed(settled[1:])):
+        if splitter._length_function(buffer[begin:finish]) >= splitter._chunk_size:
+            return finish
+    return max(b for b in bounds if b <= starts[-2])
@@ -0,0 +1,285 @@
+import fcntl
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional
+
+from ..core import metrics
+from ..core.config import settings
+from ..core.logging_config import get_logger
+from .sharded_index import AnyVectorIndex, ShardedVectorIndex, conform, load_vector_index
+from .vector_store import INDEX_FILE, VectorIndex
+
+logger = get_logger("index_generations")
+
+GENERATIONS_DIR = "generations"
+CURRENT_FILE = "CURRENT"
+LOCK_FILE = "LOCK"
+# Stores rebuilt from scratch (tools.reindex) get their own chunk store and
+# vector file under STORES_DIR; a generation built on one names it, relative
+# to the root, in its DATA file. Without one the data lives in the root.
+STORES_DIR = "stores"
+DATA_FILE = "DATA"
+
+
+class IndexRebuilt(RuntimeError):
+    """The store being published was cloned from an index that has since been rebuilt."""
+
+
+class IndexGeneration:
+    """An immutable snapshot of the vector index.
+
+    Nothing mutates ``store.index`` once a generation is published; ingestion
+    works on a clone that becomes the next generation.
+    """
+
+    __slots__ = ("id", "store")
+
+    def __init__(self, generation_id: int, store: AnyVectorIndex):
+        self.id = generation_id
+        self.store = store
+
+
+class GenerationManager:
+    """Publishes index generations with atomic swaps.
+
+    Queries call ``current()`` once and use that snapshot throughout, so
+    they never wait on ingestion. Builders are serialized, within and
+    across processes, by a thread lock plus an ``flock`` on ``LOCK``; they
+    clone the generation named on disk, and swap the result in when it is
+    persisted. The ``CURRENT`` file names the active generation on disk and
+    is what other worker processes poll to pick up swaps.
+    """
+
+    def __init__(self, root: str,
+                 tierer: Optional[Callable[[AnyVectorIndex, str, str], AnyVectorIndex]] = None):
+        self.root = root
+        # Optional hook turning a loaded or published store into the object
+        # that serves queries (see tiering.tier_store).
+        self._tierer = tierer
+        self._current: Optional[IndexGeneration] = None
+        self._build_lock = threading.RLock()
+        self._lock_file = None
+        self._lock_depth = 0
+        self._refresh_lock = threading.Lock()
+        self._checked_at = 0.0
+        self._disk_generation: Optional[int] = None
+        self._swap_listeners: List[Callable[[IndexGeneration], None]] = []
+
+    # --- Paths ---
+
+    def _generation_dir(self, generation_id: int) -> str:
+        return os.path.join(self.root, GENERATIONS_DIR, str(generation_id))
+
+    def _current_file(self) -> str:
+        return os.path.join(self.root, CURRENT_FILE)
+
+    def _data_path(self, directory: str) -> str:
+        """The directory holding the chunk store and vectors of a generation."""
+        try:
+            with open(os.path.join(directory, DATA_FILE)) as f:
+                return os.path.join(self.root, f.read().strip())
+        except FileNotFoundError:
+            return self.root
+
+    def new_store_path(self) -> str:
+        """A fresh, empty data directory for a store built from scratch."""
+        path = os.path.join(self.root, STORES_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}")
+        os.makedirs(path)
+        return path
+
+    def _read_current_id(self) -> Optional[int]:
+        try:
+            with open(self._current_file()) as f:
+                return int(f.read().strip())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write_current_id(self, generation_id: int) -> None:
+        tmp = self._current_file() + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(str(generation_id))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._current_file())
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Holds the build lock of this process and the file lock shared with others.
+
+        Re-entrant within a thread: ``build_next`` publishes while holding it.
+        """
+        with self._build_lock:
+            if self._lock_depth == 0:
+                os.makedirs(self.root, exist_ok=True)
+                self._lock_file = open(os.path.join(self.root, LOCK_FILE), "a")
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+                    self._lock_file.close()
+                    self._lock_file = None
+
+    # --- Reads ---
+
+    def current(self) -> Optional[IndexGeneration]:
+        """The active snapshot; reloads if another process published a newer one."""
+        now = time.monotonic()
+        if now - self._checked_at >= settings.INDEX_GENERATION_POLL_SECONDS:
+            self._checked_at = now
+            disk_id = self._read_current_id()
+            if disk_id is not None and disk_id != self._disk_generation:
+                self._load(disk_id)
+            elif disk_id is None and self._current is None:
+                self._adopt_unversioned_store()
+        return self._current
+
+    def _load(self, generation_id: int) -> None:
+        with self._refresh_lock:
+            if self._disk_generation == generation_id:
+                return
+            directory = self._generation_dir(generation_id)
+            store = self._serve(load_vector_index(self._data_path(directory), directory), directory)
+            self._swap(IndexGeneration(generation_id, store))
+            self._disk_generation = generation_id
+            logger.info("Loaded index generation", extra={
+                        "generation": generation_id, "vectors": store.ntotal})
+
+    def _adopt_unversioned_store(self) -> None:
+        """Moves an index written before generations existed into generation 1."""
+        with self._locked():
+            if self._read_current_id() is not None:
+                return
+            legacy_index = os.path.join(self.root, INDEX_FILE)
+            if not os.path.exists(legacy_index):
+                return
+            store = VectorIndex.load(self.root)
+            store.save(os.path.join(self._generation_dir(1), INDEX_FILE))
+            self._write_current_id(1)
+            os.remove(legacy_index)
+            store = self._serve(store, self._generation_dir(1))
+            self._swap(IndexGeneration(1, store))
+            self._disk_generation = 1
+
+    def add_swap_listener(self, callback: Callable[[IndexGeneration], None]) -> None:
+        """Calls ``callback(generation)`` after every swap; it must not block."""
+        self._swap_listeners.append(callback)
+
+    def _serve(self, store: AnyVectorIndex, directory: str) -> AnyVectorIndex:
+        return self._tierer(store, store.path, directory) if self._tierer else store
+
+    def _swap(self, generation: IndexGeneration) -> None:
+        self._current = generation  # a single reference assignment
+        metrics.INDEX_GENERATION.set(generation.id)
+        metrics.INDEX_VECTORS.set(generation.store.ntotal)
+        for callback in self._swap_listeners:
+            try:
+                callback(generation)
+            except Exception as e:
+                logger.warning("Index swap listener failed: %s", e)
+
+    # --- Writes ---
+
+    @contextmanager
+    def build_next(self, create: Callable[[], AnyVectorIndex]) -> Iterator[AnyVectorIndex]:
+        """Yields a private copy of the current index to modify.
+
+        On normal exit the copy is persisted as a new generation and swapped
+        in; if the block or the publish raises, it is discarded, along with
+        its chunk store writes. Once those are committed the generation is
+        published, and nothing after that fails the build. ``create`` builds
+        an empty store when there is no generation yet.
+        """
+        with self._locked():
+            # Another process may have published since the last poll.
+            self._checked_at = 0.0
+            base = self.current()
+            # A monolithic index is repartitioned once VECTOR_SHARDS > 1.
+            store = conform(base.store.clone()) if base else create()
+            store.chunks.begin()
+            try:
+                yield store
+                self._publish(store, rebuild=False)
+            except BaseException:
+                store.chunks.rollback()  # no-op if the publish committed
+                raise
+
+    def publish(self, store: AnyVectorIndex, rebuild: bool = False) -> IndexGeneration:
+        """Persists ``store`` as the next generation and makes it current.
+
+        ``rebuild`` marks a store built from scratch in ``new_store_path()``;
+        any other store must share its data directory with the generation on
+        disk, or ``IndexRebuilt`` is raised.
+        """
+        with self._locked():
+            return self._publish(store, rebuild)
+
+    def _publish(self, store: AnyVectorIndex, rebuild: bool) -> IndexGeneration:
+        disk_id = self._read_current_id()
+        data = os.path.relpath(store.path, self.root)
+        if not rebuild and disk_id is not None and os.path.abspath(store.path) != \
+                os.path.abspath(self._data_path(self._generation_dir(disk_id))):
+            raise IndexRebuilt(f"generation {disk_id} was rebuilt in another data directory")
+        generation_id = max(disk_id or 0, self._current.id if self._current else 0) + 1
+        with metrics.stage_timer("save", generation=generation_id):
+            directory = self._generation_dir(generation_id)
+            if isinstance(store, ShardedVectorIndex):
+                store.save(directory)  # rewrites only the modified shards
+            else:
+                store.save(os.path.join(directory, INDEX_FILE))
+            if data != os.curdir:
+                with open(os.path.join(directory, DATA_FILE), "w") as f:
+                    f.write(data)
+            # Chunk store changes become visible to served generations only
+            # now; the chunks this build released are tombstoned from here.
+            store.chunks.commit(generation_id)
+            self._write_current_id(generation_id)
+        # Published from here on: later failures are logged, not raised.
+        try:
+            served = self._serve(store, directory)
+        except Exception as e:
+            logger.error("Serving index generation %s untiered: %s", generation_id, e)
+            served = store
+        generation = IndexGeneration(generation_id, served)
+        self._swap(generation)
+        self._disk_generation = generation_id
+        logger.info("Published index generation", extra={
+                    "generation": generation_id, "vectors": store.ntotal})
+        try:
+            self._prune(generation_id, store)
+        except Exception as e:
+            logger.warning("Pruning index generations failed: %s", e)
+        return generation
+
+    def _prune(self, current_id: int, store: AnyVectorIndex) -> None:
+        """Deletes generation directories beyond the configured history.
+
+        Chunks released before the oldest kept generation are purged. A
+        rebuilt store's data directory goes with the last generation using
+        it; unreferenced ones (builds still running) are left alone.
+        """
+        base = os.path.join(self.root, GENERATIONS_DIR)
+        keep = max(settings.INDEX_GENERATIONS_KEEP, 1)
+        released, kept = set(), set()
+        for name in os.listdir(base):
+            if not name.isdigit():
+                continue
+            directory = os.path.join(base, name)
+            data = os.path.abspath(self._data_path(directory))
+            if int(name) <= current_id - keep:
+                released.add(data)
+                shutil.rmtree(directory, ignore_errors=True)
+            else:
+                kept.add(data)
+        purged = store.chunks.purge(current_id - keep + 1)
+        if purged:
+            logger.info("Purged released chunks", extra={"chunks": purged})
+        for data in released - kept - {os.path.abspath(self.root)}:
+            shutil.rmtree(data, ignore_errors=True)
+            logger.info("Deleted rebuilt store data", extra={"path": data})
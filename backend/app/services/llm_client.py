@@ -0,0 +1,192 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Union
+
+import httpx
+from langchain.docstore.document import Document as LangchainDocument
+from langchain_ollama import OllamaLLM
+
+from ..core import admission, metrics
+from ..core.config import settings
+from ..core.logging_config import get_logger
+
+logger = get_logger("llm_client")
+
+# --- Prompt layout ---
+#
+# Ollama reuses the KV cache of a slot for the longest prompt prefix it
+# shares with the previous request, so everything that never changes comes
+# first, byte for byte, and the per-query context and question come last.
+# The warm-up ping sends exactly PROMPT_PREFIX.
+
+RAG_INSTRUCTIONS = (
+    "You answer questions about internal documents. Use only the context "
+    "passages below. If they do not contain the answer, say that you don't "
+    "know; do not make up an answer. Keep the answer concise and name the "
+    "passage it comes from when that helps.\n\n"
+)
+PROMPT_PREFIX = RAG_INSTRUCTIONS + "Context:\n"
+
+
+def build_prompt(question: str, source_docs: List[LangchainDocument]) -> str:
+    context = "\n\n".join(doc.page_content for doc in source_docs)
+    return f"{PROMPT_PREFIX}{context}\n\nQuestion: {question}\nAnswer:"
+
+
+# --- Client ---
+
+def keep_alive() -> Union[int, str]:
+    """OLLAMA_KEEP_ALIVE as Ollama expects it: seconds as a number, else a duration string."""
+    value = settings.OLLAMA_KEEP_ALIVE.strip()
+    return int(value) if value.lstrip("-").isdigit() else value
+
+
+def _options() -> dict:
+    # Warm-up and generation must agree on num_ctx, or Ollama reloads the model.
+    options = {"num_ctx": settings.OLLAMA_NUM_CTX}
+    if settings.OLLAMA_NUM_PREDICT:
+        options["num_predict"] = settings.OLLAMA_NUM_PREDICT
+    return options
+
+
+def create_llm() -> OllamaLLM:
+    """The shared Ollama client: one pooled keep-alive HTTP connection set per process."""
+    pool = settings.OLLAMA_POOL_SIZE
+    return OllamaLLM(
+        model=settings.OLLAMA_MODEL,
+        base_url=settings.OLLAMA_BASE_URL,
+        keep_alive=keep_alive(),
+        num_ctx=settings.OLLAMA_NUM_CTX,
+        num_predict=settings.OLLAMA_NUM_PREDICT or None,
+        client_kwargs={
+            "timeout": settings.OLLAMA_TIMEOUT,
+            "limits": httpx.Limits(max_connections=pool, max_keepalive_connections=pool),
+        },
+    )
+
+
+llm = create_llm()
+_last_used = {"at": 0.0}
+_stream_pool = ThreadPoolExecutor(
+    max_workers=settings.OLLAMA_POOL_SIZE, thread_name_prefix="rag-llm-stream")
+_DONE = object()
+
+
+def stream(prompt: str) -> Iterator[str]:
+    """Streams tokens from the model; raises DeadlineExceeded when the request's budget runs out."""
+    if admission.remaining() is None:
+        yield from _timed_stream(prompt)
+    else:
+        yield from _stream_until_deadline(prompt)
+
+
+def _stream_until_deadline(prompt: str) -> Iterator[str]:
+    # Tokens are pulled on a helper thread so that waiting for Ollama (queued
+    # behind other requests, or before the first token) is bounded too. The
+    # helper stops, closing the HTTP stream, at its next token.
+    tokens: queue.Queue = queue.Queue()
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for token in _timed_stream(prompt):
+                if stop.is_set():
+                    break
+                tokens.put(token)
+            tokens.put(_DONE)
+        except BaseException as e:
+            tokens.put(e)
+
+    _stream_pool.submit(produce)
+    try:
+        while True:
+            try:
+                item = tokens.get(timeout=max(admission.remaining(), 0.0))
+            except queue.Empty:
+                admission.check_deadline("generate")
+                continue
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+
+def _timed_stream(prompt: str) -> Iterator[str]:
+    """Streams tokens from the model, recording time to first token and generation rate."""
+    _last_used["at"] = time.monotonic()
+    start = time.perf_counter()
+    first = None
+    tokens = 0
+    for token in llm.stream(prompt):
+        if first is None:
+            first = time.perf_counter() - start
+            metrics.LLM_TIME_TO_FIRST_TOKEN.observe(first)
+        tokens += 1
+        yield token
+    elapsed = time.perf_counter() - start
+    _last_used["at"] = time.monotonic()
+    metrics.LLM_TOKENS.inc(tokens)
+    if first is not None and tokens > 1 and elapsed > first:
+        metrics.LLM_TOKENS_PER_SECOND.observe((tokens - 1) / (elapsed - first))
+
+
+# --- Warm-up ---
+
+_ping_client: Optional[httpx.Client] = None
+
+
+def ping(reason: str) -> Optional[float]:
+    """Loads the model (if unloaded) and primes the prompt prefix; returns seconds taken."""
+    global _ping_client
+    if _ping_client is None:
+        _ping_client = httpx.Client(base_url=settings.OLLAMA_BASE_URL, timeout=settings.OLLAMA_TIMEOUT)
+    start = time.perf_counter()
+    try:
+        response = _ping_client.post("/api/generate", json={
+            "model": settings.OLLAMA_MODEL,
+            "prompt": PROMPT_PREFIX,
+            "stream": False,
+            "keep_alive": keep_alive(),
+            "options": {**_options(), "num_predict": 1},
+        })
+        response.raise_for_status()
+        load_duration = response.json().get("load_duration") or 0
+    except (httpx.HTTPError, ValueError, AttributeError) as e:
+        metrics.LLM_WARMUPS.labels("error").inc()
+        logger.warning("LLM warm-up ping failed: %s", e)
+        return None
+    seconds = time.perf_counter() - start
+    _last_used["at"] = time.monotonic()
+    metrics.LLM_WARMUPS.labels("ok").inc()
+    logger.info("LLM warm-up ping", extra={
+        "reason": reason, "seconds": round(seconds, 3),
+        "load_seconds": round(load_duration / 1e9, 3)})
+    return seconds
+
+
+def start_warmup_job() -> Optional[threading.Thread]:
+    """Pings at startup, then whenever the model sat idle for OLLAMA_WARMUP_SECONDS (0 disables).
+
+    Keep the interval below OLLAMA_KEEP_ALIVE so bursts never find the model
+    unloaded.
+    """
+    interval = settings.OLLAMA_WARMUP_SECONDS
+    if interval <= 0:
+        return None
+
+    def loop():
+        ping("startup")
+        while True:
+            stop.wait(interval)
+            if time.monotonic() - _last_used["at"] >= interval:
+                ping("idle")
+
+    stop = threading.Event()
+    thread = threading.Thread(target=loop, name="rag-llm-warmup", daemon=True)
+    thread.start()
+    return thread
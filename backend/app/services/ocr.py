@@ -0,0 +1,122 @@
+import hashlib
+import multiprocessing
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Optional, Tuple
+
+import pymupdf
+
+from ..core import metrics
+from ..core.config import settings
+from ..core.logging_config import get_logger
+
+logger = get_logger("ocr")
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def needs_ocr(page_text: str, page) -> bool:
+    """True for pages that render content but carry (almost) no text layer."""
+    if len(page_text.strip()) >= settings.OCR_MIN_CHARS:
+        return False
+    return bool(page.get_images(full=False))
+
+
+# --- Worker side (runs in the process pool) ---
+
+def _cache_path(cache_dir: str, digest: str) -> str:
+    return os.path.join(cache_dir, digest[:2], digest + ".txt.z")
+
+
+def ocr_page(filepath: str, page_index: int, dpi: int, language: str, cache_dir: str) -> Tuple[str, bool, float]:
+    """OCRs one page; returns (text, served_from_cache, seconds).
+
+    The page is rendered once; the hash of the rendered pixels keys the
+    cache, so re-ingesting the same scan (under any filename) never runs
+    tesseract again.
+    """
+    start = time.perf_counter()
+    with pymupdf.open(filepath) as doc:
+        pixmap = doc[page_index].get_pixmap(dpi=dpi)
+    digest = hashlib.sha256(
+        f"{dpi}:{language}:{pixmap.width}x{pixmap.height}:".encode() + pixmap.samples
+    ).hexdigest()
+    path = _cache_path(cache_dir, digest)
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return zlib.decompress(f.read()).decode("utf-8"), True, time.perf_counter() - start
+
+    with pymupdf.open("pdf", pixmap.pdfocr_tobytes(language=language)) as ocr_doc:
+        text = ocr_doc[0].get_text()
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(zlib.compress(text.encode("utf-8")))
+    os.replace(tmp, path)
+    return text, False, time.perf_counter() - start
+
+
+# --- Caller side ---
+
+def get_pool() -> ProcessPoolExecutor:
+    """The shared OCR process pool, created on first use.
+
+    Workers are spawned rather than forked so they never inherit the API
+    process's threads or locks.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.OCR_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def submit_page(filepath: str, page_index: int) -> Future:
+    return get_pool().submit(
+        ocr_page, filepath, page_index, settings.OCR_DPI,
+        settings.OCR_LANGUAGE, settings.OCR_CACHE_DIR)
+
+
+def collect(future: Future, filepath: str, page_index: int, stats: dict) -> str:
+    """Waits for an OCR result and records it in metrics and ``stats``."""
+    try:
+        text, cached, seconds = future.result()
+    except Exception as e:
+        logger.error("OCR failed for page %s of %s: %s",
+                     page_index + 1, filepath, e)
+        metrics.OCR_PAGES.labels("error").inc()
+        stats["errors"] += 1
+        return ""
+    metrics.OCR_PAGES.labels("cache_hit" if cached else "ocr").inc()
+    if not cached:
+        metrics.OCR_PAGE_SECONDS.observe(seconds)
+        stats["seconds"] += seconds
+    stats["cached" if cached else "ocr"] += 1
+    return text
+
+
+def new_stats() -> dict:
+    return {"ocr": 0, "cached": 0, "errors": 0, "seconds": 0.0, "started": time.perf_counter()}
+
+
+def log_stats(filepath: str, stats: dict) -> None:
+    pages = stats["ocr"] + stats["cached"] + stats["errors"]
+    if not pages:
+        return
+    wall = time.perf_counter() - stats["started"]
+    logger.info("OCR finished", extra={
+        "path": filepath,
+        "ocr_pages": stats["ocr"],
+        "cache_hits": stats["cached"],
+        "ocr_errors": stats["errors"],
+        "pages_per_second": round(pages / wall, 2) if wall else None,
+        "ocr_cpu_seconds": round(stats["seconds"], 2),
+    })
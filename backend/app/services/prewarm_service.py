@@ -0,0 +1,123 @@
+import datetime
+import threading
+import time
+from typing import List, Optional
+
+from sqlalchemy import desc, func
+from sqlalchemy.orm import Session
+
+from ..core import database as db_core
+from ..core.config import settings
+from ..core.logging_config import get_logger
+from ..core.metrics import stage_timer
+from . import qa_service
+
+logger = get_logger("prewarm_service")
+
+# Set once the startup prewarm has finished (or given up); /ready waits on it.
+ready = threading.Event()
+
+_swap_pending = threading.Event()
+
+
+def top_questions(db: Session, limit: int, lookback_days: Optional[int] = None) -> List[str]:
+    """Most frequently asked questions in the lookback window, most recent first on ties."""
+    lookback_days = settings.PREWARM_LOOKBACK_DAYS if lookback_days is None else lookback_days
+    since = datetime.datetime.utcnow() - datetime.timedelta(days=lookback_days)
+    asked = func.count(db_core.QueryLog.id)
+    rows = db.query(db_core.QueryLog.query_text)\
+        .filter(db_core.QueryLog.timestamp >= since)\
+        .filter(db_core.QueryLog.is_error.is_(False))\
+        .group_by(db_core.QueryLog.query_text)\
+        .order_by(desc(asked), desc(func.max(db_core.QueryLog.timestamp)))\
+        .limit(limit)\
+        .all()
+    return [text for text, in rows if text and text.strip()]
+
+
+def prewarm(budget_seconds: Optional[float] = None, reason: str = "startup") -> dict:
+    """Warms the embedding, retrieval and answer caches for popular questions.
+
+    Every question gets its embedding and retrieval result cached; the first
+    PREWARM_ANSWERS also get an answer. Stops at the time budget, or when the
+    index is swapped underneath it (the swap schedules a fresh run).
+    """
+    generation = qa_service.retriever.current_generation()
+    if generation is None:
+        return {"reason": reason, "skipped": "no index"}
+    budget = settings.PREWARM_BUDGET_SECONDS if budget_seconds is None else budget_seconds
+    deadline = time.monotonic() + budget
+
+    with db_core.SessionLocal() as db:
+        questions = top_questions(db, settings.PREWARM_QUESTIONS)
+
+    def keep_going() -> bool:
+        return time.monotonic() < deadline \
+            and qa_service.retriever.current_generation() == generation
+
+    retrieved = answered = failed = 0
+    with stage_timer("prewarm", reason=reason, generation=generation):
+        for question in questions:
+            if not keep_going():
+                break
+            try:
+                qa_service.retrieve_documents(question, generation)
+                retrieved += 1
+            except Exception as e:
+                failed += 1
+                logger.warning("Prewarm retrieval failed: %s", e)
+        # Answers cost an LLM call each, so they come after the cheap pass.
+        for question in questions[:settings.PREWARM_ANSWERS]:
+            if not keep_going():
+                break
+            try:
+                docs = qa_service.retrieve_documents(question, generation)
+                qa_service.answer_question(question, generation, docs)
+                answered += 1
+            except Exception as e:
+                failed += 1
+                logger.warning("Prewarm answer failed: %s", e)
+
+    summary = {
+        "reason": reason,
+        "generation": generation,
+        "questions": len(questions),
+        "retrieved": retrieved,
+        "answered": answered,
+        "failed": failed,
+        "budget_exhausted": time.monotonic() >= deadline,
+    }
+    logger.info("Prewarm finished", extra=summary)
+    return summary
+
+
+def start_prewarm_job() -> Optional[threading.Thread]:
+    """Prewarms in the background at startup, then again after each index swap.
+
+    Swaps are debounced by PREWARM_SWAP_DELAY_SECONDS so a burst of
+    ingestions triggers one run.
+    """
+    if not settings.PREWARM_ENABLED:
+        ready.set()
+        return None
+
+    def loop():
+        try:
+            prewarm(reason="startup")
+        except Exception as e:
+            logger.error("Startup prewarm failed: %s", e)
+        finally:
+            ready.set()
+        while True:
+            _swap_pending.wait()
+            time.sleep(settings.PREWARM_SWAP_DELAY_SECONDS)
+            _swap_pending.clear()
+            try:
+                prewarm(reason="index_swap")
+            except Exception as e:
+                logger.error("Prewarm after index swap failed: %s", e)
+
+    qa_service.retriever.add_swap_listener(lambda generation: _swap_pending.set())
+    thread = threading.Thread(target=loop, name="rag-prewarm", daemon=True)
+    thread.start()
+    return thread
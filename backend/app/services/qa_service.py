@@ -1,193 +1,397 @@
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import Optional, List, Tuple
-import os
-import redis
-import pickle
+from typing import NamedTuple, Optional, List, Tuple
+import hashlib
+import re
+import threading
+import time
 
 # Langchain components
-from langchain_community.vectorstores import FAISS
-from langchain_huggingface.embeddings import HuggingFaceEmbeddings
-from langchain_ollama import OllamaLLM
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.chains import RetrievalQA
 from langchain.docstore.document import Document as LangchainDocument  # Avoid name clash
 
 # Corrected import: Use db_core for models and SessionLocal
 from ..core import database as db_core
 from ..models import schemas  # Schemas are still in models directory
 from ..core.config import settings
+from ..core.logging_config import get_logger
+from ..core import metrics
+from ..core.metrics import stage_timer
+from ..core import admission
+from ..core.cache import LRUCache
+from ..core.events import broker
 # Import necessary functions
-from .document_service import extract_text_from_file
-from ..data_access import update_document_status, log_query, get_document
-
-# --- RAG Pipeline Components Initialization ---
-
-# 1. Embedding Model (Nomic Embed Text v1 via HuggingFace)
-embedding_model_name = "nomic-ai/nomic-embed-text-v1"
-embedding_encode_kwargs = {'normalize_embeddings': True}
-embeddings = HuggingFaceEmbeddings(
-    model_name=embedding_model_name,
-    # Trust remote code for Nomic
-    model_kwargs={'device': 'cpu', 'trust_remote_code': True},
-    encode_kwargs=embedding_encode_kwargs
+from . import artifacts, dedup, extractors, llm_client
+from .index_generations import IndexRebuilt
+from .sharded_index import AnyVectorIndex, create_vector_index
+from .retrieval import (
+    create_retriever, embed_query, embeddings, index_manager, load_vector_store,
+    vector_store_path,
 )
+from ..data_access import update_document_status, log_query, get_document
+from .. import data_access
 
-# 2. LLM (Mistral-7B via Ollama)
-llm = OllamaLLM(model="Llama3.1")  # Uses default localhost:11434
-
-# 3. Vector Store (FAISS)
-vector_store_path = os.path.join(settings.VECTOR_STORE_DIR, "faiss_index")
-vector_store: Optional[FAISS] = None
-
-redis_client = redis.StrictRedis(host='localhost', port=6379, db=0)
+logger = get_logger("qa_service")
 
+# --- RAG Pipeline Components Initialization ---
 
-def get_cached_embedding(query: str):
-    cached = redis_client.get(query)
-    if cached:
-        return pickle.loads(cached)
-    return None
+# 1. Embedding model and vector store (FAISS) live in the retrieval module,
+#    shared with the standalone retrieval service.
+# 2. LLM via Ollama: pooled client, keep-alive and warm-up in llm_client.
+llm = llm_client.llm
 
+# 3. Retrieval: in-process, or the retrieval service when RETRIEVAL_SERVICE_URL is set.
+retriever = create_retriever()
 
-def cache_embedding(query: str, embedding):
-    redis_client.set(query, pickle.dumps(embedding),
-                     ex=3600)  # Cache for 1 hour
+# In-process caches for repeated questions (warmed by prewarm_service).
+retrieval_cache = LRUCache("retrieval", settings.RETRIEVAL_CACHE_SIZE)
+answer_cache = LRUCache("answer", settings.ANSWER_CACHE_SIZE)
 
+text_splitter = RecursiveCharacterTextSplitter(
+    chunk_size=settings.CHUNK_SIZE,
+    chunk_overlap=settings.CHUNK_OVERLAP
+)
 
-def load_vector_store() -> Optional[FAISS]:
-    """Loads the FAISS vector store from the local path."""
-    global vector_store
-    if vector_store is None:
-        if os.path.exists(vector_store_path):
-            try:
-                print(f"Loading existing FAISS index from {vector_store_path}")
-                vector_store = FAISS.load_local(
-                    vector_store_path, embeddings, allow_dangerous_deserialization=True)
-                print("FAISS index loaded successfully.")
-            except Exception as e:
-                print(
-                    f"Error loading FAISS index: {e}. Will create a new one if documents are added.")
-                vector_store = None
-        else:
-            print(
-                f"FAISS index not found at {vector_store_path}. It will be created when documents are processed.")
-            vector_store = None
-    return vector_store
+# --- RAG Processing Functions ---
 
 
-load_vector_store()
+def schedule_document_processing(background_tasks, doc_id: int, user_id: Optional[int] = None) -> None:
+    """Queues a document for ingestion and tracks it in the queue depth gauge."""
+    metrics.INGEST_QUEUE_DEPTH.inc()
+    broker.publish(doc_id, "queued", 0.0, user_id=user_id)
+    background_tasks.add_task(process_and_embed_document, doc_id)
+    logger.info("Background task added for embedding document",
+                extra={"doc_id": doc_id})
 
-text_splitter = RecursiveCharacterTextSplitter(
-    chunk_size=1500,  # Larger chunks for fewer embeddings
-    chunk_overlap=200
-)
 
-# --- RAG Processing Functions ---
+# Times a document is redone after tools.reindex swaps in a rebuilt index
+# under it, before it is marked as failed.
+_REBUILD_RETRIES = 2
 
 
 def process_and_embed_document(doc_id: int):
     """Background task to extract text, chunk, embed, and add a document to the vector store."""
-    global vector_store
+    try:
+        for attempt in range(_REBUILD_RETRIES + 1):
+            if not _ingest_document(doc_id, retry=attempt < _REBUILD_RETRIES):
+                return
+    finally:
+        metrics.INGEST_QUEUE_DEPTH.dec()
+
+
+def _ingest_document(doc_id: int, retry: bool) -> bool:
+    """One ingestion attempt; True when it has to be redone on a rebuilt index."""
     db = next(db_core.get_db())  # Create a new database session
+    user_id = None
     try:
         doc_record = get_document(db, doc_id)
         if not doc_record:
-            print(f"Error: Document with ID {doc_id} not found in database.")
-            return
+            logger.error("Document with ID %s not found in database.", doc_id)
+            metrics.DOCUMENTS_PROCESSED.labels("missing").inc()
+            return False
 
-        print(
-            f"Processing document: {doc_record.original_filename} (ID: {doc_record.id})")
+        logger.info("Processing document",
+                    extra={"doc_id": doc_record.id, "document": doc_record.original_filename})
         update_document_status(db, doc_record.id, "processing")
-
-        # 1. Extract Text
-        print("Extracting text...")
-        text = extract_text_from_file(doc_record.filepath)
-        if not text:
-            raise ValueError("Extracted text is empty.")
-        print(f"Text extracted (length: {len(text)} characters).")
-
-        # 2. Chunk Text
-        print("Chunking text...")
-        chunks = text_splitter.split_text(text)
+        user_id = doc_record.uploaded_by_id
+
+        def progress(stage: str, percent: float, **detail) -> None:
+            broker.publish(doc_id, stage, percent, user_id=user_id, **detail)
+
+        # Progress bands: extract 0-30%, chunk 30-35%, embed 35-90%, index 90-100%.
+        # 1-2. Extract (or read back the stored extraction artifact) and
+        #      chunk as a stream; the full text is never held.
+        progress("extracting", 0.0)
+        segments = extractors.TimedSegments(artifacts.iter_text(
+            doc_record.filepath,
+            on_page=lambda done, total: progress(
+                "extracting", 30.0 * done / total, pages_extracted=done, pages_total=total),
+        ))
+        started = time.perf_counter()
+        chunks = list(extractors.iter_chunks(segments, text_splitter))
+        metrics.observe_stage("extract", segments.elapsed, doc_id=doc_id)
+        metrics.observe_stage(
+            "chunk", time.perf_counter() - started - segments.elapsed, doc_id=doc_id)
+        progress("chunking", 30.0)
         if not chunks:
-            raise ValueError("Text chunking resulted in no chunks.")
-        print(f"Text split into {len(chunks)} chunks.")
-
-        langchain_docs = [
-            LangchainDocument(
-                page_content=chunk,
-                metadata={
-                    "source": doc_record.original_filename,
-                    "doc_id": doc_record.id,
-                }
-            )
-            for chunk in chunks
+            raise ValueError("Extracted text is empty.")
+        logger.info("Text extracted and chunked", extra={
+                    "doc_id": doc_id, "chunks": len(chunks),
+                    "characters": sum(len(c) for c in chunks)})
+
+        metadatas = [
+            {
+                "source": doc_record.original_filename,
+                "doc_id": doc_record.id,
+            }
+            for _ in chunks
         ]
 
-        # 3. Embed and Store
-        print("Embedding chunks and updating vector store...")
-        if vector_store is None:
-            print("Creating new FAISS index.")
-            os.makedirs(settings.VECTOR_STORE_DIR, exist_ok=True)
-            vector_store = FAISS.from_documents(langchain_docs, embeddings)
-            vector_store.save_local(vector_store_path)
-            print(f"New FAISS index created and saved to {vector_store_path}.")
-        else:
-            vector_store.add_documents(langchain_docs)
-            vector_store.save_local(vector_store_path)  # Save updated index
-            print(
-                f"Added {len(langchain_docs)} chunks to existing FAISS index. Index saved.")
+        # 3. Drop near-duplicates before paying for their embeddings: copies
+        #    inside the document are skipped, copies of chunks other
+        #    documents already stored are linked to them.
+        duplicates = {}
+        if settings.DEDUP_ENABLED:
+            with stage_timer("dedup", doc_id=doc_id, chunks=len(chunks)):
+                current = index_manager.current()
+                duplicates = dedup.find_duplicates(
+                    chunks, current.store.chunks if current else None, exclude_doc_id=doc_id)
+        unique = [i for i in range(len(chunks)) if i not in duplicates]
+        new_chunks = [chunks[i] for i in unique]
+        new_metadatas = [metadatas[i] for i in unique]
+
+        # 4. Embed and Store
+        progress("embedding", 35.0, chunks_embedded=0, chunks_total=len(new_chunks))
+        vectors = []
+        started = time.perf_counter()
+        with stage_timer("embed", doc_id=doc_id, chunks=len(new_chunks)):
+            batch_size = settings.EMBED_PROGRESS_BATCH
+            for start in range(0, len(new_chunks), batch_size):
+                vectors.extend(embeddings.embed_documents(
+                    new_chunks[start:start + batch_size]))
+                progress("embedding", 35.0 + 55.0 * len(vectors) / len(new_chunks),
+                         chunks_embedded=len(vectors), chunks_total=len(new_chunks))
+        if new_chunks:
+            _embed_timing["per_chunk"] = (time.perf_counter() - started) / len(new_chunks)
+
+        # Built on a private copy of the index; queries keep using the
+        # current generation until the new one is saved and swapped in.
+        def create_store() -> AnyVectorIndex:
+            logger.info("Creating new FAISS index.")
+            return create_vector_index(vector_store_path, dim=len(vectors[0]))
+
+        progress("indexing", 90.0)
+        with index_manager.build_next(create_store) as store:
+            with stage_timer("index_add", doc_id=doc_id):
+                # A re-ingested document replaces its previous chunks.
+                store.remove_ids(store.chunks.release_document(doc_id))
+                if new_chunks:
+                    store.add(new_chunks, vectors, new_metadatas)
+                targets = sorted({t for t in duplicates.values() if t >= 0})
+                kept = set(store.chunks.link(
+                    targets, doc_id, doc_record.original_filename))
+                # Chunks deleted since the duplicate check must be stored after all.
+                lost = [i for i, t in duplicates.items() if t >= 0 and t not in kept]
+                if lost:
+                    store.add([chunks[i] for i in lost],
+                              embeddings.embed_documents([chunks[i] for i in lost]),
+                              [metadatas[i] for i in lost])
+        metrics.CHUNKS_EMBEDDED.inc(len(new_chunks))
+        logger.info("Chunks added to FAISS index and index saved",
+                    extra={"doc_id": doc_id, "chunks": len(new_chunks),
+                           "generation": index_manager.current().id})
+        if duplicates:
+            report_dedup_savings(doc_id, duplicates, lost)
 
         update_document_status(db, doc_record.id, "embedded")
-        print(
-            f"Document {doc_record.original_filename} processed and embedded successfully.")
-
+        progress("embedded", 100.0, chunks_total=len(chunks),
+                 chunks_deduplicated=len(duplicates))
+        metrics.DOCUMENTS_PROCESSED.labels("embedded").inc()
+        logger.info("Document processed and embedded successfully",
+                    extra={"doc_id": doc_id})
+
+    except IndexRebuilt as e:
+        if retry:
+            # tools.reindex swapped in a rebuilt index while this document
+            # was embedded against the old one; redo it on the new index
+            # (the extraction artifact makes that cheap).
+            logger.warning("Re-processing document %s: %s", doc_id, e)
+            return True
+        logger.error("Giving up on document %s after %s rebuilt indexes: %s",
+                     doc_id, _REBUILD_RETRIES + 1, e)
+        metrics.DOCUMENTS_PROCESSED.labels("error").inc()
+        update_document_status(db, doc_id, "error")
+        broker.publish(doc_id, "error", 100.0, user_id=user_id, error=str(e))
     except Exception as e:
-        print(f"Error processing document {doc_id}: {e}")
+        logger.exception("Error processing document %s: %s", doc_id, e)
+        metrics.DOCUMENTS_PROCESSED.labels("error").inc()
         update_document_status(db, doc_id, "error")
+        broker.publish(doc_id, "error", 100.0, user_id=user_id, error=str(e))
     finally:
         db.close()  # Ensure the session is closed
+    return False
+
+
+def retrieve_documents(query_text: str, generation: int, k: int = 3) -> List[LangchainDocument]:
+    """Embeds the query and returns the k most similar chunks of a generation."""
+    # Keyed by generation, so a swap implicitly invalidates cached results.
+    key = (generation, k, query_text)
+    docs = retrieval_cache.get(key)
+    if docs is None:
+        served_generation, docs = retriever.retrieve(query_text, k=k)
+        if served_generation == generation:
+            retrieval_cache.set(key, docs)
+    return docs
 
 
-def process_query_with_rag(query_text: str) -> Tuple[str, str]:
+def generate_answer(query_text: str, source_docs: List[LangchainDocument],
+                    stop: Optional[threading.Event] = None) -> str:
+    """Runs the "stuff" prompt (stable prefix first) over the retrieved chunks through the LLM.
+
+    Setting ``stop`` cancels the generation at its next token, like a
+    client disconnect does for a cancellable request.
+    """
+    prompt = llm_client.build_prompt(query_text, source_docs)
+    with stage_timer("generate"):
+        # Streamed so time to first token is measured and, for cancellable
+        # requests, generation stops (and Ollama is released) as soon as the
+        # client disconnects.
+        parts = []
+        for token in llm_client.stream(prompt):
+            admission.raise_if_cancelled()
+            if stop is not None and stop.is_set():
+                raise admission.RequestCancelled()
+            parts.append(token)
+        return "".join(parts)
+
+
+def answer_question(query_text: str, generation: int,
+                    source_docs: List[LangchainDocument]) -> str:
+    """Generates an answer, reusing one cached for this question and generation.
+
+    Raises DeadlineExceeded when the request's budget leaves less than
+    GENERATION_MIN_SECONDS to generate, or runs out while generating.
+    """
+    key = (generation, query_text)
+    answer = answer_cache.get(key)
+    if answer is None:
+        admission.check_deadline("generate", reserve=settings.GENERATION_MIN_SECONDS)
+        answer = generate_answer(query_text, source_docs)
+        if answer:
+            answer_cache.set(key, answer)
+    return answer
+
+
+def format_sources(source_docs: List[LangchainDocument]) -> str:
+    """Comma-separated, de-duplicated source filenames of the retrieved chunks."""
+    sources_list = []
+    if source_docs:
+        for doc in source_docs:
+            source = doc.metadata.get("source", "Unknown Source")
+            sources_list.append(source)
+    return ", ".join(sorted(list(set(sources_list)))) or "No sources found"
+
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_TERM = re.compile(r"\w+")
+_QUESTION_WORDS = {"the", "and", "for", "are", "does", "what", "which", "who", "whom",
+                   "when", "where", "why", "how", "with", "that", "this", "there"}
+
+
+def extractive_answer(query_text: str, source_docs: List[LangchainDocument]) -> str:
+    """Fallback answer without the LLM: the retrieved sentences that best match the question.
+
+    Sentences are scored by the question words they contain (ties go to
+    higher-ranked chunks) and the best EXTRACTIVE_MAX_SENTENCES are returned
+    in reading order, capped at EXTRACTIVE_MAX_CHARS.
+    """
+    terms = {term for term in _TERM.findall(query_text.lower())
+             if len(term) > 2 and term not in _QUESTION_WORDS}
+    candidates = []
+    for rank, doc in enumerate(source_docs):
+        for position, sentence in enumerate(_SENTENCE_END.split(doc.page_content.strip())):
+            sentence = " ".join(sentence.split())
+            if sentence:
+                overlap = len(terms & set(_TERM.findall(sentence.lower())))
+                candidates.append((overlap, rank, position, sentence))
+    if not candidates:
+        return ""
+    if any(c[0] for c in candidates):
+        candidates = [c for c in candidates if c[0]]
+    best = sorted(candidates, key=lambda c: (-c[0], c[1], c[2]))[:settings.EXTRACTIVE_MAX_SENTENCES]
+    answer = " ".join(c[3] for c in sorted(best, key=lambda c: (c[1], c[2])))
+    if len(answer) > settings.EXTRACTIVE_MAX_CHARS:
+        answer = answer[:settings.EXTRACTIVE_MAX_CHARS].rsplit(" ", 1)[0] + " ..."
+    return answer
+
+
+class RagAnswer(NamedTuple):
+    answer: str
+    sources: str
+    generation: Optional[int] = None
+    # "generated" by the LLM, "extractive" when the latency budget ran out,
+    # or "error" when the answer is the error message.
+    answer_type: str = "generated"
+
+
+def process_query_with_rag(query_text: str) -> RagAnswer:
     """Processes a query using the RAG pipeline.
-    Returns: (response_text, source_references_string)
+    Returns: RagAnswer(response_text, source_references_string, index generation)
     """
-    global vector_store
-    if vector_store is None:
-        load_vector_store()
-        if vector_store is None:
-            return "Vector store not initialized. Please upload and process documents first.", "N/A"
+    generation = retriever.current_generation()
+    if generation is None:
+        metrics.QUERIES.labels("no_index").inc()
+        return RagAnswer("Vector store not initialized. Please upload and process documents first.", "N/A")
 
+    metrics.QUERIES_IN_FLIGHT.inc()
     try:
-        retriever = vector_store.as_retriever(search_kwargs={"k": 3})
-        qa_chain = RetrievalQA.from_chain_type(
-            llm=llm,
-            chain_type="stuff",
-            retriever=retriever,
-            return_source_documents=True
-        )
-
-        print(f"Executing RAG query: {query_text}")
-        result = qa_chain.invoke({"query": query_text})
-        print("RAG query executed.")
-
-        answer = result.get("result", "No answer generated.")
-        source_docs = result.get("source_documents", [])
-
-        sources_list = []
-        if source_docs:
-            for doc in source_docs:
-                source = doc.metadata.get("source", "Unknown Source")
-                sources_list.append(source)
-        source_references = ", ".join(
-            sorted(list(set(sources_list)))) or "No sources found"
-
-        return answer, source_references
-
+        # Query text is user content: INFO logs only identify it.
+        logger.info("Executing RAG query", extra={
+            "query_hash": hashlib.sha256(query_text.encode("utf-8")).hexdigest()[:12],
+            "query_chars": len(query_text)})
+        logger.debug("RAG query text", extra={"query": query_text})
+        source_docs = retrieve_documents(query_text, generation, k=3)
+        admission.raise_if_cancelled()
+        try:
+            answer = answer_question(query_text, generation, source_docs) or "No answer generated."
+            answer_type = "generated"
+        except admission.DeadlineExceeded as e:
+            # Out of time for the LLM: answer from the chunks we already have.
+            logger.warning("Latency budget exhausted; answering extractively",
+                           extra={"stage": e.stage})
+            answer = extractive_answer(query_text, source_docs) or "No answer generated."
+            answer_type = "extractive"
+        logger.info("RAG query executed", extra={
+                    "retrieved": len(source_docs), "answer_type": answer_type})
+
+        source_references = format_sources(source_docs)
+
+        metrics.QUERIES.labels("ok" if answer_type == "generated" else "fallback").inc()
+        return RagAnswer(answer, source_references, generation, answer_type)
+
+    except admission.RequestCancelled:
+        metrics.QUERIES.labels("cancelled").inc()
+        raise
+    except admission.DeadlineExceeded:
+        # Ran out before there was anything to answer from.
+        metrics.QUERIES.labels("timeout").inc()
+        raise
     except Exception as e:
-        print(f"Error during RAG query processing: {e}")
-        return f"An error occurred while processing your query: {e}", "N/A"
+        logger.exception("Error during RAG query processing: %s", e)
+        metrics.QUERIES.labels("error").inc()
+        return RagAnswer(f"An error occurred while processing your query: {e}", "N/A",
+                         generation, "error")
+    finally:
+        metrics.QUERIES_IN_FLIGHT.dec()
+
+# --- Deduplication and removal ---
+
+# Seconds per embedded chunk in the last ingestion; prices skipped chunks.
+_embed_timing = {"per_chunk": 0.0}
+
+
+def report_dedup_savings(doc_id: int, duplicates: dict, lost: List[int]) -> None:
+    within = sum(1 for t in duplicates.values() if t < 0)
+    linked = len(duplicates) - within - len(lost)
+    saved_seconds = (within + linked) * _embed_timing["per_chunk"]
+    metrics.DEDUP_CHUNKS.labels("document").inc(within)
+    metrics.DEDUP_CHUNKS.labels("corpus").inc(linked)
+    metrics.DEDUP_EMBED_SECONDS_SAVED.inc(saved_seconds)
+    logger.info("Near-duplicate chunks skipped", extra={
+        "doc_id": doc_id, "skipped_in_document": within, "linked_to_existing": linked,
+        "embed_seconds_saved": round(saved_seconds, 3)})
+
+
+def remove_document_from_index(doc_id: int) -> int:
+    """Drops a document's chunk references and the vectors no other document shares."""
+    if index_manager.current() is None:
+        return 0
+    with index_manager.build_next(lambda: None) as store:
+        with stage_timer("index_remove", doc_id=doc_id):
+            removed = store.remove_ids(store.chunks.release_document(doc_id))
+    logger.info("Document removed from index",
+                extra={"doc_id": doc_id, "vectors_removed": removed})
+    return removed
 
 # --- Query Logging ---
 
@@ -198,7 +402,8 @@ def log_query(
     query_text: str,
     response_text: Optional[str] = None,
     retrieved_context: Optional[str] = None,
-    source_references: Optional[str] = None
+    source_references: Optional[str] = None,
+    is_error: bool = False
 ) -> db_core.QueryLog:
     """Logs a query and its response details to the database."""
     db_log = db_core.QueryLog(
@@ -206,14 +411,33 @@ def log_query(
         query_text=query_text,
         response_text=response_text,
         retrieved_context=retrieved_context,
-        source_references=source_references
+        source_references=source_references,
+        is_error=is_error
     )
-    db.add(db_log)
-    db.commit()
-    db.refresh(db_log)
+    with stage_timer("log_write"):
+        db.add(db_log)
+        db.commit()
+        db.refresh(db_log)
     return db_log
 
 
+async def log_query_async(
+    db: AsyncSession,
+    user_id: int,
+    query_text: str,
+    response_text: Optional[str] = None,
+    retrieved_context: Optional[str] = None,
+    source_references: Optional[str] = None,
+    is_error: bool = False
+) -> db_core.QueryLog:
+    """``log_query`` on the async session; the event loop stays free while it writes."""
+    with stage_timer("log_write"):
+        return await data_access.log_query_async(
+            db, user_id, query_text, response_text=response_text,
+            retrieved_context=retrieved_context, source_references=source_references,
+            is_error=is_error)
+
+
 def get_user_query_history(
     db: Session,
     user_id: int,
@@ -240,3 +464,22 @@ def get_all_query_logs(
              .offset(skip)\
              .limit(limit)\
              .all()
+
+
+async def get_user_query_history_async(
+    db: AsyncSession,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100
+) -> list[db_core.QueryLog]:
+    """Retrieves the query history for a specific user."""
+    return await data_access.get_query_logs_async(db, user_id=user_id, skip=skip, limit=limit)
+
+
+async def get_all_query_logs_async(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 1000
+) -> list[db_core.QueryLog]:
+    """Retrieves all query logs (for admin dashboard)."""
+    return await data_access.get_query_logs_async(db, skip=skip, limit=limit)
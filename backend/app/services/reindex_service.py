@@ -0,0 +1,240 @@
+import functools
+import multiprocessing
+import os
+import shutil
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_core.embeddings import Embeddings
+from sqlalchemy.orm import Session
+
+from ..core import database as db_core
+from ..core.config import settings
+from ..core.logging_config import get_logger
+from ..data_access import update_document_status
+from . import artifacts, dedup
+from .extractors import iter_chunks
+from .index_generations import GenerationManager, IndexGeneration
+from .sharded_index import AnyVectorIndex, create_vector_index
+
+logger = get_logger("reindex_service")
+
+# Passes reconciling documents embedded or deleted while the bulk pass ran.
+RECONCILE_PASSES = 3
+
+# doc_id -> (original filename, filepath, version); a replaced file changes both.
+Document = Tuple[str, str, int]
+Documents = Dict[int, Document]
+
+
+@dataclass
+class ReindexConfig:
+    """How to rebuild; ``None`` fields take the configured value."""
+    chunk_size: Optional[int] = None
+    chunk_overlap: Optional[int] = None
+    workers: int = 0  # 0 = one per core
+    refresh_artifacts: bool = False
+    dedup: Optional[bool] = None
+
+    def __post_init__(self):
+        self.chunk_size = self.chunk_size or settings.CHUNK_SIZE
+        self.chunk_overlap = settings.CHUNK_OVERLAP if self.chunk_overlap is None else self.chunk_overlap
+        self.workers = self.workers or os.cpu_count() or 1
+        self.dedup = settings.DEDUP_ENABLED if self.dedup is None else self.dedup
+
+
+@dataclass
+class ReindexReport:
+    documents: int = 0
+    chunks: int = 0
+    deduplicated: int = 0
+    removed: int = 0
+    failed: Dict[int, str] = field(default_factory=dict)
+    extract_seconds: float = 0.0
+    embed_seconds: float = 0.0
+    seconds: float = 0.0
+    generation: Optional[int] = None
+
+
+def embedded_documents(db: Session) -> Documents:
+    rows = db.query(db_core.Document.id, db_core.Document.original_filename,
+                    db_core.Document.filepath, db_core.Document.version)\
+        .filter(db_core.Document.status == "embedded")\
+        .all()
+    return {doc_id: (source, filepath, version) for doc_id, source, filepath, version in rows}
+
+
+# --- Worker side (runs in the process pool) ---
+
+@functools.lru_cache(maxsize=4)
+def _splitter(chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+
+def prepare_document(filepath: str, chunk_size: int, chunk_overlap: int,
+                     refresh: bool) -> Tuple[List[str], float]:
+    """Chunks a document's text, read from its extraction artifact when one exists.
+
+    Returns (chunks, seconds).
+    """
+    start = time.perf_counter()
+    segments = artifacts.iter_text(filepath, refresh=refresh)
+    chunks = list(iter_chunks(segments, _splitter(chunk_size, chunk_overlap)))
+    return chunks, time.perf_counter() - start
+
+
+# --- Caller side ---
+
+def _add_document(store: AnyVectorIndex, doc_id: int, source: str, chunks: List[str],
+                  embeddings: Embeddings, config: ReindexConfig, report: ReindexReport) -> None:
+    """Deduplicates, embeds and adds one document, as ingestion does."""
+    duplicates = dedup.find_duplicates(chunks, store.chunks, exclude_doc_id=doc_id) \
+        if config.dedup else {}
+    new_chunks = [chunk for i, chunk in enumerate(chunks) if i not in duplicates]
+    store.remove_ids(store.chunks.release_document(doc_id))
+    if new_chunks:
+        start = time.perf_counter()
+        vectors = embeddings.embed_documents(new_chunks)
+        report.embed_seconds += time.perf_counter() - start
+        store.add(new_chunks, vectors, [{"source": source, "doc_id": doc_id} for _ in new_chunks])
+    # The store is private to this build, so every linked chunk still exists.
+    store.chunks.link(sorted({t for t in duplicates.values() if t >= 0}), doc_id, source)
+    report.chunks += len(new_chunks)
+    report.deduplicated += len(duplicates)
+
+
+def _index_documents(pool: ProcessPoolExecutor, documents: Documents, store: AnyVectorIndex,
+                     embeddings: Embeddings, config: ReindexConfig, report: ReindexReport,
+                     indexed: Documents) -> None:
+    """Extracts and chunks on the pool while this process embeds, in doc_id order.
+
+    At most a few documents per worker are chunked ahead of the embedder,
+    so memory stays bounded however large the corpus is.
+    """
+    window = config.workers * 4
+    pending: deque = deque()  # (doc_id, document, future) in doc_id order
+    remaining = iter(sorted(documents.items()))
+
+    def fill() -> None:
+        while len(pending) < window:
+            item = next(remaining, None)
+            if item is None:
+                return
+            doc_id, document = item
+            pending.append((doc_id, document, pool.submit(
+                prepare_document, document[1], config.chunk_size, config.chunk_overlap,
+                config.refresh_artifacts)))
+
+    fill()
+    while pending:
+        doc_id, document, future = pending.popleft()
+        fill()
+        try:
+            chunks, seconds = future.result()
+            report.extract_seconds += seconds
+            if not chunks:
+                raise ValueError("Extracted text is empty.")
+            _add_document(store, doc_id, document[0], chunks, embeddings, config, report)
+        except Exception as e:
+            logger.warning("Skipping document %s in reindex: %s", doc_id, e)
+            report.failed[doc_id] = str(e)
+            continue
+        report.documents += doc_id not in indexed  # replaced ones count once
+        indexed[doc_id] = document
+        if report.documents % 100 == 0:
+            logger.info("Reindex progress", extra={
+                "documents": report.documents, "chunks": report.chunks})
+
+
+def _build_and_publish(pool: ProcessPoolExecutor, db: Session, manager: GenerationManager,
+                       store: AnyVectorIndex, documents: Documents, embeddings: Embeddings,
+                       config: ReindexConfig, report: ReindexReport,
+                       indexed: Documents) -> IndexGeneration:
+    """Bulk pass plus reconciliation passes into ``store``, then the swap.
+
+    Documents deleted since they were indexed are dropped; replaced ones
+    (another file or version) are dropped and indexed again.
+    """
+    for _ in range(RECONCILE_PASSES):
+        _index_documents(pool, documents, store, embeddings, config, report, indexed)
+        current = embedded_documents(db)
+        for doc_id, document in list(indexed.items()):
+            if current.get(doc_id) == document:
+                continue
+            store.remove_ids(store.chunks.release_document(doc_id))
+            del indexed[doc_id]
+            report.documents -= 1
+            if doc_id not in current:
+                report.removed += 1
+        documents = _pending(current, indexed, report)
+        if not documents:
+            break
+    if not indexed:
+        raise ValueError("No document could be reindexed; keeping the current index.")
+    return manager.publish(store, rebuild=True)
+
+
+def _pending(current: Documents, indexed: Documents, report: ReindexReport) -> Documents:
+    """Embedded documents not indexed in their current version, nor failed."""
+    return {doc_id: document for doc_id, document in current.items()
+            if indexed.get(doc_id) != document and doc_id not in report.failed}
+
+
+def rebuild_index(db: Session, manager: GenerationManager, embeddings: Embeddings,
+                  config: Optional[ReindexConfig] = None) -> ReindexReport:
+    """Rebuilds the whole index from the embedded documents and swaps it in.
+
+    The new store (chunk store, vectors, index) is built in a fresh data
+    directory from ``manager.new_store_path()``, so chunking and the
+    embedding model may both differ from the current index; queries keep
+    using the current generation until the rebuilt one is published.
+    Documents embedded, replaced or deleted meanwhile are reconciled before
+    the swap, and any that finish during it are added right after.
+    Documents that fail are left out and marked ``error``.
+    """
+    config = config or ReindexConfig()
+    report = ReindexReport()
+    started = time.perf_counter()
+    documents = embedded_documents(db)
+    if not documents:
+        raise ValueError("No embedded documents to reindex.")
+
+    path = manager.new_store_path()
+    store = create_vector_index(path, dim=len(embeddings.embed_query("reindex")))
+    indexed: Documents = {}
+    published = False
+    logger.info("Reindex started", extra={
+        "documents": len(documents), "workers": config.workers, "path": store.path,
+        "chunk_size": config.chunk_size, "chunk_overlap": config.chunk_overlap})
+    try:
+        # Spawned, not forked, so workers never inherit this process's
+        # threads or the embedding model.
+        with ProcessPoolExecutor(max_workers=config.workers,
+                                 mp_context=multiprocessing.get_context("spawn")) as pool:
+            generation = _build_and_publish(pool, db, manager, store, documents, embeddings,
+                                            config, report, indexed)
+            published = True
+            late = _pending(embedded_documents(db), indexed, report)
+            if late:
+                with manager.build_next(lambda: None) as next_store:
+                    _index_documents(pool, late, next_store, embeddings, config, report, indexed)
+                generation = manager.current()
+    finally:
+        if not published:
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            # The served index lacks these, even if the late pass failed.
+            for doc_id in report.failed:
+                update_document_status(db, doc_id, "error")
+
+    report.generation = generation.id
+    report.seconds = time.perf_counter() - started
+    logger.info("Reindex finished", extra={
+        "generation": report.generation, "documents": report.documents,
+        "chunks": report.chunks, "failed": len(report.failed),
+        "seconds": round(report.seconds, 1)})
+    return report
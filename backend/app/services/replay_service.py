@@ -0,0 +1,211 @@
+import hashlib
+import os
+import shutil
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_core.embeddings import Embeddings
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..core import database as db_core
+from ..core.logging_config import get_logger
+from .artifacts import iter_text
+from .extractors import iter_chunks
+from .embedding_backends import create_embeddings
+from .vector_store import VectorIndex
+
+logger = get_logger("replay_service")
+
+
+@dataclass
+class ReplayConfig:
+    """An alternate retrieval configuration to evaluate against production.
+
+    ``None`` fields keep the production value.
+    """
+    name: str = "candidate"
+    chunk_size: Optional[int] = None
+    chunk_overlap: Optional[int] = None
+    k: int = 3
+    quantization: Optional[str] = None
+    embedding_backend: Optional[str] = None
+
+    def rechunks(self) -> bool:
+        return self.chunk_size is not None or self.chunk_overlap is not None
+
+
+@dataclass
+class ReplayQuery:
+    text: str
+    weight: float = 1.0
+
+
+@dataclass
+class RetrievalRun:
+    latencies_ms: List[float] = field(default_factory=list)
+    doc_ids: List[set] = field(default_factory=list)
+    chunk_keys: List[set] = field(default_factory=list)
+
+
+def load_replay_queries(
+    db: Session,
+    limit: int = 1000,
+    since=None,
+    weight_by_feedback: bool = False,
+) -> List[ReplayQuery]:
+    """Reads the most recent successful queries, optionally weighted by rating.
+
+    With ``weight_by_feedback`` a query's weight is its average feedback
+    rating (unrated queries weigh 1), so well- and badly-rated traffic can
+    be emphasised in the overlap figures.
+    """
+    query = db.query(db_core.QueryLog.query_text, func.avg(db_core.Feedback.rating))\
+        .outerjoin(db_core.Feedback, db_core.Feedback.query_id == db_core.QueryLog.id)\
+        .filter(db_core.QueryLog.is_error.is_(False))
+    if since is not None:
+        query = query.filter(db_core.QueryLog.timestamp >= since)
+    rows = query.group_by(db_core.QueryLog.id, db_core.QueryLog.query_text)\
+        .order_by(db_core.QueryLog.id.desc())\
+        .limit(limit)\
+        .all()
+    return [
+        ReplayQuery(text, float(rating) if (
+            weight_by_feedback and rating is not None) else 1.0)
+        for text, rating in rows
+    ]
+
+
+def build_alternate_index(
+    config: ReplayConfig,
+    path: str,
+    production: VectorIndex,
+    production_splitter: RecursiveCharacterTextSplitter,
+    alt_embeddings: Embeddings,
+) -> VectorIndex:
+    """Builds the candidate index in ``path`` without touching production.
+
+    When neither chunking nor the embedding backend changes, production
+    chunks and vectors are reused and only the index encoding differs;
+    otherwise every embedded document is re-extracted, re-chunked and
+    re-embedded.
+    """
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    quantization = config.quantization or production.quantization
+    store = VectorIndex.create(path, production.dim, quantization)
+
+    if not config.rechunks() and config.embedding_backend is None:
+        ids = production.ids()
+        raw = production.raw_vectors()
+        if raw is not None:
+            vectors = np.asarray(raw[ids])
+        else:
+            vectors = np.vstack([production.index.reconstruct(int(i)) for i in ids]) \
+                if len(ids) else np.zeros((0, production.dim), dtype=np.float32)
+        docs = production.chunks.get(ids.tolist())
+        for start in range(0, len(ids), 1024):
+            batch = [int(i) for i in ids[start:start + 1024]]
+            store.add([docs[i].page_content for i in batch], vectors[start:start + 1024],
+                      [docs[i].metadata for i in batch])
+    else:
+        splitter = RecursiveCharacterTextSplitter(
+            chunk_size=config.chunk_size or production_splitter._chunk_size,
+            chunk_overlap=config.chunk_overlap if config.chunk_overlap is not None
+            else production_splitter._chunk_overlap,
+        )
+        with db_core.get_db_session() as db:
+            documents = db.query(db_core.Document)\
+                .filter(db_core.Document.status == "embedded").all()
+            sources = [(d.id, d.original_filename, d.filepath)
+                       for d in documents]
+        for doc_id, source, filepath in sources:
+            try:
+                chunks = list(iter_chunks(iter_text(filepath), splitter))
+            except Exception as e:
+                logger.warning("Skipping document %s in replay build: %s", doc_id, e)
+                continue
+            if chunks:
+                store.add(chunks, alt_embeddings.embed_documents(chunks),
+                          [{"source": source, "doc_id": doc_id} for _ in chunks])
+
+    if quantization != "none" and not store.is_quantized and store.ntotal:
+        store.quantize()
+    store.save()
+    return store
+
+
+def _chunk_key(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _run(queries: List[ReplayQuery], model: Embeddings, store: VectorIndex, k: int) -> RetrievalRun:
+    run = RetrievalRun()
+    vectors = model.embed_documents([q.text for q in queries])
+    for vector in vectors:
+        start = time.perf_counter()
+        hits = store.search_with_scores(vector, k)
+        run.latencies_ms.append((time.perf_counter() - start) * 1000)
+        run.doc_ids.append({doc.metadata.get("doc_id") for doc, _ in hits})
+        run.chunk_keys.append({_chunk_key(doc.page_content) for doc, _ in hits})
+    return run
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    return {f"p{p}": round(float(np.percentile(values, p)), 3) for p in (50, 95, 99)}
+
+
+def _weighted_overlap(a: List[set], b: List[set], weights: np.ndarray) -> float:
+    scores = np.array([len(x & y) / max(len(x), 1) for x, y in zip(a, b)])
+    return round(float((scores * weights).sum() / weights.sum()), 4) if len(scores) else 0.0
+
+
+def replay(
+    queries: List[ReplayQuery],
+    production: VectorIndex,
+    production_embeddings: Embeddings,
+    production_k: int,
+    candidate: VectorIndex,
+    candidate_embeddings: Embeddings,
+    config: ReplayConfig,
+) -> dict:
+    """Runs the queries through both indexes and compares their retrieval.
+
+    Overlap is the (weighted) share of production's top-k present in the
+    candidate's top-k, at document and exact-chunk level. Chunk overlap is
+    only meaningful when chunking is unchanged.
+    """
+    prod_run = _run(queries, production_embeddings, production, production_k)
+    cand_run = _run(queries, candidate_embeddings, candidate, config.k)
+    weights = np.array([q.weight for q in queries], dtype=np.float64)
+
+    def describe(store: VectorIndex, run: RetrievalRun) -> dict:
+        return {
+            "vectors": store.ntotal,
+            "quantization": store.quantization if store.is_quantized else "none",
+            "index_bytes": store.memory_bytes(),
+            "chunk_store_bytes": store.chunks.size_bytes(),
+            "retrieval_latency_ms": _percentiles(run.latencies_ms),
+        }
+
+    return {
+        "queries": len(queries),
+        "config": config.__dict__,
+        "production": describe(production, prod_run),
+        "candidate": describe(candidate, cand_run),
+        "overlap": {
+            "document": _weighted_overlap(prod_run.doc_ids, cand_run.doc_ids, weights),
+            "chunk": _weighted_overlap(prod_run.chunk_keys, cand_run.chunk_keys, weights),
+        },
+    }
+
+
+def candidate_embeddings(config: ReplayConfig, production_embeddings: Embeddings) -> Embeddings:
+    if config.embedding_backend is None:
+        return production_embeddings
+    return create_embeddings(config.embedding_backend)
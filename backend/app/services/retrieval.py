@@ -0,0 +1,235 @@
+import os
+import pickle
+import threading
+import time
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import httpx
+import orjson
+import redis
+from langchain.docstore.document import Document as LangchainDocument
+
+from ..core import admission, metrics
+from ..core.config import settings
+from ..core.logging_config import get_logger
+from ..core.metrics import stage_timer
+from . import access_stats, tiering
+from .embedding_backends import LazyEmbeddings
+from .index_generations import GenerationManager, IndexGeneration
+
+logger = get_logger("retrieval")
+
+# Embedding model (Nomic Embed Text v1, backend chosen by EMBEDDING_BACKEND).
+# Loaded on first use, so API workers that delegate retrieval to the
+# retrieval service never pay for it unless they ingest.
+embeddings = LazyEmbeddings()
+
+# Vector store (FAISS). Queries pin the current generation; ingestion builds
+# and swaps in the next.
+vector_store_path = os.path.join(settings.VECTOR_STORE_DIR, "faiss_index")
+index_manager = GenerationManager(
+    vector_store_path, tierer=tiering.tier_store if settings.TIERING_ENABLED else None)
+
+redis_client = redis.StrictRedis(host='localhost', port=6379, db=0)
+
+ScoredHits = List[List[Tuple[LangchainDocument, float]]]
+SwapListener = Callable[[int], None]
+
+
+def get_cached_embedding(query: str):
+    try:
+        cached = redis_client.get(query)
+    except redis.RedisError as e:
+        logger.warning("Embedding cache unavailable: %s", e)
+        metrics.record_cache_lookup("query_embedding", "error")
+        return None
+    if cached:
+        metrics.record_cache_lookup("query_embedding", "hit")
+        return pickle.loads(cached)
+    metrics.record_cache_lookup("query_embedding", "miss")
+    return None
+
+
+def cache_embedding(query: str, embedding):
+    try:
+        redis_client.set(query, pickle.dumps(embedding),
+                         ex=3600)  # Cache for 1 hour
+    except redis.RedisError as e:
+        logger.warning("Could not cache query embedding: %s", e)
+
+
+def embed_query(query: str) -> List[float]:
+    """Embeds a query, going through the Redis embedding cache."""
+    # Vectors from different backends are close but not identical, and a
+    # reindex with another model changes them entirely.
+    cache_key = f"emb:{settings.EMBEDDING_BACKEND}:{settings.EMBEDDING_MODEL_NAME}:{query}"
+    with stage_timer("embed_query"):
+        embedding = get_cached_embedding(cache_key)
+        if embedding is None:
+            embedding = embeddings.embed_query(query)
+            cache_embedding(cache_key, embedding)
+    return embedding
+
+
+def load_vector_store() -> Optional[IndexGeneration]:
+    """Loads the active index generation from the local path."""
+    try:
+        generation = index_manager.current()
+    except Exception as e:
+        logger.error(
+            "Error loading FAISS index: %s. Will create a new one if documents are added.", e)
+        return None
+    if generation is None:
+        logger.info(
+            "FAISS index not found at %s. It will be created when documents are processed.", vector_store_path)
+    return generation
+
+
+def start_index_jobs() -> None:
+    """Background jobs of a process that serves the index in-process."""
+    access_stats.start_flush_job()
+    tiering.start_retier_job(index_manager)
+
+
+# --- Retrievers ---
+#
+# Both retrievers expose the same interface; generation ids identify the
+# index snapshot a result came from.
+
+class LocalRetriever:
+    """Embeds and searches in this process."""
+
+    def __init__(self, manager: GenerationManager = index_manager):
+        self.manager = manager
+
+    def current_generation(self) -> Optional[int]:
+        generation = self.manager.current()
+        return generation.id if generation else None
+
+    def retrieve(self, query_text: str, k: int = 3) -> Tuple[Optional[int], List[LangchainDocument]]:
+        """The k most similar chunks for one query, with the generation searched."""
+        generation = self.manager.current()
+        if generation is None:
+            return None, []
+        admission.check_deadline("embed")
+        query_vector = embed_query(query_text)
+        admission.check_deadline("retrieve")
+        with stage_timer("retrieve", k=k, generation=generation.id):
+            docs = generation.store.search(query_vector, k=k)
+        access_stats.record_hits(docs)
+        return generation.id, docs
+
+    def retrieve_batch(self, queries: Sequence[str], k: int = 3) -> Tuple[Optional[int], ScoredHits]:
+        """Scored hits for many queries: one embedding pass, one matrix search."""
+        generation = self.manager.current()
+        if generation is None:
+            return None, []
+        with stage_timer("embed_query", batch=len(queries)):
+            vectors = embeddings.embed_documents(list(queries))
+        with stage_timer("retrieve", k=k, batch=len(queries), generation=generation.id):
+            hits = generation.store.search_batch(vectors, k)
+        access_stats.record_hits(doc for row in hits for doc, _ in row)
+        return generation.id, hits
+
+    def add_swap_listener(self, callback: SwapListener) -> None:
+        self.manager.add_swap_listener(lambda generation: callback(generation.id))
+
+
+def _decode_hits(rows: List[List[dict]]) -> ScoredHits:
+    return [
+        [(LangchainDocument(page_content=hit["text"], metadata=hit["metadata"]), hit["score"])
+         for hit in row]
+        for row in rows
+    ]
+
+
+def encode_hits(hits: ScoredHits) -> List[List[dict]]:
+    return [
+        [{"text": doc.page_content, "metadata": doc.metadata, "score": float(score)}
+         for doc, score in row]
+        for row in hits
+    ]
+
+
+class RemoteRetriever:
+    """Calls the retrieval service (see ``app.retrieval_server``) over pooled HTTP.
+
+    Bodies are orjson-encoded; connections are kept alive and shared
+    between threads. Index swaps are noticed from the generation id the
+    service returns, and polled every INDEX_GENERATION_POLL_SECONDS.
+    """
+
+    def __init__(self, base_url: str, timeout: Optional[float] = None, pool_size: Optional[int] = None):
+        pool_size = pool_size or settings.RETRIEVAL_POOL_SIZE
+        limits = httpx.Limits(max_connections=pool_size,
+                              max_keepalive_connections=pool_size)
+        self._client = httpx.Client(
+            base_url=base_url,
+            timeout=timeout or settings.RETRIEVAL_SERVICE_TIMEOUT,
+            # Retries stale keep-alive connections once.
+            transport=httpx.HTTPTransport(limits=limits, retries=1),
+            headers={"Content-Type": "application/json"},
+        )
+        self._generation: Optional[int] = None
+        self._checked_at = 0.0
+        self._listeners: List[SwapListener] = []
+        self._lock = threading.Lock()
+
+    def _call(self, path: str, payload: Optional[dict] = None) -> dict:
+        # Within a latency budget, the call may take only what is left of it.
+        timeout = self._client.timeout
+        left = admission.remaining()
+        if left is not None:
+            admission.check_deadline("retrieve")
+            timeout = min(left, settings.RETRIEVAL_SERVICE_TIMEOUT)
+        try:
+            if payload is None:
+                response = self._client.get(path, timeout=timeout)
+            else:
+                response = self._client.post(path, content=orjson.dumps(payload), timeout=timeout)
+        except httpx.TimeoutException:
+            admission.check_deadline("retrieve")
+            raise
+        response.raise_for_status()
+        body = orjson.loads(response.content)
+        self._observe(body.get("generation"))
+        return body
+
+    def _observe(self, generation: Optional[int]) -> None:
+        with self._lock:
+            self._checked_at = time.monotonic()
+            previous, self._generation = self._generation, generation
+        if generation is not None and previous is not None and generation != previous:
+            for callback in self._listeners:
+                try:
+                    callback(generation)
+                except Exception as e:
+                    logger.warning("Index swap listener failed: %s", e)
+
+    def current_generation(self) -> Optional[int]:
+        if time.monotonic() - self._checked_at >= settings.INDEX_GENERATION_POLL_SECONDS:
+            self._call("/generation")
+        return self._generation
+
+    def retrieve(self, query_text: str, k: int = 3) -> Tuple[Optional[int], List[LangchainDocument]]:
+        with stage_timer("retrieve_remote", k=k):
+            body = self._call("/retrieve", {"queries": [query_text], "k": k})
+        hits = _decode_hits(body["hits"])
+        return body["generation"], [doc for doc, _ in hits[0]] if hits else []
+
+    def retrieve_batch(self, queries: Sequence[str], k: int = 3) -> Tuple[Optional[int], ScoredHits]:
+        with stage_timer("retrieve_remote", k=k, batch=len(queries)):
+            body = self._call("/retrieve_batch", {"queries": list(queries), "k": k})
+        return body["generation"], _decode_hits(body["hits"])
+
+    def add_swap_listener(self, callback: SwapListener) -> None:
+        self._listeners.append(callback)
+
+
+def create_retriever():
+    """The retrieval service client if RETRIEVAL_SERVICE_URL is set, else the in-process path."""
+    if settings.RETRIEVAL_SERVICE_URL:
+        logger.info("Using retrieval service", extra={"url": settings.RETRIEVAL_SERVICE_URL})
+        return RemoteRetriever(settings.RETRIEVAL_SERVICE_URL)
+    load_vector_store()
+    return LocalRetriever()
@@ -0,0 +1,280 @@
+import heapq
+import json
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import faiss
+import numpy as np
+from langchain.docstore.document import Document as LangchainDocument
+
+from ..core.config import settings
+from ..core.logging_config import get_logger
+from .chunk_store import ChunkStore
+from .vector_store import (
+    CHUNKS_FILE, INDEX_FILE, VECTORS_FILE, VectorIndex, make_faiss_index, train_min)
+
+logger = get_logger("sharded_index")
+
+# Written into a generation directory instead of index.faiss.
+SHARDS_MANIFEST = "shards.json"
+SHARDS_DIR = "shards"
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _search_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=settings.VECTOR_SEARCH_THREADS or max(settings.VECTOR_SHARDS, 1),
+                thread_name_prefix="rag-shard-search")
+        return _pool
+
+
+def _shard_file(directory: str, shard: int) -> str:
+    return os.path.join(directory, SHARDS_DIR, f"{shard:03d}.faiss")
+
+
+class ShardedVectorIndex:
+    """A vector index partitioned by document into independent FAISS shards.
+
+    Every shard is a ``VectorIndex`` over the shared chunk store and vector
+    file, so chunk ids stay global. A document's chunks all live in shard
+    ``doc_id % shards``: ingesting it modifies (and on publish rewrites)
+    only that shard; the others are hard-linked from the previous
+    generation. Searches fan out to all shards on a thread pool (FAISS
+    releases the GIL) and the per-shard top-k lists are merged.
+    """
+
+    def __init__(self, path: str, shards: List[VectorIndex], chunks: ChunkStore,
+                 quantization: str, sources: Optional[List[Optional[str]]] = None):
+        self.path = path
+        self.shards = shards
+        self.chunks = chunks
+        self.quantization = quantization
+        # File each shard was loaded from or last saved to; None = modified.
+        self._sources = sources or [None] * len(shards)
+        self._owned = [source is None for source in self._sources]
+
+    # --- Construction and persistence ---
+
+    @classmethod
+    def create(cls, path: str, dim: int, shards: Optional[int] = None,
+               quantization: Optional[str] = None) -> "ShardedVectorIndex":
+        shards = shards or settings.VECTOR_SHARDS
+        quantization = quantization or settings.VECTOR_QUANTIZATION
+        chunks = ChunkStore(os.path.join(path, CHUNKS_FILE))
+        return cls(path, [cls._empty_shard(path, dim, chunks, quantization)
+                          for _ in range(shards)], chunks, quantization)
+
+    @staticmethod
+    def _empty_shard(path: str, dim: int, chunks: ChunkStore, quantization: str) -> VectorIndex:
+        inner = make_faiss_index(
+            dim, "none" if train_min(quantization) else quantization)
+        return VectorIndex(path, faiss.IndexIDMap2(inner), chunks, quantization)
+
+    @classmethod
+    def from_index(cls, store: VectorIndex, shards: Optional[int] = None) -> "ShardedVectorIndex":
+        """Repartitions a monolithic index by document (vectors are copied, not re-embedded)."""
+        shards = shards or settings.VECTOR_SHARDS
+        sharded = cls(store.path, [cls._empty_shard(store.path, store.dim, store.chunks, store.quantization)
+                                   for _ in range(shards)], store.chunks, store.quantization)
+        ids = store.ids()
+        if len(ids):
+            raw = store.raw_vectors()
+            vectors = np.asarray(raw[ids]) if raw is not None else \
+                faiss.downcast_index(store.index.index).reconstruct_n(0, store.ntotal)
+            doc_ids = store.chunks.doc_ids(ids)
+            targets = np.array([sharded.shard_for(doc_ids.get(int(i)), int(i)) for i in ids])
+            for shard in range(shards):
+                mask = targets == shard
+                if mask.any():
+                    sharded.shards[shard].index.add_with_ids(vectors[mask], ids[mask])
+                    if store.quantization != "none":
+                        sharded.shards[shard]._maybe_quantize()
+        logger.info("Repartitioned index into shards",
+                    extra={"shards": shards, "vectors": len(ids)})
+        return sharded
+
+    @classmethod
+    def load(cls, path: str, directory: str) -> "ShardedVectorIndex":
+        """Loads the shards of the generation stored in ``directory``."""
+        with open(os.path.join(directory, SHARDS_MANIFEST)) as f:
+            manifest = json.load(f)
+        chunks = ChunkStore(os.path.join(path, CHUNKS_FILE))
+        quantization = settings.VECTOR_QUANTIZATION
+        if quantization != "none" and not os.path.exists(os.path.join(path, VECTORS_FILE)):
+            logger.warning(
+                "No %s in %s; ignoring VECTOR_QUANTIZATION=%s for this index.",
+                VECTORS_FILE, path, quantization)
+            quantization = "none"
+        sources = [_shard_file(directory, shard) for shard in range(manifest["shards"])]
+        shards = [VectorIndex(path, faiss.read_index(source), chunks, quantization)
+                  for source in sources]
+        return cls(path, shards, chunks, quantization, sources)
+
+    def save(self, directory: str) -> None:
+        """Writes the shards into ``directory``.
+
+        Modified shards are serialized; unmodified ones are hard-linked from
+        the file they were loaded from, so a publish costs only the shards
+        ingestion touched.
+        """
+        os.makedirs(os.path.join(directory, SHARDS_DIR), exist_ok=True)
+        written = 0
+        for shard, store in enumerate(self.shards):
+            target = _shard_file(directory, shard)
+            source = self._sources[shard]
+            if source is None:
+                store.save(target)
+                written += 1
+            elif os.path.abspath(source) != os.path.abspath(target):
+                try:
+                    os.link(source, target)
+                except OSError:
+                    shutil.copyfile(source, target)
+            self._sources[shard] = target
+        tmp = os.path.join(directory, SHARDS_MANIFEST + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"shards": len(self.shards), "dim": self.dim,
+                       "quantization": self.quantization, "partition": "doc_id"}, f)
+        os.replace(tmp, os.path.join(directory, SHARDS_MANIFEST))
+        logger.info("Saved sharded index", extra={
+                    "shards": len(self.shards), "shards_written": written})
+
+    def clone(self) -> "ShardedVectorIndex":
+        """Copy-on-write copy: a shard is cloned the first time it is modified."""
+        copy = ShardedVectorIndex(self.path, list(self.shards), self.chunks,
+                                  self.quantization, list(self._sources))
+        copy._owned = [False] * len(self.shards)
+        return copy
+
+    def _writable(self, shard: int) -> VectorIndex:
+        if not self._owned[shard]:
+            self.shards[shard] = self.shards[shard].clone()
+            self._owned[shard] = True
+        self._sources[shard] = None
+        return self.shards[shard]
+
+    # --- Properties ---
+
+    @property
+    def ntotal(self) -> int:
+        return sum(shard.ntotal for shard in self.shards)
+
+    @property
+    def dim(self) -> int:
+        return self.shards[0].dim
+
+    @property
+    def is_quantized(self) -> bool:
+        return any(shard.is_quantized for shard in self.shards)
+
+    def ids(self) -> np.ndarray:
+        return np.concatenate([shard.ids() for shard in self.shards])
+
+    def memory_bytes(self) -> int:
+        return sum(shard.memory_bytes() for shard in self.shards)
+
+    def raw_vectors(self) -> Optional[np.memmap]:
+        # All shards share the vector file of the store path.
+        return self.shards[0].raw_vectors()
+
+    def shard_for(self, doc_id: Optional[int], chunk_id: int = 0) -> int:
+        return (doc_id if doc_id is not None else chunk_id) % len(self.shards)
+
+    # --- Writes ---
+
+    def add(self, texts: Sequence[str], vectors: Sequence[Sequence[float]], metadatas: Sequence[dict]) -> List[int]:
+        """Adds embedded chunks to their documents' shards; returns chunk ids in input order."""
+        groups: Dict[int, List[int]] = {}
+        for position, metadata in enumerate(metadatas):
+            groups.setdefault(self.shard_for(metadata.get("doc_id"), position), []).append(position)
+        matrix = np.asarray(vectors, dtype=np.float32)
+        ids = [0] * len(texts)
+        for shard, positions in groups.items():
+            shard_ids = self._writable(shard).add(
+                [texts[p] for p in positions], matrix[positions], [metadatas[p] for p in positions])
+            for position, chunk_id in zip(positions, shard_ids):
+                ids[position] = chunk_id
+        return ids
+
+    def remove_ids(self, ids: Sequence[int]) -> int:
+        """Removes vectors by chunk id from whichever shards hold them."""
+        wanted = np.asarray(ids, dtype=np.int64)
+        removed = 0
+        for shard in range(len(self.shards)):
+            present = wanted[np.isin(wanted, self.shards[shard].ids())]
+            if len(present):
+                removed += self._writable(shard).remove_ids(present)
+        return removed
+
+    def quantize(self) -> None:
+        for shard in range(len(self.shards)):
+            if self.shards[shard].ntotal:
+                self._writable(shard).quantize()
+
+    # --- Reads ---
+
+    def search_ids_batch(self, query_vectors: Sequence[Sequence[float]], k: int) -> List[List[Tuple[int, float]]]:
+        """Searches every shard in parallel and merges the per-shard top-k."""
+        queries = np.asarray(query_vectors, dtype=np.float32)
+        live = [shard for shard in self.shards if shard.ntotal]
+        if not live:
+            return [[] for _ in range(len(queries))]
+        if len(live) == 1:
+            return live[0].search_ids_batch(queries, k)
+        per_shard = list(_search_pool().map(
+            lambda shard: shard.search_ids_batch(queries, k), live))
+        return [
+            heapq.nlargest(k, (hit for rows in per_shard for hit in rows[q]), key=lambda hit: hit[1])
+            for q in range(len(queries))
+        ]
+
+    def search_ids(self, query_vector: Sequence[float], k: int) -> List[Tuple[int, float]]:
+        return self.search_ids_batch([query_vector], k)[0]
+
+    def search_with_scores(self, query_vector: Sequence[float], k: int) -> List[Tuple[LangchainDocument, float]]:
+        return self.search_batch([query_vector], k)[0]
+
+    def search_batch(self, query_vectors: Sequence[Sequence[float]], k: int) -> List[List[Tuple[LangchainDocument, float]]]:
+        """Batched search; chunks for all merged hits are fetched in one read."""
+        hits = self.search_ids_batch(query_vectors, k)
+        docs = self.chunks.get(
+            {chunk_id for row in hits for chunk_id, _ in row})
+        return [
+            [(docs[chunk_id], score) for chunk_id, score in row if chunk_id in docs]
+            for row in hits
+        ]
+
+    def search(self, query_vector: Sequence[float], k: int) -> List[LangchainDocument]:
+        return [doc for doc, _ in self.search_with_scores(query_vector, k)]
+
+
+AnyVectorIndex = Union[VectorIndex, ShardedVectorIndex]
+
+
+def create_vector_index(path: str, dim: int) -> AnyVectorIndex:
+    """An empty store, sharded when VECTOR_SHARDS > 1."""
+    if settings.VECTOR_SHARDS > 1:
+        return ShardedVectorIndex.create(path, dim)
+    return VectorIndex.create(path, dim)
+
+
+def load_vector_index(root: str, directory: str) -> AnyVectorIndex:
+    """Loads the generation stored in ``directory``, sharded or not."""
+    if os.path.exists(os.path.join(directory, SHARDS_MANIFEST)):
+        return ShardedVectorIndex.load(root, directory)
+    return VectorIndex.load(root, os.path.join(directory, INDEX_FILE))
+
+
+def conform(store: AnyVectorIndex) -> AnyVectorIndex:
+    """Repartitions a monolithic index the first time it is built on with VECTOR_SHARDS > 1."""
+    if settings.VECTOR_SHARDS > 1 and isinstance(store, VectorIndex):
+        return ShardedVectorIndex.from_index(store)
+    return store
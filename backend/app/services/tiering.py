@@ -0,0 +1,274 @@
+import heapq
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import faiss
+import numpy as np
+from langchain.docstore.document import Document as LangchainDocument
+
+from ..core import metrics
+from ..core.config import settings
+from ..core.logging_config import get_logger
+from . import access_stats
+from .chunk_store import ChunkStore
+from .index_generations import GenerationManager
+from .sharded_index import AnyVectorIndex, ShardedVectorIndex, load_vector_index
+
+logger = get_logger("tiering")
+
+# Written once per generation and shared (through the page cache) by every
+# process serving it.
+TIER_VECTORS_FILE = "tier.f32"
+TIER_IDS_FILE = "tier.ids.npy"
+
+# Rows scored per step of the cold scan.
+_COLD_BLOCK = 65536
+
+_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="rag-cold-search")
+
+
+def stored_vectors(store: AnyVectorIndex) -> Tuple[np.ndarray, np.ndarray]:
+    """All (chunk ids, float32 vectors) of a store, in matching order."""
+    if isinstance(store, ShardedVectorIndex):
+        parts = [stored_vectors(shard) for shard in store.shards if shard.ntotal]
+        if not parts:
+            return np.empty(0, dtype=np.int64), np.empty((0, store.dim), dtype=np.float32)
+        return (np.concatenate([ids for ids, _ in parts]),
+                np.concatenate([vectors for _, vectors in parts]))
+    ids = store.ids()
+    raw = store.raw_vectors()
+    if raw is not None:
+        return ids, np.asarray(raw[ids])
+    if store.is_quantized:
+        raise ValueError("A quantized index without its float32 vector file cannot be tiered.")
+    return ids, faiss.downcast_index(store.index.index).reconstruct_n(0, store.ntotal)
+
+
+def _document_ids(chunks: ChunkStore, ids: np.ndarray) -> np.ndarray:
+    known = chunks.doc_ids(ids.tolist())
+    return np.array([-1 if known.get(int(i)) is None else known[int(i)] for i in ids],
+                    dtype=np.int64)
+
+
+def _runs(mask: np.ndarray) -> List[Tuple[int, int]]:
+    """(start, stop) of every run of True in ``mask``."""
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.astype(np.int8), [0]))))
+    return list(zip(edges[0::2].tolist(), edges[1::2].tolist()))
+
+
+def _write_tier_files(store: AnyVectorIndex, directory: str) -> None:
+    ids, vectors = stored_vectors(store)
+    # Rows grouped by document, so any hot set leaves few, long cold runs.
+    order = np.argsort(_document_ids(store.chunks, ids), kind="stable")
+    ids, vectors = ids[order], vectors[order]
+    pid = os.getpid()
+    for name, write in ((TIER_VECTORS_FILE, lambda f: f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())),
+                        (TIER_IDS_FILE, lambda f: np.save(f, ids.astype(np.int64)))):
+        tmp = os.path.join(directory, f"{name}.{pid}.tmp")
+        with open(tmp, "wb") as f:
+            write(f)
+        os.replace(tmp, os.path.join(directory, name))
+
+
+class TieredIndex:
+    """Serves a generation from a hot RAM tier plus a memory-mapped cold tier.
+
+    Chunks of the most retrieved documents are held in an in-memory FAISS
+    index with their text preloaded; every other vector is scanned straight
+    from the generation's memory-mapped float32 file, which the OS can page
+    out and which all worker processes share. Both tiers are exact, so
+    results match the untiered index. Builders get a full private copy via
+    ``clone()``, loaded from the generation's files.
+    """
+
+    def __init__(self, root: str, directory: str, chunks: ChunkStore, ids: np.ndarray,
+                 vectors: np.ndarray, doc_ids: np.ndarray, hot_documents: Set[int]):
+        self.root = root
+        self.directory = directory
+        self.chunks = chunks
+        self.quantization = "none"
+        self.hot_documents = frozenset(hot_documents)
+        self._ids = ids
+        self._vectors = vectors
+        self._doc_ids = doc_ids
+
+        hot_rows = np.flatnonzero(np.isin(doc_ids, list(self.hot_documents)))
+        hot_rows = hot_rows[:settings.TIER_HOT_MAX_CHUNKS]
+        self._cold_mask = np.ones(len(ids), dtype=bool)
+        self._cold_mask[hot_rows] = False
+        # The cold scan reads and scores only these row ranges.
+        self._cold_ranges = _runs(self._cold_mask)
+        self.hot_index = faiss.IndexIDMap2(faiss.IndexFlatIP(self.dim))
+        if len(hot_rows):
+            self.hot_index.add_with_ids(np.asarray(vectors[hot_rows]), ids[hot_rows])
+        self._hot_chunks: Dict[int, LangchainDocument] = self.chunks.get(ids[hot_rows].tolist())
+        metrics.INDEX_TIER_CHUNKS.labels("hot").set(len(hot_rows))
+        metrics.INDEX_TIER_CHUNKS.labels("cold").set(len(ids) - len(hot_rows))
+
+    @classmethod
+    def build(cls, store: AnyVectorIndex, root: str, directory: str,
+              hot_documents: Set[int]) -> "TieredIndex":
+        """Tiers a loaded store; the store itself can be dropped afterwards."""
+        if not os.path.exists(os.path.join(directory, TIER_IDS_FILE)):
+            _write_tier_files(store, directory)
+        ids = np.load(os.path.join(directory, TIER_IDS_FILE))
+        vectors = np.memmap(os.path.join(directory, TIER_VECTORS_FILE),
+                            dtype=np.float32, mode="r", shape=(len(ids), store.dim))
+        doc_ids = _document_ids(store.chunks, ids)
+        tiered = cls(root, directory, store.chunks, ids, vectors, doc_ids, hot_documents)
+        logger.info("Tiered index generation", extra={
+            "directory": directory, "hot_documents": len(hot_documents),
+            "hot_chunks": tiered.hot_index.ntotal, "chunks": len(ids)})
+        return tiered
+
+    def retier(self, hot_documents: Set[int]) -> "TieredIndex":
+        """Same generation with a new hot set; the cold file is reused as is."""
+        return TieredIndex(self.root, self.directory, self.chunks, self._ids,
+                           self._vectors, self._doc_ids, hot_documents)
+
+    def clone(self) -> AnyVectorIndex:
+        """A full, private, writable copy of this generation, loaded from disk."""
+        return load_vector_index(self.root, self.directory)
+
+    # --- Properties ---
+
+    @property
+    def path(self) -> str:
+        return self.root
+
+    @property
+    def ntotal(self) -> int:
+        return len(self._ids)
+
+    @property
+    def dim(self) -> int:
+        return self._vectors.shape[1]
+
+    @property
+    def is_quantized(self) -> bool:
+        return False
+
+    def ids(self) -> np.ndarray:
+        return self._ids
+
+    def memory_bytes(self) -> int:
+        """Resident footprint of the hot tier and bookkeeping (the cold tier is mmapped)."""
+        hot_text = sum(len(doc.page_content) for doc in self._hot_chunks.values())
+        return int(self.hot_index.ntotal * self.dim * 4 + hot_text
+                   + self._ids.nbytes + self._doc_ids.nbytes + self._cold_mask.nbytes)
+
+    # --- Reads ---
+
+    def _cold_search(self, queries: np.ndarray, k: int) -> List[List[Tuple[int, float]]]:
+        best: List[List[Tuple[int, float]]] = [[] for _ in range(len(queries))]
+        for begin, end in self._cold_ranges:
+            for start in range(begin, end, _COLD_BLOCK):
+                block = np.asarray(self._vectors[start:min(start + _COLD_BLOCK, end)])
+                scores = queries @ block.T
+                take = min(k, len(block))
+                top = np.argpartition(-scores, take - 1, axis=1)[:, :take]
+                for q, rows in enumerate(top):
+                    hits = [(int(self._ids[start + r]), float(scores[q, r])) for r in rows]
+                    best[q] = heapq.nlargest(k, best[q] + hits, key=lambda hit: hit[1])
+        return best
+
+    def _hot_search(self, queries: np.ndarray, k: int) -> List[List[Tuple[int, float]]]:
+        if not self.hot_index.ntotal:
+            return [[] for _ in range(len(queries))]
+        scores, ids = self.hot_index.search(queries, min(k, self.hot_index.ntotal))
+        return [[(int(i), float(s)) for i, s in zip(row_ids, row_scores) if i != -1]
+                for row_scores, row_ids in zip(scores, ids)]
+
+    def search_ids_batch(self, query_vectors: Sequence[Sequence[float]], k: int) -> List[List[Tuple[int, float]]]:
+        """Searches both tiers and merges them.
+
+        ``TIER_COLD_SEARCH=parallel`` scans the cold tier alongside the hot
+        one; ``fallback`` only scans it for batches where some query has
+        fewer than k hot hits scoring at least ``TIER_HOT_MIN_SCORE``.
+        """
+        queries = np.asarray(query_vectors, dtype=np.float32)
+        if self.ntotal == 0:
+            return [[] for _ in range(len(queries))]
+        parallel = settings.TIER_COLD_SEARCH == "parallel"
+        cold_future = _pool.submit(self._cold_search, queries, k) if parallel else None
+        hot = self._hot_search(queries, k)
+        if cold_future is not None:
+            cold = cold_future.result()
+        elif any(len(row) < k or row[-1][1] < settings.TIER_HOT_MIN_SCORE for row in hot):
+            cold = self._cold_search(queries, k)
+        else:
+            metrics.TIER_SEARCHES.labels("hot_only").inc()
+            return hot
+        metrics.TIER_SEARCHES.labels("hot_and_cold").inc()
+        return [heapq.nlargest(k, h + c, key=lambda hit: hit[1]) for h, c in zip(hot, cold)]
+
+    def search_ids(self, query_vector: Sequence[float], k: int) -> List[Tuple[int, float]]:
+        return self.search_ids_batch([query_vector], k)[0]
+
+    def search_with_scores(self, query_vector: Sequence[float], k: int) -> List[Tuple[LangchainDocument, float]]:
+        return self.search_batch([query_vector], k)[0]
+
+    def search_batch(self, query_vectors: Sequence[Sequence[float]], k: int) -> List[List[Tuple[LangchainDocument, float]]]:
+        """Batched search; hot chunks come from RAM, the rest in one chunk store read."""
+        hits = self.search_ids_batch(query_vectors, k)
+        wanted = {chunk_id for row in hits for chunk_id, _ in row}
+        docs = {chunk_id: self._hot_chunks[chunk_id]
+                for chunk_id in wanted if chunk_id in self._hot_chunks}
+        docs.update(self.chunks.get(wanted - docs.keys()))
+        return [
+            [(docs[chunk_id], score) for chunk_id, score in row if chunk_id in docs]
+            for row in hits
+        ]
+
+    def search(self, query_vector: Sequence[float], k: int) -> List[LangchainDocument]:
+        return [doc for doc, _ in self.search_with_scores(query_vector, k)]
+
+
+def untiered(store: AnyVectorIndex) -> AnyVectorIndex:
+    """The plain store behind a generation, for tools that need its FAISS index or raw vectors."""
+    return store.clone() if isinstance(store, TieredIndex) else store
+
+
+def _hot_documents() -> Set[int]:
+    try:
+        return access_stats.hot_document_ids()
+    except Exception as e:
+        logger.warning("Could not read document access stats: %s", e)
+        return set()
+
+
+def tier_store(store: AnyVectorIndex, root: str, directory: str) -> AnyVectorIndex:
+    """GenerationManager hook: serves a loaded or published generation tiered."""
+    if store.ntotal == 0:
+        return store
+    try:
+        return TieredIndex.build(store, root, directory, _hot_documents())
+    except ValueError as e:
+        logger.warning("Serving generation untiered: %s", e)
+        return store
+
+
+def start_retier_job(manager: GenerationManager) -> Optional[threading.Thread]:
+    """Re-picks the hot set every TIER_REFRESH_SECONDS from the access log."""
+    interval = settings.TIER_REFRESH_SECONDS
+    if not settings.TIERING_ENABLED or interval <= 0:
+        return None
+
+    def loop():
+        while True:
+            stop.wait(interval)
+            generation = manager.current()
+            if generation is None or not isinstance(generation.store, TieredIndex):
+                continue
+            hot = _hot_documents()
+            if hot != generation.store.hot_documents:
+                # Same data, new layout: queries already holding the old
+                # store finish on it.
+                generation.store = generation.store.retier(hot)
+
+    stop = threading.Event()
+    thread = threading.Thread(target=loop, name="rag-retier", daemon=True)
+    thread.start()
+    return thread
@@ -1,3 +1,5 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Optional
 
@@ -10,7 +12,7 @@ def get_user(db: Session, username: str) -> Optional[db_core.User]:
     return db.query(db_core.User).filter(db_core.User.username == username).first()
 
 def create_user(db: Session, user: schemas.UserCreate) -> db_core.User:
-    hashed_password = security.get_password_hash(user.password)
+    hashed_password = security.hash_password(user.password)
     db_user = db_core.User(
         username=user.username,
         hashed_password=hashed_password,
@@ -29,3 +31,29 @@ def authenticate_user(db: Session, username: str, password: str) -> Optional[db_
         return None
     return user
 
+
+# --- Async variants (request handlers) ---
+
+async def get_user_async(db: AsyncSession, username: str) -> Optional[db_core.User]:
+    return await db.scalar(
+        select(db_core.User).where(db_core.User.username == username).limit(1))
+
+async def create_user_async(db: AsyncSession, user: schemas.UserCreate) -> db_core.User:
+    hashed_password = await security.hash_password_async(user.password)
+    db_user = db_core.User(
+        username=user.username,
+        hashed_password=hashed_password,
+        role=user.role
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+async def authenticate_user_async(db: AsyncSession, username: str, password: str) -> Optional[db_core.User]:
+    user = await get_user_async(db, username)
+    if not user:
+        return None
+    if not await security.verify_password_async(password, user.hashed_password):
+        return None
+    return user
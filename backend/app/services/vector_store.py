@@ -0,0 +1,301 @@
+import os
+import pickle
+from typing import List, Optional, Sequence, Tuple
+
+import faiss
+import numpy as np
+from langchain.docstore.document import Document as LangchainDocument
+
+from ..core.config import settings
+from ..core.logging_config import get_logger
+from .chunk_store import ChunkStore
+
+logger = get_logger("vector_store")
+
+QUANTIZATION_KINDS = ("none", "fp16", "int8", "pq")
+
+INDEX_FILE = "index.faiss"
+CHUNKS_FILE = "chunks.sqlite"
+# Raw float32 copy of every vector, row i = chunk id i. Only written for
+# quantized stores, where it backs exact re-scoring of the candidates.
+VECTORS_FILE = "vectors.f32"
+# Pickled InMemoryDocstore written by FAISS.save_local before the chunk store.
+LEGACY_DOCSTORE_FILE = "index.pkl"
+
+
+def make_faiss_index(dim: int, quantization: str) -> faiss.Index:
+    """Builds an empty inner-product index with the requested vector encoding."""
+    metric = faiss.METRIC_INNER_PRODUCT
+    if quantization == "none":
+        return faiss.IndexFlatIP(dim)
+    if quantization == "fp16":
+        return faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_fp16, metric)
+    if quantization == "int8":
+        return faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit, metric)
+    if quantization == "pq":
+        m = settings.VECTOR_PQ_SUBQUANTIZERS
+        if dim % m:
+            raise ValueError(
+                f"VECTOR_PQ_SUBQUANTIZERS={m} does not divide dimension {dim}.")
+        return faiss.IndexPQ(dim, m, 8, metric)
+    raise ValueError(
+        f"Unknown quantization '{quantization}'. Expected one of {QUANTIZATION_KINDS}.")
+
+
+def train_min(quantization: str) -> int:
+    """Vectors needed before a quantizer can be trained (0 = no training)."""
+    if quantization in ("none", "fp16"):
+        return 0
+    return settings.VECTOR_QUANTIZATION_TRAIN_MIN
+
+
+def index_nbytes(index: faiss.Index) -> int:
+    """In-memory footprint of an index, measured by its serialized size."""
+    return int(faiss.serialize_index(index).nbytes)
+
+
+class VectorIndex:
+    """FAISS index of chunk ids backed by a SQLite chunk store.
+
+    The index holds only vectors and int64 chunk ids; text and metadata live
+    in ``chunks.sqlite`` and are fetched for the top-k hits only. Quantized
+    stores stay exact (flat) until enough vectors exist to train the
+    quantizer, then switch over in place.
+    """
+
+    def __init__(self, path: str, index: faiss.IndexIDMap2, chunks: ChunkStore, quantization: str = "none"):
+        self.path = path
+        self.index = index
+        self.chunks = chunks
+        self.quantization = quantization
+        self._vectors: Optional[np.memmap] = None
+
+    # --- Construction and persistence ---
+
+    @classmethod
+    def create(cls, path: str, dim: int, quantization: Optional[str] = None) -> "VectorIndex":
+        quantization = quantization or settings.VECTOR_QUANTIZATION
+        inner = make_faiss_index(
+            dim, "none" if train_min(quantization) else quantization)
+        chunks = ChunkStore(os.path.join(path, CHUNKS_FILE))
+        return cls(path, faiss.IndexIDMap2(inner), chunks, quantization)
+
+    @classmethod
+    def load(cls, path: str, index_file: Optional[str] = None) -> "VectorIndex":
+        """Loads a store; ``index_file`` defaults to ``<path>/index.faiss``."""
+        if os.path.exists(os.path.join(path, LEGACY_DOCSTORE_FILE)):
+            return migrate_legacy_store(path)
+        index = faiss.read_index(
+            index_file or os.path.join(path, INDEX_FILE))
+        chunks = ChunkStore(os.path.join(path, CHUNKS_FILE))
+        quantization = settings.VECTOR_QUANTIZATION
+        if quantization != "none" and not os.path.exists(os.path.join(path, VECTORS_FILE)):
+            # Without the float32 copy there is nothing to train or re-score
+            # from; keep serving the store as it was written.
+            logger.warning(
+                "No %s in %s; ignoring VECTOR_QUANTIZATION=%s for this index.",
+                VECTORS_FILE, path, quantization)
+            quantization = "none"
+        return cls(path, index, chunks, quantization)
+
+    def save(self, index_file: Optional[str] = None) -> None:
+        index_file = index_file or os.path.join(self.path, INDEX_FILE)
+        os.makedirs(os.path.dirname(index_file), exist_ok=True)
+        tmp = index_file + ".tmp"
+        faiss.write_index(self.index, tmp)
+        os.replace(tmp, index_file)
+
+    def clone(self) -> "VectorIndex":
+        """Copy with its own FAISS index; chunk store and vector file are shared.
+
+        The vector file is append-only by chunk id. Chunk store writes made
+        for the copy inside ``GenerationManager.build_next`` stay in an open
+        transaction until it is published, and released chunks are only
+        tombstoned, so searches on the original keep finding their text and
+        metadata.
+        """
+        return VectorIndex(self.path, faiss.clone_index(self.index), self.chunks, self.quantization)
+
+    # --- Properties ---
+
+    @property
+    def ntotal(self) -> int:
+        return self.index.ntotal
+
+    @property
+    def dim(self) -> int:
+        return self.index.d
+
+    @property
+    def is_quantized(self) -> bool:
+        return not isinstance(faiss.downcast_index(self.index.index), faiss.IndexFlat)
+
+    def ids(self) -> np.ndarray:
+        return faiss.vector_to_array(self.index.id_map)
+
+    def memory_bytes(self) -> int:
+        return index_nbytes(self.index)
+
+    # --- Raw vector file ---
+
+    def _vectors_path(self) -> str:
+        return os.path.join(self.path, VECTORS_FILE)
+
+    def _write_vectors(self, ids: Sequence[int], vectors: np.ndarray) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        row_bytes = 4 * self.dim
+        mode = "r+b" if os.path.exists(self._vectors_path()) else "wb"
+        with open(self._vectors_path(), mode) as f:
+            for chunk_id, vector in zip(ids, vectors):
+                f.seek(chunk_id * row_bytes)
+                f.write(np.ascontiguousarray(vector, dtype=np.float32).tobytes())
+        self._vectors = None
+
+    def _keeps_vectors(self) -> bool:
+        """Whether adds must go to the vector file.
+
+        Once the file exists, or the index is quantized, it has to cover
+        every chunk id in the index: re-scoring and re-training read it by
+        id, whatever VECTOR_QUANTIZATION says now.
+        """
+        return (self.quantization != "none" or self.is_quantized
+                or os.path.exists(self._vectors_path()))
+
+    def raw_vectors(self) -> Optional[np.memmap]:
+        """Memory-maps the float32 vector file (rows indexed by chunk id)."""
+        if self._vectors is None:
+            path = self._vectors_path()
+            if not os.path.exists(path):
+                return None
+            rows = os.path.getsize(path) // (4 * self.dim)
+            self._vectors = np.memmap(
+                path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+        return self._vectors
+
+    # --- Writes ---
+
+    def add(self, texts: Sequence[str], vectors: Sequence[Sequence[float]], metadatas: Sequence[dict]) -> List[int]:
+        """Adds embedded chunks and returns their chunk ids."""
+        matrix = np.asarray(vectors, dtype=np.float32)
+        ids = self.chunks.add(texts, metadatas)
+        if self._keeps_vectors():
+            self._write_vectors(ids, matrix)
+        self.index.add_with_ids(matrix, np.asarray(ids, dtype=np.int64))
+        if self.quantization != "none" and not self.is_quantized:
+            self._maybe_quantize()
+        return ids
+
+    def remove_ids(self, ids: Sequence[int]) -> int:
+        """Removes vectors by chunk id; returns how many were present."""
+        if not len(ids):
+            return 0
+        return int(self.index.remove_ids(np.asarray(ids, dtype=np.int64)))
+
+    def _maybe_quantize(self) -> None:
+        if self.ntotal >= train_min(self.quantization):
+            self.quantize()
+
+    def quantize(self) -> None:
+        """Re-encodes the stored vectors with the configured quantizer now."""
+        if self.quantization == "none":
+            return
+        ids = self.ids()
+        if self.is_quantized:
+            vectors = np.asarray(self.raw_vectors()[ids])
+        else:
+            # The flat index holds the exact vectors; write them all, since
+            # rows added before quantization was configured are not on file.
+            vectors = faiss.downcast_index(self.index.index).reconstruct_n(0, self.ntotal)
+            self._write_vectors(ids, vectors)
+        index = faiss.IndexIDMap2(make_faiss_index(self.dim, self.quantization))
+        logger.info("Training quantizer", extra={
+                    "quantization": self.quantization, "vectors": len(vectors)})
+        index.train(vectors)
+        index.add_with_ids(vectors, ids)
+        self.index = index
+
+    # --- Reads ---
+
+    def search_ids_batch(self, query_vectors: Sequence[Sequence[float]], k: int) -> List[List[Tuple[int, float]]]:
+        """Returns (chunk id, score) hits for every row of a query matrix.
+
+        The whole matrix goes through one FAISS search call. Quantized
+        stores fetch ``VECTOR_RESCORE_FACTOR * k`` candidates per query and
+        re-rank them exactly against the memory-mapped float32 vectors.
+        """
+        queries = np.asarray(query_vectors, dtype=np.float32)
+        if self.ntotal == 0:
+            return [[] for _ in range(len(queries))]
+        raw = self.raw_vectors() if (
+            self.is_quantized and settings.VECTOR_RESCORE) else None
+        fetch = k * settings.VECTOR_RESCORE_FACTOR if raw is not None else k
+        scores, ids = self.index.search(queries, min(fetch, self.ntotal))
+
+        results = []
+        for query, row_scores, row_ids in zip(queries, scores, ids):
+            valid = row_ids != -1
+            candidates, candidate_scores = row_ids[valid], row_scores[valid]
+            if raw is not None and len(candidates):
+                candidate_scores = raw[candidates] @ query
+                order = np.argsort(-candidate_scores)[:k]
+                candidates, candidate_scores = candidates[order], candidate_scores[order]
+            results.append([(int(i), float(s))
+                           for i, s in zip(candidates[:k], candidate_scores[:k])])
+        return results
+
+    def search_ids(self, query_vector: Sequence[float], k: int) -> List[Tuple[int, float]]:
+        """Returns (chunk id, score) for the k most similar chunks."""
+        return self.search_ids_batch([query_vector], k)[0]
+
+    def search_with_scores(self, query_vector: Sequence[float], k: int) -> List[Tuple[LangchainDocument, float]]:
+        return self.search_batch([query_vector], k)[0]
+
+    def search_batch(self, query_vectors: Sequence[Sequence[float]], k: int) -> List[List[Tuple[LangchainDocument, float]]]:
+        """Batched search; chunks for all hits are fetched in one read."""
+        hits = self.search_ids_batch(query_vectors, k)
+        docs = self.chunks.get(
+            {chunk_id for row in hits for chunk_id, _ in row})
+        return [
+            [(docs[chunk_id], score) for chunk_id, score in row if chunk_id in docs]
+            for row in hits
+        ]
+
+    def search(self, query_vector: Sequence[float], k: int) -> List[LangchainDocument]:
+        return [doc for doc, _ in self.search_with_scores(query_vector, k)]
+
+
+def migrate_legacy_store(path: str) -> VectorIndex:
+    """Converts a ``FAISS.save_local`` store (pickled docstore) in place.
+
+    Chunks move into the chunk store in index order and the vectors are
+    re-added under their new ids. The pickle is kept as ``index.pkl.migrated``.
+    """
+    legacy_index = faiss.read_index(os.path.join(path, INDEX_FILE))
+    with open(os.path.join(path, LEGACY_DOCSTORE_FILE), "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+    logger.info("Migrating pickled docstore to chunk store",
+                extra={"path": path, "vectors": legacy_index.ntotal})
+
+    raw_path = os.path.join(path, VECTORS_FILE)
+    if os.path.exists(raw_path):
+        # Written by the previous layout with one row per index position.
+        vectors = np.fromfile(raw_path, dtype=np.float32).reshape(
+            -1, legacy_index.d)[: legacy_index.ntotal]
+        os.replace(raw_path, raw_path + ".migrated")
+    else:
+        vectors = legacy_index.reconstruct_n(0, legacy_index.ntotal)
+
+    docs = [docstore.search(index_to_docstore_id[i])
+            for i in range(legacy_index.ntotal)]
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(os.path.join(path, CHUNKS_FILE + suffix)):
+            # Left over from an interrupted migration.
+            os.remove(os.path.join(path, CHUNKS_FILE + suffix))
+    store = VectorIndex.create(path, legacy_index.d)
+    if len(docs):
+        store.add([d.page_content for d in docs], vectors,
+                  [d.metadata for d in docs])
+    store.save()
+    os.replace(os.path.join(path, LEGACY_DOCSTORE_FILE),
+               os.path.join(path, LEGACY_DOCSTORE_FILE + ".migrated"))
+    return store
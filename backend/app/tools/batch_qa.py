@@ -0,0 +1,65 @@
+"""Answers a file of questions in-process and writes NDJSON results.
+
+Usage (from the repository root)::
+
+    python -m backend.app.tools.batch_qa questions.txt --user admin > answers.ndjson
+
+The input holds one question per line, or JSON lines with a ``question``
+field. Results are written in completion order with the question's
+``index``. Without ``--user`` nothing is written to the query log.
+"""
+import argparse
+import json
+import sys
+from typing import List
+
+from ..core import database as db_core
+from ..core.config import settings
+from ..services import batch_service
+from ..services import user_service
+
+
+def read_questions(path: str) -> List[str]:
+    stream = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    with stream:
+        questions = []
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                line = json.loads(line)["question"]
+            questions.append(line)
+    return questions
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("questions", help="Question file, or - for stdin.")
+    parser.add_argument("--user", help="Username to log the queries under.")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--concurrency", type=int,
+                        default=settings.BATCH_GENERATION_CONCURRENCY)
+    parser.add_argument("--output", default="-",
+                        help="Output file (default: stdout).")
+    args = parser.parse_args(argv)
+
+    user_id = None
+    if args.user:
+        with db_core.SessionLocal() as db:
+            user = user_service.get_user(db, args.user)
+            if not user:
+                raise SystemExit(f"Unknown user '{args.user}'.")
+            user_id = user.id
+
+    questions = read_questions(args.questions)
+    out = sys.stdout if args.output == "-" else open(
+        args.output, "w", encoding="utf-8")
+    with out:
+        for result in batch_service.run_batch(questions, user_id, k=args.k, concurrency=args.concurrency):
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Exports, verifies and benchmarks the embedding backends.
+
+Usage (from the repository root)::
+
+    python -m backend.app.tools.embedding_bench export [--no-quantize]
+    python -m backend.app.tools.embedding_bench bench [--docs 256] [--file chunks.txt]
+
+``bench`` compares torch, ONNX and ONNX int8 on document throughput and
+single-query latency, and checks each against the torch reference.
+"""
+import argparse
+import json
+import statistics
+import time
+from typing import List
+
+from ..core.config import settings
+from ..services.embedding_backends import (
+    OnnxEmbeddings, cosine_agreement, create_torch_embeddings, export_onnx)
+
+_SAMPLE = (
+    "Employees must submit expense reports within thirty days of purchase, "
+    "attaching itemised receipts for every line above the reporting threshold. "
+)
+
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def load_texts(path: str, count: int) -> List[str]:
+    if path:
+        with open(path, encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()]
+        return (texts * (count // max(len(texts), 1) + 1))[:count]
+    # Roughly the size of one 1500-character chunk.
+    return [f"{i}: " + _SAMPLE * 8 for i in range(count)]
+
+
+def bench_backend(name: str, model, texts: List[str], queries: int) -> dict:
+    model.embed_documents(texts[:2])  # warm-up
+    start = time.perf_counter()
+    model.embed_documents(texts)
+    doc_seconds = time.perf_counter() - start
+
+    latencies = []
+    for i in range(queries):
+        start = time.perf_counter()
+        model.embed_query(f"What is the policy on item {i}?")
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {
+        "backend": name,
+        "docs_per_second": round(len(texts) / doc_seconds, 2),
+        "query_p50_ms": round(statistics.median(latencies), 2),
+        "query_p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 2),
+    }
+
+
+def run_bench(args) -> None:
+    texts = load_texts(args.file, args.docs)
+    reference = create_torch_embeddings()
+    backends = [("torch", reference)]
+    for quantized in (False, True):
+        try:
+            backends.append((
+                "onnx-int8" if quantized else "onnx",
+                OnnxEmbeddings(settings.EMBEDDING_ONNX_DIR, quantized=quantized,
+                               batch_size=settings.EMBEDDING_BATCH_SIZE),
+            ))
+        except FileNotFoundError as e:
+            print(f"skipping: {e}")
+
+    rows = []
+    for name, model in backends:
+        row = bench_backend(name, model, texts, args.queries)
+        if model is not reference:
+            row.update(cosine_agreement(reference, model, texts[:args.verify]))
+        rows.append(row)
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(f"{len(texts)} documents, {args.queries} queries, "
+          f"threads={settings.EMBEDDING_THREADS or 'default'}")
+    for row in rows:
+        agreement = ""
+        if "min_cosine" in row:
+            agreement = (f"  min_cos={row['min_cosine']:.4f} mean_cos={row['mean_cosine']:.4f}"
+                         f" {'ok' if row['passed'] else 'BELOW THRESHOLD'}")
+        print(f"{row['backend']:>9}  {row['docs_per_second']:>8.1f} docs/s  "
+              f"query p50={row['query_p50_ms']:.1f}ms p95={row['query_p95_ms']:.1f}ms{agreement}")
+
+
+def run_export(args) -> None:
+    written = export_onnx(args.out, quantize=not args.no_quantize)
+    reference = create_torch_embeddings()
+    texts = load_texts("", args.verify)
+    for path in written:
+        model = OnnxEmbeddings(args.out, quantized=path.endswith(".int8.onnx"))
+        result = cosine_agreement(reference, model, texts)
+        print(f"{path}: {json.dumps(result)}")
+        if not result["passed"]:
+            raise SystemExit(
+                f"{path} disagrees with the reference model "
+                f"(min cosine {result['min_cosine']:.4f} < {settings.EMBEDDING_MIN_COSINE}).")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export = sub.add_parser("export", help="Export the model to ONNX and verify it.")
+    export.add_argument("--out", default=settings.EMBEDDING_ONNX_DIR)
+    export.add_argument("--no-quantize", action="store_true")
+    export.add_argument("--verify", type=int, default=32)
+    export.set_defaults(func=run_export)
+
+    bench = sub.add_parser("bench", help="Compare backend throughput and agreement.")
+    bench.add_argument("--docs", type=_positive_int, default=256)
+    bench.add_argument("--queries", type=_positive_int, default=50)
+    bench.add_argument("--verify", type=int, default=64)
+    bench.add_argument("--file", default="", help="One text per line.")
+    bench.add_argument("--json", action="store_true")
+    bench.set_defaults(func=run_bench)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
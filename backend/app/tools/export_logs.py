@@ -0,0 +1,118 @@
+"""Exports query logs or feedback to NDJSON, CSV or Parquet.
+
+Usage (from the repository root)::
+
+    python -m backend.app.tools.export_logs query_logs --format parquet -o logs.parquet
+    python -m backend.app.tools.export_logs query_logs -o logs.ndjson --resume
+
+``--resume`` continues an NDJSON or CSV file after its last complete row,
+dropping whatever part of a row an interrupted export left behind.
+"""
+import argparse
+import csv
+import datetime
+import json
+import os
+import sys
+from typing import Tuple
+
+from ..services import export_service
+
+
+def resume_point(path: str, fmt: str) -> Tuple[int, int]:
+    """(id, end offset) of the last complete row in an NDJSON or CSV export file.
+
+    Bytes past the offset belong to a row torn by an interrupted export and
+    must be truncated before appending.
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return 0, 0
+    with open(path, "rb") as f:
+        return _ndjson_resume_point(f) if fmt == "ndjson" else _csv_resume_point(f)
+
+
+def _ndjson_resume_point(f) -> Tuple[int, int]:
+    # Rows can be long; read backwards until a complete line is available.
+    size = f.seek(0, os.SEEK_END)
+    block = 1 << 16
+    while True:
+        start = max(0, size - block)
+        f.seek(start)
+        data = f.read()
+        end = len(data)
+        while True:
+            newline = data.rfind(b"\n", 0, end)
+            if newline < 0:
+                break
+            begin = data.rfind(b"\n", 0, newline) + 1
+            if begin == 0 and start > 0:
+                break  # the line may start before this block
+            try:
+                return int(json.loads(data[begin:newline])["id"]), start + newline + 1
+            except (ValueError, KeyError, TypeError):
+                end = begin
+        if start == 0:
+            return 0, 0
+        block *= 2
+
+
+def _csv_resume_point(f) -> Tuple[int, int]:
+    # Answers span several lines, so records are parsed forward; strict mode
+    # raises on a quoted field cut off by the end of the file.
+    consumed = 0
+    last_line = b""
+
+    def lines():
+        nonlocal consumed, last_line
+        for line in f:
+            consumed += len(line)
+            last_line = line
+            yield line.decode("utf-8", errors="replace")
+
+    last_id, end = 0, 0
+    try:
+        for row in csv.reader(lines(), strict=True):
+            if not last_line.endswith(b"\n"):
+                break
+            try:
+                last_id = int(row[0])
+            except (ValueError, IndexError):
+                pass  # header
+            end = consumed
+    except csv.Error:
+        pass
+    return last_id, end
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("table", choices=export_service.EXPORT_TABLES)
+    parser.add_argument("--format", choices=export_service.EXPORT_FORMATS, default="ndjson")
+    parser.add_argument("-o", "--output", default="-")
+    parser.add_argument("--start", type=datetime.datetime.fromisoformat)
+    parser.add_argument("--end", type=datetime.datetime.fromisoformat)
+    parser.add_argument("--after-id", type=int, default=0)
+    parser.add_argument("--resume", action="store_true")
+    args = parser.parse_args(argv)
+
+    after_id, mode = args.after_id, "wb"
+    if args.resume:
+        if args.output == "-" or args.format == "parquet":
+            raise SystemExit("--resume needs an NDJSON or CSV output file.")
+        last_id, end = resume_point(args.output, args.format)
+        after_id = max(after_id, last_id)
+        if end:
+            with open(args.output, "r+b") as f:
+                f.truncate(end)
+            mode = "ab"
+
+    stream = export_service.export(
+        args.table, args.format, args.start, args.end, after_id, header=mode == "wb")
+    out = sys.stdout.buffer if args.output == "-" else open(args.output, mode)
+    with out:
+        for chunk in stream:
+            out.write(chunk)
+
+
+if __name__ == "__main__":
+    main()
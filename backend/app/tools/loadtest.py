@@ -0,0 +1,93 @@
+"""Load-tests the API against a fake Ollama server and reports saturation curves.
+
+Usage (from the repository root)::
+
+    python -m backend.app.tools.loadtest --workload mixed --levels 1,2,4,8,16 --duration 30
+    python -m backend.app.tools.loadtest --url http://api:8000 --workload query --json curve.json
+
+Without ``--url`` the API is started locally in a subprocess, with stub
+embeddings and the LLM replaced by ``backend.app.loadtest.fake_ollama``
+(token rate, first-token latency and parallel slots are configurable), and
+all state under ``--workdir``. Each concurrency level runs closed-loop
+virtual users for ``--duration`` seconds after a warm-up; throughput and
+p50/p95/p99 latency are reported per operation and level.
+"""
+import argparse
+import json
+import os
+from contextlib import nullcontext
+
+from ..loadtest.fake_ollama import FakeModelConfig
+from ..loadtest.runner import format_curve, local_stack, login, saturation_curve, seed_documents
+from ..loadtest.workloads import WORKLOADS, Session, load_workload
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workload", default="mixed",
+                        help=f"One of {sorted(WORKLOADS)} or a JSON workload file.")
+    parser.add_argument("--levels", default="1,2,4,8,16",
+                        help="Comma-separated concurrency levels.")
+    parser.add_argument("--duration", type=float, default=30.0,
+                        help="Measured seconds per level.")
+    parser.add_argument("--warmup", type=float, default=5.0)
+    parser.add_argument("--timeout", type=float, default=120.0,
+                        help="Per-request timeout in seconds.")
+    parser.add_argument("--url", help="Test an already running API instead of starting one.")
+    parser.add_argument("--staff", default="staff:staffpass", help="user:password for queries.")
+    parser.add_argument("--admin", default="admin:adminpass", help="user:password for uploads.")
+    parser.add_argument("--seed-documents", type=int, default=10,
+                        help="Documents uploaded (and embedded) before measuring.")
+    parser.add_argument("--json", help="Also write the curve to this JSON file.")
+
+    local = parser.add_argument_group("local stack (without --url)")
+    local.add_argument("--workdir", default=os.path.join("data", "loadtest"))
+    local.add_argument("--port", type=int, default=8800)
+    local.add_argument("--workers", type=int, default=1, help="uvicorn worker processes.")
+    local.add_argument("--ollama-port", type=int, default=11500)
+    local.add_argument("--tokens-per-second", type=float, default=40.0)
+    local.add_argument("--first-token-seconds", type=float, default=0.3)
+    local.add_argument("--response-tokens", type=int, default=120)
+    local.add_argument("--llm-parallel", type=int, default=1,
+                       help="Concurrent generations of the fake model.")
+    local.add_argument("--embedding-seconds", type=float, default=0.0,
+                       help="Simulated embedding time per text.")
+    local.add_argument("--load-seconds", type=float, default=0.0,
+                       help="Fake model load time after its keep_alive expires.")
+    local.add_argument("--prompt-seconds-per-token", type=float, default=0.0,
+                       help="Fake prompt evaluation time per word outside the cached prefix.")
+    args = parser.parse_args(argv)
+
+    workload = load_workload(args.workload)
+    levels = [int(level) for level in args.levels.split(",") if level.strip()]
+    model = FakeModelConfig(
+        tokens_per_second=args.tokens_per_second,
+        first_token_seconds=args.first_token_seconds,
+        response_tokens=args.response_tokens,
+        parallel=args.llm_parallel,
+        load_seconds=args.load_seconds,
+        prompt_seconds_per_token=args.prompt_seconds_per_token,
+    )
+    stack = nullcontext(args.url) if args.url else local_stack(
+        args.workdir, model, app_port=args.port, ollama_port=args.ollama_port,
+        workers=args.workers, env={"EMBEDDING_STUB_SECONDS": str(args.embedding_seconds)})
+
+    with stack as base_url:
+        session = Session(
+            staff_headers=login(base_url, *args.staff.split(":", 1)),
+            admin_headers=login(base_url, *args.admin.split(":", 1)),
+            workload=workload,
+        )
+        seed_documents(base_url, session, args.seed_documents)
+        curve = saturation_curve(base_url, session, levels, args.duration,
+                                 warmup=args.warmup, timeout=args.timeout)
+
+    print(format_curve(curve))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"workload": workload.name, "duration": args.duration,
+                       "model": None if args.url else vars(model), "levels": curve}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Rebuilds the vector index from stored extraction artifacts on all cores.
+
+Usage (from the repository root)::
+
+    python -m backend.app.tools.reindex
+    python -m backend.app.tools.reindex --chunk-size 800 --chunk-overlap 100 --workers 8
+    EMBEDDING_MODEL_NAME=<model> python -m backend.app.tools.reindex
+
+Every embedded document is re-chunked from its extraction artifact (PDFs
+without one are extracted, and OCRed, once and the artifact kept) on a
+process pool, then embedded and added to a new store in its own directory.
+The running API keeps serving the old index until the rebuilt generation
+is published, and picks it up on its next poll. After changing the
+embedding model, run the API with the same setting. Set CHUNK_SIZE and
+CHUNK_OVERLAP to the values used here so later uploads match.
+"""
+import argparse
+
+from ..core import database as db_core
+from ..services.reindex_service import ReindexConfig, rebuild_index
+from ..services.retrieval import embeddings, index_manager
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunk-size", type=int)
+    parser.add_argument("--chunk-overlap", type=int)
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Extraction and chunking processes (default: one per core).")
+    parser.add_argument("--refresh-artifacts", action="store_true",
+                        help="Re-extract every document instead of reading its artifact.")
+    parser.add_argument("--no-dedup", action="store_true",
+                        help="Embed near-duplicate chunks instead of linking them.")
+    args = parser.parse_args(argv)
+
+    config = ReindexConfig(
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        workers=args.workers,
+        refresh_artifacts=args.refresh_artifacts,
+        dedup=False if args.no_dedup else None,
+    )
+    with db_core.SessionLocal() as db:
+        try:
+            report = rebuild_index(db, index_manager, embeddings, config)
+        except ValueError as e:
+            raise SystemExit(str(e))
+
+    print(f"generation {report.generation}: {report.documents} documents, {report.chunks} chunks "
+          f"({report.deduplicated} deduplicated) in {report.seconds:.1f}s "
+          f"[extract+chunk {report.extract_seconds:.1f}s on {config.workers} workers, "
+          f"embed {report.embed_seconds:.1f}s]")
+    if report.removed:
+        print(f"{report.removed} documents deleted during the rebuild were left out")
+    for doc_id, error in sorted(report.failed.items()):
+        print(f"failed: document {doc_id}: {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Replays logged queries against an alternate retrieval configuration.
+
+Usage (from the repository root)::
+
+    python -m backend.app.tools.replay --chunk-size 800 --chunk-overlap 100 --k 5
+    python -m backend.app.tools.replay --quantization pq --weight-by-feedback
+
+The candidate index is built under ``<VECTOR_STORE_DIR>/replay/<name>`` next
+to production, which is only read. The LLM is never called.
+"""
+import argparse
+import datetime
+import json
+import os
+
+from ..core import database as db_core
+from ..core.config import settings
+from ..services import qa_service
+from ..services.embedding_backends import EMBEDDING_BACKENDS
+from ..services.replay_service import (
+    ReplayConfig, build_alternate_index, candidate_embeddings,
+    load_replay_queries, replay)
+from ..services.tiering import untiered
+from ..services.vector_store import QUANTIZATION_KINDS, VectorIndex
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--name", default="candidate")
+    parser.add_argument("--chunk-size", type=int)
+    parser.add_argument("--chunk-overlap", type=int)
+    parser.add_argument("--k", type=int, default=3,
+                        help="Top-k for the candidate.")
+    parser.add_argument("--production-k", type=int, default=3)
+    parser.add_argument("--quantization", choices=QUANTIZATION_KINDS)
+    parser.add_argument("--embedding-backend", choices=EMBEDDING_BACKENDS)
+    parser.add_argument("--limit", type=int, default=1000,
+                        help="Most recent queries to replay.")
+    parser.add_argument("--since", type=datetime.datetime.fromisoformat,
+                        help="Only queries logged after this ISO timestamp.")
+    parser.add_argument("--weight-by-feedback", action="store_true")
+    parser.add_argument("--reuse", action="store_true",
+                        help="Reuse a previously built candidate index.")
+    args = parser.parse_args(argv)
+
+    config = ReplayConfig(
+        name=args.name,
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        k=args.k,
+        quantization=args.quantization,
+        embedding_backend=args.embedding_backend,
+    )
+    generation = qa_service.index_manager.current()
+    if generation is None:
+        raise SystemExit("No production index to compare against.")
+
+    with db_core.get_db_session() as db:
+        queries = load_replay_queries(
+            db, args.limit, args.since, args.weight_by_feedback)
+    if not queries:
+        raise SystemExit("No logged queries to replay.")
+
+    model = candidate_embeddings(config, qa_service.embeddings)
+    path = os.path.join(settings.VECTOR_STORE_DIR, "replay", config.name)
+    if args.reuse and os.path.exists(path):
+        candidate = VectorIndex.load(path)
+    else:
+        candidate = build_alternate_index(
+            config, path, untiered(generation.store), qa_service.text_splitter, model)
+
+    report = replay(queries, generation.store, qa_service.embeddings, args.production_k,
+                    candidate, model, config)
+    report["production"]["generation"] = generation.id
+    print(json.dumps(report, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
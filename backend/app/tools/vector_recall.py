@@ -0,0 +1,118 @@
+"""Reports recall@k and memory of quantized encodings against the live index.
+
+Usage (from the repository root)::
+
+    python -m backend.app.tools.vector_recall --k 1 3 10 --queries 500
+
+Queries are sampled from the stored vectors; the ground truth is an exact
+inner-product search over the float32 vectors of the current index.
+"""
+import argparse
+import json
+import os
+import time
+from typing import List
+
+import faiss
+import numpy as np
+
+from ..core.config import settings
+from ..services.index_generations import GenerationManager
+from ..services.sharded_index import AnyVectorIndex, ShardedVectorIndex
+from ..services.tiering import untiered
+from ..services.vector_store import (
+    QUANTIZATION_KINDS, VectorIndex, index_nbytes, make_faiss_index)
+
+
+def load_base_vectors(index: AnyVectorIndex) -> np.ndarray:
+    """Float32 vectors of the current index, from the raw file or the flat index."""
+    if isinstance(index, ShardedVectorIndex):
+        # Same row order as index.ids(): shard by shard.
+        return np.concatenate([load_base_vectors(shard) for shard in index.shards])
+    raw = index.raw_vectors()
+    if raw is not None:
+        return np.asarray(raw[index.ids()])
+    if index.is_quantized:
+        raise SystemExit(
+            "The current index is quantized and has no float32 vector file; "
+            "recall cannot be measured against it.")
+    return faiss.downcast_index(index.index.index).reconstruct_n(0, index.ntotal)
+
+
+def recall_at_k(truth: np.ndarray, found: np.ndarray, k: int) -> float:
+    hits = sum(len(set(t[:k]) & set(f[:k])) for t, f in zip(truth, found))
+    return hits / (len(truth) * k)
+
+
+def evaluate(base: np.ndarray, queries: np.ndarray, ks: List[int], rescore_factor: int) -> List[dict]:
+    max_k = max(ks)
+    exact = faiss.IndexFlatIP(base.shape[1])
+    exact.add(base)
+    _, truth = exact.search(queries, max_k)
+    flat_bytes = index_nbytes(exact)
+
+    rows = []
+    for kind in QUANTIZATION_KINDS[1:]:
+        index = make_faiss_index(base.shape[1], kind)
+        if not index.is_trained:
+            index.train(base)
+        index.add(base)
+
+        for rescore in (False, True) if rescore_factor > 1 else (False,):
+            fetch = max_k * rescore_factor if rescore else max_k
+            start = time.perf_counter()
+            _, found = index.search(queries, min(fetch, len(base)))
+            if rescore:
+                found = np.array([
+                    cand[np.argsort(-(base[cand] @ q))][:max_k]
+                    for q, cand in zip(queries, found)
+                ])
+            elapsed = time.perf_counter() - start
+            index_bytes = index_nbytes(index)
+            rows.append({
+                "quantization": kind,
+                "rescore": rescore,
+                **{f"recall@{k}": round(recall_at_k(truth, found, k), 4) for k in ks},
+                "index_bytes": index_bytes,
+                "flat_bytes": flat_bytes,
+                "memory_saved": round(1 - index_bytes / flat_bytes, 4),
+                "search_ms_per_query": round(elapsed * 1000 / len(queries), 4),
+            })
+    return rows
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--path", default=os.path.join(
+        settings.VECTOR_STORE_DIR, "faiss_index"))
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 10])
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--rescore-factor", type=int,
+                        default=settings.VECTOR_RESCORE_FACTOR)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true",
+                        help="Print results as JSON.")
+    args = parser.parse_args(argv)
+
+    generation = GenerationManager(args.path).current()
+    if generation is None:
+        raise SystemExit(f"No index found at {args.path}.")
+    base = load_base_vectors(untiered(generation.store))
+    rng = np.random.default_rng(args.seed)
+    sample = rng.choice(len(base), size=min(
+        args.queries, len(base)), replace=False)
+    rows = evaluate(base, base[sample], args.k, args.rescore_factor)
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(f"{len(base)} vectors x {base.shape[1]} dims, {len(sample)} queries")
+    for row in rows:
+        recalls = "  ".join(f"{key}={row[key]:.3f}" for key in row if key.startswith("recall@"))
+        print(f"{row['quantization']:>5} rescore={str(row['rescore']):<5}  {recalls}  "
+              f"index={row['index_bytes'] / 2**20:.1f}MiB "
+              f"saved={row['memory_saved']:.0%}  {row['search_ms_per_query']:.3f}ms/query")
+
+
+if __name__ == "__main__":
+    main()